@@ -0,0 +1,65 @@
+"""add hot path indexes
+
+Revision ID: 5c1e7f3a9d42
+Revises: b0af5755db10
+Create Date: 2026-10-18 21:40:00.000000
+
+Indexes behind the sales history / reports, customer details, credit
+list, sale and purchase details, purchase upserts and the credit
+ledger. The models declare the same indexes, so a database created by
+Base.metadata.create_all already has them; every index here is created
+IF NOT EXISTS and the migration is safe on either kind of database.
+
+A database created by the app and never stamped must be stamped at the
+previous revision first (`alembic stamp b0af5755db10`), then upgraded.
+
+Check the resulting plans with `python -m benchmarks.query_plans`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e7f3a9d42'
+down_revision: Union[str, Sequence[str], None] = 'b0af5755db10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_CREDIT = sa.text("due_amount > 0")
+
+# (name, table, columns, extra create_index options)
+INDEXES = [
+    # Purchase upserts look items up by name
+    ("ix_items_name", "items", ["name"], {}),
+    # /sales/history keyset pages, reports by date
+    ("ix_sales_created_at_id", "sales", ["created_at", "id"], {}),
+    # /sales/random-history
+    ("ix_sales_type_created_at_id", "sales", ["sale_type", "created_at", "id"], {}),
+    # /customers/{id}/details and /sales, history filtered by customer
+    ("ix_sales_customer_created_at_id", "sales", ["customer_id", "created_at", "id"], {}),
+    # /credit/: only bills with money due
+    ("ix_sales_open_credit", "sales", ["customer_id"], {
+        "sqlite_where": OPEN_CREDIT,
+        "postgresql_where": OPEN_CREDIT,
+    }),
+    # /sales/{id} lines
+    ("ix_sale_items_sale_id", "sale_items", ["sale_id"], {}),
+    # /purchases/{id} lines
+    ("ix_purchase_items_purchase_id", "purchase_items", ["purchase_id"], {}),
+    # A customer's ledger in order (last balance, rebuild-balances)
+    ("ix_credit_ledger_customer_id_id", "credit_ledger", ["customer_id", "id"], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns, options in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True, **options)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
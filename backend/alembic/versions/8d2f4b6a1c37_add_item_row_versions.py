@@ -0,0 +1,63 @@
+"""add item row versions
+
+Revision ID: 8d2f4b6a1c37
+Revises: 5c1e7f3a9d42
+Create Date: 2026-10-18 23:10:00.000000
+
+items.version holds the "item_rows" counter value of the last write to
+the row (GET /items/?since_version=), cache_versions.updated_at the time
+of a counter's last bump (Last-Modified). Existing items start at
+version 0; columns already created by Base.metadata.create_all are left
+alone, and cache_versions is created here when the database predates it.
+Every step checks first, so a run cut short can simply be repeated.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f4b6a1c37'
+down_revision: Union[str, Sequence[str], None] = '5c1e7f3a9d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def _has_column(table: str, column: str) -> bool:
+    columns = sa.inspect(op.get_bind()).get_columns(table)
+    return any(c["name"] == column for c in columns)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_column("items", "version"):
+        op.add_column(
+            "items",
+            sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+        )
+    op.create_index("ix_items_version", "items", ["version"], unique=False, if_not_exists=True)
+
+    if not _has_table("cache_versions"):
+        op.create_table(
+            "cache_versions",
+            sa.Column("name", sa.String(), nullable=False),
+            sa.Column("version", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("name"),
+        )
+    elif not _has_column("cache_versions", "updated_at"):
+        op.add_column("cache_versions", sa.Column("updated_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_items_version", table_name="items", if_exists=True)
+    with op.batch_alter_table("cache_versions") as batch_op:
+        batch_op.drop_column("updated_at")
+    with op.batch_alter_table("items") as batch_op:
+        batch_op.drop_column("version")
@@ -0,0 +1,61 @@
+"""add local day sales rollup
+
+Revision ID: a7d3e9b2c5f8
+Revises: f2a6c8d4b1e3
+Create Date: 2026-10-20 11:15:00.000000
+
+daily_sales_summary / daily_sales_customers again, now keyed by the
+shop-local day (SHOP_TIMEZONE) that /reports/sales and the dashboards
+bucket by. Tables already created by Base.metadata.create_all are left
+alone. They start empty; fill them after upgrading, and again after
+changing SHOP_TIMEZONE:
+
+    python manage.py backfill-daily-sales
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e9b2c5f8'
+down_revision: Union[str, Sequence[str], None] = 'f2a6c8d4b1e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_table("daily_sales_summary"):
+        op.create_table(
+            "daily_sales_summary",
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("bill_count", sa.Integer(), nullable=False),
+            sa.Column("gross_amount", sa.Float(), nullable=False),
+            sa.Column("discount_amount", sa.Float(), nullable=False),
+            sa.Column("net_amount", sa.Float(), nullable=False),
+            sa.Column("billed_amount", sa.Float(), nullable=False),
+            sa.Column("credit_issued", sa.Float(), nullable=False),
+            sa.Column("customers_count", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("day"),
+        )
+
+    if not _has_table("daily_sales_customers"):
+        op.create_table(
+            "daily_sales_customers",
+            sa.Column("day", sa.Date(), nullable=False),
+            sa.Column("customer_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["customer_id"], ["customers.id"]),
+            sa.PrimaryKeyConstraint("day", "customer_id"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("daily_sales_customers", if_exists=True)
+    op.drop_table("daily_sales_summary", if_exists=True)
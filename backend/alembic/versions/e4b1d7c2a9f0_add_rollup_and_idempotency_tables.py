@@ -0,0 +1,93 @@
+"""add rollup and idempotency tables
+
+Revision ID: e4b1d7c2a9f0
+Revises: 8d2f4b6a1c37
+Create Date: 2026-10-19 10:20:00.000000
+
+Tables the app so far only got from Base.metadata.create_all:
+customer_balances, customer_stats and idempotency_keys. Each is created
+only when missing. The retired daily_sales_summary / daily_sales_customers
+rollup is dropped if an earlier version of the app created it.
+
+The new rollups start empty on an existing database; fill them after
+upgrading:
+
+    python manage.py rebuild-balances
+    python manage.py backfill-customer-stats
+
+Upgrading a database created by the original app (no alembic_version
+table): `alembic stamp b0af5755db10`, then `alembic upgrade head`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4b1d7c2a9f0'
+down_revision: Union[str, Sequence[str], None] = '8d2f4b6a1c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_table("customer_balances"):
+        op.create_table(
+            "customer_balances",
+            sa.Column("customer_id", sa.Integer(), nullable=False),
+            sa.Column("balance", sa.Numeric(precision=10, scale=2), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["customer_id"], ["customers.id"]),
+            sa.PrimaryKeyConstraint("customer_id"),
+        )
+
+    if not _has_table("customer_stats"):
+        op.create_table(
+            "customer_stats",
+            sa.Column("customer_id", sa.Integer(), nullable=False),
+            sa.Column("bill_count", sa.Integer(), nullable=False),
+            sa.Column("total_purchase", sa.Float(), nullable=False),
+            sa.Column("total_paid", sa.Float(), nullable=False),
+            sa.Column("total_credit", sa.Float(), nullable=False),
+            sa.Column("credit_payments", sa.Float(), nullable=False),
+            sa.Column("last_purchase_date", sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(["customer_id"], ["customers.id"]),
+            sa.PrimaryKeyConstraint("customer_id"),
+        )
+    op.create_index(
+        "ix_customer_stats_last_purchase_date", "customer_stats", ["last_purchase_date"],
+        unique=False, if_not_exists=True,
+    )
+
+    if not _has_table("idempotency_keys"):
+        op.create_table(
+            "idempotency_keys",
+            sa.Column("scope", sa.String(), nullable=False),
+            sa.Column("key", sa.String(), nullable=False),
+            sa.Column("request_hash", sa.String(), nullable=False),
+            sa.Column("response", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("scope", "key"),
+        )
+    op.create_index(
+        "ix_idempotency_keys_created_at", "idempotency_keys", ["created_at"],
+        unique=False, if_not_exists=True,
+    )
+
+    op.drop_table("daily_sales_customers", if_exists=True)
+    op.drop_table("daily_sales_summary", if_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_idempotency_keys_created_at", table_name="idempotency_keys", if_exists=True)
+    op.drop_table("idempotency_keys", if_exists=True)
+    op.drop_index("ix_customer_stats_last_purchase_date", table_name="customer_stats", if_exists=True)
+    op.drop_table("customer_stats", if_exists=True)
+    op.drop_table("customer_balances", if_exists=True)
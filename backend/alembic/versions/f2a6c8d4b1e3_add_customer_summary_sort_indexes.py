@@ -0,0 +1,39 @@
+"""add customer summary sort indexes
+
+Revision ID: f2a6c8d4b1e3
+Revises: e4b1d7c2a9f0
+Create Date: 2026-10-20 09:40:00.000000
+
+One index per /customers/summary sort column, so a page in any order is
+read off an index instead of sorting every customer_stats row. Indexes
+already created by Base.metadata.create_all are left alone.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a6c8d4b1e3'
+down_revision: Union[str, Sequence[str], None] = 'e4b1d7c2a9f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+STATS_SORT_COLUMNS = ("bill_count", "total_purchase", "total_paid", "total_credit", "credit_payments")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for column in STATS_SORT_COLUMNS:
+        op.create_index(
+            f"ix_customer_stats_{column}", "customer_stats", [column],
+            unique=False, if_not_exists=True,
+        )
+    op.create_index("ix_customers_name", "customers", ["name"], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_customers_name", table_name="customers", if_exists=True)
+    for column in STATS_SORT_COLUMNS:
+        op.drop_index(f"ix_customer_stats_{column}", table_name="customer_stats", if_exists=True)
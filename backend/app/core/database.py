@@ -1,11 +1,109 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event # type: ignore
+from sqlalchemy.engine import make_url # type: ignore
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine # type: ignore
+from sqlalchemy.orm import sessionmaker, declarative_base # type: ignore
 
-DATABASE_URL = "sqlite:///./billing.db"
+from app.core.config import settings
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+DATABASE_URL = settings.DATABASE_URL
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+    )
+
+
+def _apply_sqlite_pragmas(engine, pragmas: dict):
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _sqlite_pragmas(pragma_overrides: dict) -> dict:
+    pragmas = {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        # negative cache_size = size in KiB instead of pages
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KB,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "foreign_keys": settings.SQLITE_FOREIGN_KEYS,
+    }
+    pragmas.update(pragma_overrides)
+    return pragmas
+
+
+def _pool_options(url: str) -> dict:
+    if _is_memory_sqlite(url):
+        return {}
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    }
+    if not url.startswith("sqlite"):
+        options["pool_recycle"] = settings.DB_POOL_RECYCLE
+        options["pool_pre_ping"] = True
+    return options
+
+
+def create_db_engine(url: str = None, **pragma_overrides):
+    """
+    Build an engine from settings.
+
+    SQLite connections get WAL journaling, synchronous=NORMAL, a busy
+    timeout, a bigger page cache, mmap I/O and foreign keys switched on.
+    `pragma_overrides` (e.g. journal_mode="DELETE") replace single pragmas,
+    which the benchmarks use to compare configurations.
+    """
+    url = url or settings.DATABASE_URL
+
+    if not url.startswith("sqlite"):
+        return create_engine(url, **_pool_options(url))
+
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        **_pool_options(url),
+    )
+    _apply_sqlite_pragmas(engine, _sqlite_pragmas(pragma_overrides))
+
+    return engine
+
+
+def async_database_url(url: str = None) -> str:
+    """Map a sync DATABASE_URL onto its async driver (aiosqlite / asyncpg)."""
+    if settings.ASYNC_DATABASE_URL and url is None:
+        return settings.ASYNC_DATABASE_URL
+
+    url = make_url(url or settings.DATABASE_URL)
+    backend = url.get_backend_name()
+
+    if backend == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    elif backend == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+
+    return url.render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str = None, **pragma_overrides):
+    """Async twin of create_db_engine(), with the same pool and pragmas."""
+    url = async_database_url(url)
+    engine = create_async_engine(url, **_pool_options(url))
+
+    if url.startswith("sqlite"):
+        _apply_sqlite_pragmas(engine.sync_engine, _sqlite_pragmas(pragma_overrides))
+
+    return engine
+
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -13,4 +111,25 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+async_engine = create_async_db_engine()
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,215 @@
+"""
+Request / SQL instrumentation, exposed in Prometheus text format.
+
+No client library: a handful of counters and histograms kept in process
+memory. With several worker processes each one reports its own numbers
+(scrape every worker, or sum them in the dashboard).
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event # type: ignore
+
+# Seconds; tuned for a LAN billing app (sub-ms reads up to slow exports)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Labelled counters, gauges and histograms; one lock, no I/O under it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._types = {}
+        self._values = {}       # name -> {labels: float}
+        self._histograms = {}   # name -> {labels: _Histogram}
+        self._buckets = {}
+
+    def _declare(self, name, kind, help_text, buckets=None):
+        self._types[name] = kind
+        self._help[name] = help_text
+        if kind == "histogram":
+            self._histograms[name] = {}
+            self._buckets[name] = buckets
+        else:
+            self._values[name] = {}
+
+    def counter(self, name, help_text):
+        self._declare(name, "counter", help_text)
+
+    def gauge(self, name, help_text):
+        self._declare(name, "gauge", help_text)
+
+    def histogram(self, name, help_text, buckets):
+        self._declare(name, "histogram", help_text, buckets)
+
+    def inc(self, name, labels=(), amount=1):
+        with self._lock:
+            series = self._values[name]
+            series[labels] = series.get(labels, 0) + amount
+
+    def observe(self, name, labels, value):
+        with self._lock:
+            series = self._histograms[name]
+            histogram = series.get(labels)
+            if histogram is None:
+                histogram = series[labels] = _Histogram(self._buckets[name])
+            histogram.observe(value)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, kind in self._types.items():
+                lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+                if kind != "histogram":
+                    for labels, value in self._values[name].items():
+                        lines.append(f"{name}{_labels(labels)} {value:g}")
+                    continue
+
+                for labels, histogram in self._histograms[name].items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        le = _labels(labels + (("le", f"{bound:g}"),))
+                        lines.append(f"{name}_bucket{le} {cumulative}")
+                    le = _labels(labels + (("le", "+Inf"),))
+                    lines.append(f"{name}_bucket{le} {histogram.count}")
+                    lines.append(f"{name}_sum{_labels(labels)} {histogram.sum:g}")
+                    lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+registry = Registry()
+registry.counter("http_requests_total", "Finished requests by route and status.")
+registry.gauge("http_requests_in_flight", "Requests being handled right now.")
+registry.inc("http_requests_in_flight", (), 0)
+registry.histogram(
+    "http_request_duration_seconds", "Request latency by route.", LATENCY_BUCKETS
+)
+registry.histogram(
+    "http_request_db_statements", "SQL statements per request by route.", STATEMENT_BUCKETS
+)
+registry.counter("http_request_db_seconds_total", "Time spent in SQL by route.")
+registry.counter("db_statements_total", "SQL statements run, in and out of requests.")
+
+
+class RequestStats:
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+# Set per request by the middleware. Thread-pool routes and
+# AsyncSession.run_sync greenlets see a copy of the context pointing at
+# the same RequestStats, so their statements are counted too.
+current_request: ContextVar = ContextVar("current_request", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # A connection runs one statement at a time
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"]
+    registry.inc("db_statements_total")
+
+    stats = current_request.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+
+def instrument_engine(engine):
+    """Count statements and DB time on `engine` (a sync Engine)."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_label(scope) -> str:
+    # The route template ("/sales/{sale_id}"), never the raw path, so ids
+    # don't turn into one time series each
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Latency, status and SQL usage per route, as plain ASGI middleware
+    (BaseHTTPMiddleware costs ~1 ms a request). Adds X-DB-Statements and
+    X-DB-Time-Ms headers; a streamed body's own queries run after the
+    headers are sent and only show up in db_statements_total.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        registry.inc("http_requests_in_flight", (), 1)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-db-statements", str(stats.statements).encode()),
+                    (b"x-db-time-ms", f"{stats.db_seconds * 1000:.2f}".encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request.reset(token)
+            registry.inc("http_requests_in_flight", (), -1)
+
+            route = (("method", scope["method"]), ("route", _route_label(scope)))
+            registry.inc("http_requests_total", route + (("status", str(status)),))
+            registry.observe("http_request_duration_seconds", route, elapsed)
+            registry.observe("http_request_db_statements", route, stats.statements)
+            registry.inc("http_request_db_seconds_total", route, stats.db_seconds)
@@ -0,0 +1,123 @@
+"""
+Development aids for SQL regressions: an N+1 detector and query budgets.
+
+    QUERY_DEBUG=1 uvicorn app.main:app --reload
+
+logs every request that ran the same statement shape
+QUERY_DEBUG_REPEAT_THRESHOLD times or more (an ORM lazy-load in a loop).
+
+    with query_budget(3):
+        client.get("/purchases/")
+
+raises QueryBudgetExceeded when more than 3 statements run inside the
+block, listing the repeated shapes first.
+"""
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event # type: ignore
+
+from app.core.database import async_engine, engine
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)\s*,)+\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)\s*\)")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement shape: literals and IN-list lengths don't matter."""
+    shape = _IN_LIST.sub("(?)", statement)
+    shape = _NUMBER.sub("?", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+# Statement shapes seen by the current request (QUERY_DEBUG middleware)
+_request_shapes: ContextVar = ContextVar("request_shapes", default=None)
+
+# Open query_budget blocks: (engines, statements run on them)
+_budgets = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    shapes = _request_shapes.get()
+    if shapes is not None:
+        shapes[fingerprint(statement)] += 1
+    for engines, statements in _budgets:
+        if conn.engine in engines:
+            statements.append(statement)
+
+
+def instrument_engine(engine):
+    """Feed `engine`'s statements to the detector and to query budgets."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+def repeated_shapes(statements, threshold: int) -> list:
+    """(count, shape) for shapes seen at least `threshold` times, most first."""
+    counts = Counter(fingerprint(s) for s in statements)
+    return [(n, shape) for shape, n in counts.most_common() if n >= threshold]
+
+
+@contextmanager
+def query_budget(limit: int, repeat_threshold: int = 2, engines=None):
+    """
+    Fail when the block runs more than `limit` statements on `engines`
+    (default: the app's sync and async engines). Yields the list of
+    statements run so far.
+    """
+    engines = list(engines or (engine, async_engine.sync_engine))
+    for e in engines:
+        instrument_engine(e)
+
+    budget = (engines, [])
+    _budgets.append(budget)
+    try:
+        yield budget[1]
+    finally:
+        _budgets.remove(budget)
+
+    statements = budget[1]
+
+    if len(statements) > limit:
+        lines = [f"{len(statements)} statements, budget {limit}"]
+        for n, shape in repeated_shapes(statements, repeat_threshold):
+            lines.append(f"  {n}x {shape[:200]}")
+        raise QueryBudgetExceeded("\n".join(lines))
+
+
+class NPlusOneMiddleware:
+    """Logs requests that repeat one statement shape `threshold`+ times."""
+
+    def __init__(self, app, threshold: int = 5):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        shapes = Counter()
+        token = _request_shapes.set(shapes)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_shapes.reset(token)
+
+            for shape, n in shapes.most_common():
+                if n < self.threshold:
+                    break
+                logger.warning(
+                    "N+1 suspect: %s %s ran %dx %s",
+                    scope["method"], scope["path"], n, shape[:300],
+                )
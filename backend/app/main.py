@@ -1,16 +1,22 @@
 
 from fastapi import FastAPI # type: ignore
 from fastapi.middleware.cors import CORSMiddleware # type: ignore
-from app.core.database import Base, engine
+from app.core.config import settings
+from app.core.database import Base, async_engine, engine
+from app.core import metrics, query_debug
 from app.routes import items, purchases, sales, reports,credits
 from fastapi.staticfiles import StaticFiles # type: ignore
-from fastapi.responses import FileResponse # type: ignore
+from fastapi.responses import FileResponse, PlainTextResponse # type: ignore
 import os
 from app.routes import suppliers
 from app.routes import customers
+from app.routes import admin
+from app.services.item_search import ensure_item_search_index
+from app.services.report_cache import watch_sessions
 
 
 Base.metadata.create_all(bind=engine)
+ensure_item_search_index(engine)
 
 app = FastAPI(title="Bibek & Nabin Traders Billing System")
 
@@ -24,8 +30,28 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "X-Total-Credit", "X-Credit-Customers", "X-DB-Statements", "X-DB-Time-Ms", "ETag", "X-Catalogue-Version"],
 )
 
+# 📈 Per-route latency / status / SQL usage, scraped at GET /metrics
+if settings.METRICS_ENABLED:
+    metrics.instrument_engine(engine)
+    metrics.instrument_engine(async_engine.sync_engine)
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# 🐢 Dev only: warn about lazy loads in loops (same SQL shape N times)
+if settings.QUERY_DEBUG:
+    query_debug.instrument_engine(engine)
+    query_debug.instrument_engine(async_engine.sync_engine)
+    app.add_middleware(
+        query_debug.NPlusOneMiddleware,
+        threshold=settings.QUERY_DEBUG_REPEAT_THRESHOLD,
+    )
+
+# 🧾 Drop cached reports when a sale, payment or purchase commits
+if settings.REPORT_CACHE_ENABLED:
+    watch_sessions()
+
 # Static files
 app.mount("/assets", StaticFiles(directory="static/assets"), name="assets")
 
@@ -37,6 +63,7 @@ app.include_router(reports.router)
 app.include_router(credits.router)
 app.include_router(customers.router)
 app.include_router(suppliers.router)
+app.include_router(admin.router)
 
 
 
@@ -45,6 +72,13 @@ app.include_router(suppliers.router)
 def serve_frontend():
     return FileResponse("static/index.html")
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(
+        metrics.registry.render(),
+        media_type="text/plain; version=0.0.4",
+    )
+
 @app.get("/health")
 def root():
     return {"status": "Backend is running"}
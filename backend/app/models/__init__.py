@@ -2,3 +2,8 @@ from .sale import Sale
 from .customer import Customer
 from .supplier import Supplier
 from .credit_ledger import CreditLedger
+from .customer_balance import CustomerBalance
+from .daily_sales_summary import DailySalesSummary, DailySalesCustomer
+from .cache_version import CacheVersion
+from .customer_stats import CustomerStats
+from .idempotency_key import IdempotencyKey
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, Integer, String # type: ignore
+
+from app.core.database import Base
+
+
+class CacheVersion(Base):
+    """
+    Change counters shared by all worker processes. A writer bumps the
+    counter in its own transaction; each process compares it with the
+    version its in-memory cache was built from.
+    """
+
+    __tablename__ = "cache_versions"
+
+    name = Column(String, primary_key=True)  # e.g. "items"
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)  # UTC, last bump
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric # type: ignore
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Index # type: ignore
 from sqlalchemy.orm import relationship # type: ignore
 from datetime import datetime
 
@@ -25,3 +25,8 @@ class CreditLedger(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     customer = relationship("Customer", backref="ledger_entries")
+
+    __table_args__ = (
+        # A customer's entries in order: last balance, rebuild_balances
+        Index("ix_credit_ledger_customer_id_id", "customer_id", "id"),
+    )
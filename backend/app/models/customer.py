@@ -8,7 +8,7 @@ class Customer(Base):
     __tablename__ = "customers"
 
     id = Column(Integer, primary_key=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     phone = Column(String, unique=True, index=True, nullable=False)
     address = Column(String, nullable=True)
     sales = relationship("Sale", back_populates="customer")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Numeric # type: ignore
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class CustomerBalance(Base):
+    """Current credit balance per customer, kept in step with credit_ledger."""
+
+    __tablename__ = "customer_balances"
+
+    customer_id = Column(Integer, ForeignKey("customers.id"), primary_key=True)
+
+    balance = Column(Numeric(10, 2), nullable=False, default=0)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey # type: ignore
+
+from app.core.database import Base
+
+
+class CustomerStats(Base):
+    """Lifetime totals per customer, updated in the same transaction as each sale / payment."""
+
+    __tablename__ = "customer_stats"
+
+    customer_id = Column(Integer, ForeignKey("customers.id"), primary_key=True)
+
+    # Indexed: /customers/summary pages through them in any sort order
+    bill_count = Column(Integer, nullable=False, default=0, index=True)
+    total_purchase = Column(Float, nullable=False, default=0, index=True)     # sum(rounded_final_amount)
+    total_paid = Column(Float, nullable=False, default=0, index=True)         # sum(amount_paid) at the counter
+    total_credit = Column(Float, nullable=False, default=0, index=True)       # sum(due_amount)
+    credit_payments = Column(Float, nullable=False, default=0, index=True)    # sum of /credit/pay payments
+    last_purchase_date = Column(DateTime, nullable=True, index=True)
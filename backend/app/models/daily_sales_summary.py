@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey # type: ignore
+
+from app.core.database import Base
+
+
+class DailySalesSummary(Base):
+    """Per-day sales totals, updated in the same transaction as each sale."""
+
+    __tablename__ = "daily_sales_summary"
+
+    # Shop-local date (SHOP_TIMEZONE) of the bills, as /reports/sales buckets them
+    day = Column(Date, primary_key=True)
+
+    bill_count = Column(Integer, nullable=False, default=0)
+    gross_amount = Column(Float, nullable=False, default=0)       # sum(total_amount)
+    discount_amount = Column(Float, nullable=False, default=0)    # sum(total_discount)
+    net_amount = Column(Float, nullable=False, default=0)         # sum(final_amount)
+    billed_amount = Column(Float, nullable=False, default=0)      # sum(rounded_final_amount)
+    credit_issued = Column(Float, nullable=False, default=0)      # sum(due_amount > 0)
+    customers_count = Column(Integer, nullable=False, default=0)  # distinct customers
+
+
+class DailySalesCustomer(Base):
+    """(day, customer) pairs already counted in customers_count."""
+
+    __tablename__ = "daily_sales_customers"
+
+    day = Column(Date, primary_key=True)
+    customer_id = Column(Integer, ForeignKey("customers.id"), primary_key=True)
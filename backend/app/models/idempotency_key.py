@@ -0,0 +1,21 @@
+from sqlalchemy import Column, DateTime, String, Text # type: ignore
+from datetime import datetime
+
+from app.core.database import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Response of a POST that carried an Idempotency-Key header, stored in
+    the same transaction as the sale / purchase it created.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String, primary_key=True)   # "sales" | "purchases"
+    key = Column(String, primary_key=True)
+
+    request_hash = Column(String, nullable=False)  # sha256 of the request body
+    response = Column(Text, nullable=False)        # JSON
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
@@ -6,7 +6,7 @@ class Item(Base):
     __tablename__ = "items"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     category = Column(String, nullable=True)
     dealer_name = Column(String, nullable=True)
 
@@ -17,3 +17,7 @@ class Item(Base):
     quantity = Column(Integer, nullable=False)
 
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Value of the "item_rows" counter when the row last changed
+    # (GET /items/?since_version=)
+    version = Column(Integer, nullable=False, default=0, server_default="0", index=True)
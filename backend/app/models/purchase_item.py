@@ -9,7 +9,7 @@ class PurchaseItem(Base):
 
     id = Column(Integer, primary_key=True)
 
-    purchase_id = Column(Integer, ForeignKey("purchases.id"))
+    purchase_id = Column(Integer, ForeignKey("purchases.id"), index=True)
     item_id = Column(Integer, ForeignKey("items.id"))
 
     quantity = Column(Integer)
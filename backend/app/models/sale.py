@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, String, ForeignKey # type: ignore
+from sqlalchemy import Column, Integer, Float, DateTime, String, ForeignKey, Index, text # type: ignore
 from datetime import datetime
 from app.core.database import Base
 from sqlalchemy.orm import relationship # type: ignore
@@ -30,3 +30,18 @@ class Sale(Base):
 
     manual_date = Column(DateTime, nullable=True)
 
+    __table_args__ = (
+        # Keyset pagination of /sales/history: ORDER BY created_at, id
+        Index("ix_sales_created_at_id", "created_at", "id"),
+        # /sales/random-history: sale_type = 'random' ORDER BY created_at, id
+        Index("ix_sales_type_created_at_id", "sale_type", "created_at", "id"),
+        # A customer's sales, newest first (/customers/{id}/details)
+        Index("ix_sales_customer_created_at_id", "customer_id", "created_at", "id"),
+        # /credit/: bills with money still due, a small slice of all sales
+        Index(
+            "ix_sales_open_credit",
+            "customer_id",
+            sqlite_where=text("due_amount > 0"),
+            postgresql_where=text("due_amount > 0"),
+        ),
+    )
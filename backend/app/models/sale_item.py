@@ -8,7 +8,7 @@ class SaleItem(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
-    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
+    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False, index=True)
     item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
 
     quantity = Column(Integer, nullable=False)
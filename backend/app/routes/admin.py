@@ -0,0 +1,21 @@
+from fastapi import APIRouter # type: ignore
+
+from app.services import backup
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+
+# ---------- Backups ----------
+@router.post("/backups")
+def create_backup():
+    # Sync on purpose: runs in the threadpool, the event loop stays free
+    return backup.run_backup()
+
+
+@router.get("/backups")
+def list_backups():
+    return {
+        "last_backup": backup.last_backup,
+        "backups": backup.list_backups(),
+    }
@@ -1,41 +1,34 @@
 from fastapi import APIRouter, Depends,HTTPException # type: ignore
+from sqlalchemy import select # type: ignore
 from sqlalchemy.orm import Session # type: ignore
-from app.core.database import SessionLocal
+from app.core.database import get_db
 from app.models.sale import Sale
 from app.models.customer import Customer
 from app.services.credit_ledger import add_debit_entry
+from app.services.customer_stats import record_customer_payment
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/credit", tags=["Credit"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/")
 def credit_list(db: Session = Depends(get_db)):
-    sales = (
-        db.query(Sale, Customer)
+    rows = db.execute(
+        select(
+            Sale.id.label("sale_id"),
+            Customer.name.label("customer_name"),
+            Customer.phone.label("customer_phone"),
+            Sale.rounded_final_amount.label("total"),
+            Sale.amount_paid.label("paid"),
+            Sale.due_amount.label("due"),
+            Sale.created_at.label("date"),
+        )
         .join(Customer, Sale.customer_id == Customer.id)
-        .filter(Sale.due_amount > 0)
-        .all()
+        .where(Sale.due_amount > 0)
     )
 
-    return [
-        {
-            "sale_id": s.id,
-            "customer_name": c.name,
-            "customer_phone": c.phone,
-            "total": s.rounded_final_amount,
-            "paid": s.amount_paid,
-            "due": s.due_amount,
-            "date": s.created_at,
-        }
-        for s, c in sales
-    ]
+    return FastJSONResponse([dict(row._mapping) for row in rows])
     
+
 @router.post("/pay/{customer_id}")
 def pay_credit(customer_id: int, amount: float, db: Session = Depends(get_db)):
     customer = db.query(Customer).filter(Customer.id == customer_id).first()
@@ -46,5 +39,7 @@ def pay_credit(customer_id: int, amount: float, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Invalid amount")
 
     add_debit_entry(db, customer_id, amount)
+    record_customer_payment(db, customer_id, amount)
+    db.commit()
 
     return {"message": "Payment recorded"}
@@ -1,38 +1,36 @@
 from fastapi import HTTPException # type: ignore
-from fastapi import APIRouter, Depends  # type: ignore
+from fastapi import APIRouter, Depends, Query, Response  # type: ignore
+from sqlalchemy import func, select  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
-from sqlalchemy import func  # type: ignore
+from typing import Literal, Optional
 
-from app.core.database import SessionLocal
+from app.core.database import get_db
 from app.models.customer import Customer
+from app.models.customer_stats import CustomerStats
 from app.models.sale import Sale
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/customers", tags=["Customers"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 
 @router.get("/search")
 def search_customer(q: str, db: Session = Depends(get_db)):
-    return (
-        db.query(Customer)
-        .filter(Customer.phone.ilike(f"%{q}%"))
+    rows = db.execute(
+        select(*Customer.__table__.columns)
+        .where(Customer.phone.ilike(f"%{q}%"))
         .limit(10)
-        .all()
     )
+    return FastJSONResponse([dict(row._mapping) for row in rows])
 
 
 @router.get("/{customer_id}/sales")
 def customer_sales(customer_id: int, db: Session = Depends(get_db)):
-    return db.query(Sale).filter(
-        Sale.customer_id == customer_id
-    ).all()
+    # Every sales column, as the Sale objects used to be serialized
+    rows = db.execute(
+        select(*Sale.__table__.columns).where(Sale.customer_id == customer_id)
+    )
+    return FastJSONResponse([dict(row._mapping) for row in rows])
 
 
 @router.get("/by-phone")
@@ -40,58 +38,130 @@ def get_customer_by_phone(phone: str, db: Session = Depends(get_db)):
     return db.query(Customer).filter(Customer.phone == phone).first()
 
 
+SUMMARY_SORT_COLUMNS = {
+    "last_purchase_date": CustomerStats.last_purchase_date,
+    "name": Customer.name,
+    "bill_count": CustomerStats.bill_count,
+    "total_purchase": CustomerStats.total_purchase,
+    "total_paid": CustomerStats.total_paid,
+    "total_credit": CustomerStats.total_credit,
+    "credit_payments": CustomerStats.credit_payments,
+}
+
+
 # ✅ MAIN PART: Customer Summary API
+# Reads the customer_stats rollup (kept by checkout / credit payments),
+# no GROUP BY over sales. Without `limit` every customer is returned.
+# Headers carry totals over every match, not just the page:
+# X-Total-Count, X-Total-Credit (sum of positive credit) and
+# X-Credit-Customers (customers with credit left).
 @router.get("/summary")
-def customer_summary(db: Session = Depends(get_db)):
-    results = (
+def customer_summary(
+    sort: Literal[tuple(SUMMARY_SORT_COLUMNS)] = "last_purchase_date",
+    order: Literal["asc", "desc"] = "desc",
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    q: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    # Plain columns, not entities: thousands of rows without ORM identity work
+    query = (
         db.query(
             Customer.id.label("customer_id"),
             Customer.name,
             Customer.phone,
             Customer.address,
-
-            func.max(Sale.created_at).label("last_purchase_date"),
-            func.coalesce(func.sum(Sale.rounded_final_amount), 0).label("total_purchase"),
-            func.coalesce(func.sum(Sale.amount_paid), 0).label("total_paid"),
-            func.coalesce(func.sum(Sale.due_amount), 0).label("total_credit"),
+            CustomerStats.last_purchase_date,
+            CustomerStats.bill_count,
+            CustomerStats.total_purchase,
+            CustomerStats.total_paid,
+            CustomerStats.total_credit,
+            CustomerStats.credit_payments,
         )
-        .join(Sale, Sale.customer_id == Customer.id)
-        .group_by(Customer.id)
-        .order_by(func.max(Sale.created_at).desc())
-        .all()
+        .join(Customer, Customer.id == CustomerStats.customer_id)
+        # "+ 0": matches nearly every row, so keep the planner from
+        # reading ix_customer_stats_bill_count for it instead of the
+        # sort column's index
+        .filter(CustomerStats.bill_count + 0 > 0)
     )
 
-    return [
+    if q:
+        query = query.filter(
+            Customer.name.ilike(f"%{q}%") | Customer.phone.ilike(f"%{q}%")
+        )
+
+    has_credit = CustomerStats.total_credit > 0
+    total_count, total_credit, credit_customers = query.with_entities(
+        func.count(),
+        func.coalesce(func.sum(CustomerStats.total_credit).filter(has_credit), 0),
+        func.count().filter(has_credit),
+    ).one()
+
+    column = SUMMARY_SORT_COLUMNS[sort]
+    # Ties by the sorted table's id: every index ends with it, so a page
+    # is read in index order without sorting
+    tie_break = Customer.id if sort == "name" else CustomerStats.customer_id
+    if order == "desc":
+        column, tie_break = column.desc(), tie_break.desc()
+
+    query = query.order_by(column, tie_break).offset(offset)
+    if limit:
+        query = query.limit(limit)
+
+    return FastJSONResponse([
         {
-            "customer_id": r.customer_id,
-            "name": r.name,
-            "phone": r.phone,
-            "address": r.address,
-            "last_purchase_date": r.last_purchase_date,
-            "total_purchase": float(r.total_purchase),
-            "total_paid": float(r.total_paid),
-            "total_credit": float(r.total_credit),
+            "customer_id": customer_id,
+            "name": name,
+            "phone": phone,
+            "address": address,
+            "last_purchase_date": last_purchase_date,
+            "bill_count": bill_count,
+            "total_purchase": float(total_purchase),
+            "total_paid": float(total_paid),
+            "total_credit": float(total_credit),
+            "credit_payments": float(credit_payments),
         }
-        for r in results
-    ]
+        for (
+            customer_id, name, phone, address, last_purchase_date, bill_count,
+            total_purchase, total_paid, total_credit, credit_payments,
+        ) in db.execute(query.statement)
+    ], headers={
+        "X-Total-Count": str(total_count),
+        "X-Total-Credit": str(round(float(total_credit), 2)),
+        "X-Credit-Customers": str(credit_customers),
+    })
     
     
 @router.get("/{customer_id}/details")
-def get_customer_details(customer_id: int, db: Session = Depends(get_db)):
+def get_customer_details(
+    customer_id: int,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+):
     customer = db.query(Customer).filter(Customer.id == customer_id).first()
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
 
-    sales = (
+    stats = db.get(CustomerStats, customer_id)
+
+    total_purchase = stats.total_purchase if stats else 0
+    total_paid = stats.total_paid if stats else 0
+    total_credit = total_purchase - total_paid
+
+    response.headers["X-Total-Count"] = str(stats.bill_count if stats else 0)
+
+    # Newest first, a page at a time (all sales without `limit`)
+    query = (
         db.query(Sale)
         .filter(Sale.customer_id == customer_id)
-        .order_by(Sale.created_at.desc())
-        .all()
+        .order_by(Sale.created_at.desc(), Sale.id.desc())
+        .offset(offset)
     )
-
-    total_purchase = sum(s.rounded_final_amount for s in sales)
-    total_paid = sum(s.amount_paid for s in sales)
-    total_credit = total_purchase - total_paid
+    if limit:
+        query = query.limit(limit)
+    sales = query.all()
 
     return {
         "customer": {
@@ -101,9 +171,12 @@ def get_customer_details(customer_id: int, db: Session = Depends(get_db)):
             "address": customer.address
         },
         "summary": {
+            "bill_count": stats.bill_count if stats else 0,
             "total_purchase": total_purchase,
             "total_paid": total_paid,
-            "total_credit": total_credit
+            "total_credit": total_credit,
+            "credit_payments": stats.credit_payments if stats else 0,
+            "last_purchase_date": stats.last_purchase_date if stats else None
         },
         "sales": [
             {
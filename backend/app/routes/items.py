@@ -1,22 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException # type: ignore
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request # type: ignore
+from fastapi.responses import Response # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 
-from app.core.database import SessionLocal
+from app.core.database import get_async_db, get_db
 from app.models.item import Item
-from app.schemas.item import ItemCreate, ItemResponse, ItemUpdate
-from app.services.pricing import calculate_selling_price
+from app.schemas.item import ItemCreate, ItemReprice, ItemResponse, ItemUpdate
+from app.services.pricing import calculate_selling_price, reprice_items
+from app.services.item_search import search
+from app.services.catalogue import accepted_encoding, encode, item_rows, rendered_catalogue
+from app.services.item_cache import (
+    bump_catalogue_version,
+    item_cache,
+    item_rows_version,
+    next_item_version,
+    stamp_item_versions,
+)
+from app.utils.responses import etag_matches, http_date, modified_since, render_json
 
 
 router = APIRouter(prefix="/items", tags=["Items"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 
 @router.post("/", response_model=ItemResponse)
 def create_item(item: ItemCreate, db: Session = Depends(get_db)):
@@ -32,51 +39,80 @@ def create_item(item: ItemCreate, db: Session = Depends(get_db)):
         margin_percent=item.margin_percent,
         selling_price=selling_price,
         quantity=item.quantity,
+        version=next_item_version(db),
     )
 
     db.add(db_item)
+    bump_catalogue_version(db)
     db.commit()
     db.refresh(db_item)
+    item_cache.invalidate()
 
     return db_item
 
 
 @router.get("/")
-def list_items(db: Session = Depends(get_db)):
-    items = (
-        db.query(Item)
-        .order_by(Item.name.asc())
-        .all()
-    )
-
-    return [
-        {
-            "id": i.id,
-            "name": i.name,
-            "quantity": i.quantity,
-            "cost_price": i.cost_price,
-            "margin_percent": i.margin_percent,
-            "selling_price": i.selling_price,
-        }
-        for i in items
-    ]
+def list_items(
+    request: Request,
+    since_version: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    The catalogue by name. ETag / Last-Modified follow the item row
+    version (also sent as X-Catalogue-Version); with `since_version`
+    only the items changed after that version are returned, for
+    terminals keeping a local copy in sync. Items are never deleted, so
+    a delta has no removals.
+    """
+    version, modified_at = item_rows_version(db)
+
+    if since_version is not None and since_version > version:
+        raise HTTPException(
+            status_code=409,
+            detail="since_version is ahead of the catalogue, reload the full list"
+        )
+
+    tag = f"items-{version}" if since_version is None else f"items-{since_version}-{version}"
+    encoding = accepted_encoding(request.headers.get("accept-encoding", ""))
+    headers = {
+        "X-Catalogue-Version": str(version),
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if modified_at is not None:
+        headers["Last-Modified"] = http_date(modified_at)
+
+    # Any encoding of this version counts as a match
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = etag_matches(if_none_match, f'"{tag}"', f'"{tag}-gzip"', f'"{tag}-br"')
+    else:
+        fresh = "if-modified-since" in request.headers and not modified_since(
+            request.headers["if-modified-since"], modified_at
+        )
+    if fresh:
+        headers["ETag"] = f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+        return Response(status_code=304, headers=headers)
+
+    if since_version is None:
+        body, encoding = rendered_catalogue.body(db, version, encoding)
+    else:
+        body, encoding = encode(render_json(item_rows(db, since_version)), encoding)
+
+    headers["ETag"] = f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@router.get("/cache/stats")
+def item_cache_stats():
+    return item_cache.stats()
 
 
 @router.get("/search")
-def search_items(q: str, db: Session = Depends(get_db)):
-    keywords = q.strip().split()
-
-    query = db.query(Item).filter(Item.quantity > 0)
-
-    for word in keywords:
-        query = query.filter(Item.name.ilike(f"%{word}%"))
-
-    return (
-        query
-        .order_by(Item.name.asc())
-        .limit(20)
-        .all()
-    )
+async def search_items(q: str, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(search, q)
 
     
 @router.get("/low-stock")
@@ -97,6 +133,21 @@ def low_stock_items(threshold: int = 5, db: Session = Depends(get_db)):
         for i in items
     ]
 
+@router.post("/reprice")
+def reprice(data: ItemReprice, db: Session = Depends(get_db)):
+    """Bulk margin / cost change in one UPDATE; `dry_run` shows the diff."""
+    result = reprice_items(db, data)
+
+    if data.dry_run:
+        return result
+
+    bump_catalogue_version(db)
+    db.commit()
+    item_cache.invalidate()
+
+    return result
+
+
 @router.put("/{item_id}")
 def update_item(item_id: int, data: ItemUpdate, db: Session = Depends(get_db)):
     item = db.query(Item).filter(Item.id == item_id).first()
@@ -113,8 +164,12 @@ def update_item(item_id: int, data: ItemUpdate, db: Session = Depends(get_db)):
     item.selling_price = calculate_selling_price(
         data.cost_price, data.margin_percent
     )
+    db.flush()
+    stamp_item_versions(db, [item.id])
 
+    bump_catalogue_version(db)
     db.commit()
+    item_cache.invalidate()
 
     return {"message": "Item updated successfully"}
 
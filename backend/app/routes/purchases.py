@@ -1,138 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException  # type: ignore
+from fastapi import APIRouter, Depends, Header, HTTPException, Request  # type: ignore
+from sqlalchemy import select  # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
+from starlette.concurrency import run_in_threadpool  # type: ignore
+from typing import Optional
+import csv
+import io
+import tempfile
 
-from app.core.database import SessionLocal
+from app.core.database import get_async_db, get_db
 from app.models.purchase import Purchase
 from app.models.purchase_item import PurchaseItem
 from app.models.item import Item
 from app.models.supplier import Supplier
 from app.schemas.purchase import PurchaseCreate
+from app.services.idempotency import idempotency, request_hash
+from app.services.item_cache import item_cache
+from app.services.purchase_import import import_lines, import_purchase, parse_csv
+from app.utils.responses import FastJSONResponse
 
 router = APIRouter(prefix="/purchases", tags=["Purchases"])
 
+# CSV uploads larger than this are spooled to a temp file while received
+CSV_SPOOL_BYTES = 4 * 1024 * 1024
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 
 @router.post("/")
-def create_purchase(data: PurchaseCreate, db: Session = Depends(get_db)):
-
-    # ---------- Supplier handling ----------
-    supplier = None
-    if data.supplier_phone:
-        supplier = db.query(Supplier).filter(
-            Supplier.phone == data.supplier_phone
-        ).first()
-
-        if not supplier:
-            supplier = Supplier(
-                name=data.supplier_name or "Unknown",
-                phone=data.supplier_phone,
-                address=data.supplier_address
-            )
-            db.add(supplier)
-            db.commit()
-            db.refresh(supplier)
-
-    # ---------- Create Purchase ----------
-    purchase = Purchase(
-        supplier_id=supplier.id if supplier else None,
-        total_amount=0
+def create_purchase(
+    data: PurchaseCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db: Session = Depends(get_db),
+):
+    # A retried request gets the original purchase back, stock moves once
+    if idempotency_key:
+        replay = idempotency.lookup(db, "purchases", idempotency_key, request_hash(data))
+        if replay is not None:
+            return replay
+
+    # Set-based: one name lookup / INSERT / UPDATE per 1000 lines, one commit
+    result = import_purchase(db, data, idempotency_key)
+    item_cache.invalidate()
+    return result
+
+
+async def _spool_body(request: Request):
+    """
+    The request body in a temp file (in memory up to CSV_SPOOL_BYTES),
+    so nothing touches the database while the client is still sending.
+    """
+    body = tempfile.SpooledTemporaryFile(max_size=CSV_SPOOL_BYTES)
+    async for chunk in request.stream():
+        body.write(chunk)
+    body.seek(0)
+    return body
+
+
+def _parse_csv_body(body) -> list:
+    """Decode (UTF-8, BOM ok) and validate the spooled CSV."""
+    text = io.TextIOWrapper(body, encoding="utf-8-sig", newline="")
+    try:
+        return parse_csv(text)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8")
+    except csv.Error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+    finally:
+        text.close()
+
+
+@router.post("/import/csv")
+async def import_purchase_csv(
+    request: Request,
+    supplier_phone: Optional[str] = None,
+    supplier_name: Optional[str] = None,
+    supplier_address: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Supplier invoice as a raw CSV body (Content-Type: text/csv) with an
+    item_name,quantity,cost_price,margin_percent header. The whole body
+    is received and validated first; only then is the invoice written,
+    in batches, in one short transaction.
+    """
+    body = await _spool_body(request)
+    # Parsing is CPU work: keep it off the event loop
+    lines = await run_in_threadpool(_parse_csv_body, body)
+
+    if not lines:
+        raise HTTPException(status_code=400, detail="CSV has no item lines")
+
+    result = await db.run_sync(
+        import_lines, lines, supplier_phone, supplier_name, supplier_address
     )
-
-    db.add(purchase)
-    db.commit()
-    db.refresh(purchase)
-
-    total_amount = 0
-
-    # ---------- Process each item ----------
-    for p_item in data.items:
-
-        # ⚠️ Margin must be present
-        if p_item.margin_percent is None:
-            raise HTTPException(
-                status_code=400,
-                detail=f"margin_percent is required for item '{p_item.item_name}'"
-            )
-
-        # Calculate selling price (ONLY from cost + margin)
-        selling_price = p_item.cost_price + (
-            p_item.cost_price * p_item.margin_percent / 100
-        )
-
-        # Find item
-        item = db.query(Item).filter(Item.name == p_item.item_name).first()
-
-        if not item:
-            # ---------- Create new item ----------
-            item = Item(
-                name=p_item.item_name,
-                cost_price=p_item.cost_price,
-                margin_percent=p_item.margin_percent,   # ✅ REQUIRED
-                selling_price=selling_price,            # ✅ CALCULATED
-                quantity=p_item.quantity                # ✅ INITIAL STOCK
-            )
-            db.add(item)
-            db.commit()
-            db.refresh(item)
-        else:
-            # ---------- Update existing item ----------
-            item.cost_price = p_item.cost_price
-            item.margin_percent = p_item.margin_percent   # ✅ REQUIRED
-            item.selling_price = selling_price
-            item.quantity += p_item.quantity              # ✅ STOCK INCREASE
-
-        # Line total
-        line_total = p_item.quantity * p_item.cost_price
-        total_amount += line_total
-
-        # ---------- Create purchase item ----------
-        purchase_item = PurchaseItem(
-            purchase_id=purchase.id,
-            item_id=item.id,
-            quantity=p_item.quantity,
-            cost_price=p_item.cost_price,
-            margin_percent=p_item.margin_percent,
-            selling_price=selling_price,
-            line_total=line_total
-        )
-
-        db.add(purchase_item)
-
-    # ---------- Finalize purchase ----------
-    purchase.total_amount = total_amount
-    db.commit()
-
-    return {
-        "message": "Purchase recorded",
-        "purchase_id": purchase.id,
-        "total_amount": total_amount
-    }
+    item_cache.invalidate()
+    return result
 
 @router.get("/")
 def list_purchases(db: Session = Depends(get_db)):
-    purchases = (
-        db.query(Purchase)
+    rows = db.execute(
+        select(
+            Purchase.id,
+            Supplier.name.label("supplier_name"),
+            Supplier.phone.label("supplier_phone"),
+            Purchase.total_amount,
+            Purchase.created_at,
+        )
+        .outerjoin(Supplier, Supplier.id == Purchase.supplier_id)
         .order_by(Purchase.created_at.desc())
-        .all()
     )
 
-    return [
-        {
-            "id": p.id,
-            "supplier_name": p.supplier.name if p.supplier else None,
-            "supplier_phone": p.supplier.phone if p.supplier else None,
-            "total_amount": p.total_amount,
-            "created_at": p.created_at,
-        }
-        for p in purchases
-    ]
+    return FastJSONResponse([dict(row._mapping) for row in rows])
 
 @router.get("/{purchase_id}")
 def get_purchase_details(purchase_id: int, db: Session = Depends(get_db)):
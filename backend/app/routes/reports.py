@@ -1,106 +1,166 @@
-from fastapi import APIRouter, Depends,HTTPException # type: ignore
+from fastapi import APIRouter, Depends, HTTPException, Query, Request # type: ignore
 from sqlalchemy.orm import Session # type: ignore
-from app.core.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from app.core.database import SessionLocal, get_async_db
 import csv
-from fastapi.responses import StreamingResponse # type: ignore
-from datetime import datetime, date, time
+from fastapi.responses import Response, StreamingResponse # type: ignore
+from datetime import datetime, date, time, timedelta
 import traceback
 from sqlalchemy import func # type: ignore
 from app.models.sale import Sale
-from datetime import datetime
+from app.services.export import gzip_chunks, iter_sales_csv
+from app.services.report_cache import report_cache
+from app.utils.responses import etag_matches
+from app.services.sales_report import local_today, sales_report, shop_timezone
+from typing import Literal, Optional
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 
+async def _cached(request: Request, db: AsyncSession, build, *args) -> Response:
+    """
+    Serve build(session, *args) through report_cache. A poll whose
+    If-None-Match still matches a fresh entry gets 304 without any SQL.
+    """
+    # The shop-local date is part of the key: "today" turns over at midnight
+    key = (
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        local_today(shop_timezone()),
+    )
+    entry = report_cache.get(key)
+    if entry is None:
+        generation = report_cache.generation
+        entry = report_cache.put(key, generation, await db.run_sync(build, *args))
+
+    # no-cache: browsers may keep the body but must revalidate every poll
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match", ""), entry.etag):
+        report_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+
+def _today(db: Session) -> dict:
+    """Today's (shop-local) totals: the single day bucket of /reports/sales."""
+    today = local_today(shop_timezone())
+    return sales_report(db, today, today).buckets[0]
+
+
+@router.get("/sales")
+async def sales_range_report(
+    request: Request,
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    granularity: Literal["day", "week", "month"] = "day",
+    tz: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Bills, gross, discount, net, billed (rounded), credit and distinct
+    customers per local day / week / month from `from` to `to`
+    (inclusive, shop-local dates). `tz` defaults to SHOP_TIMEZONE.
+    Week and month buckets are clipped to the range.
+    """
+    def build(session):
+        report = sales_report(session, date_from, date_to, granularity, tz)
+        return {
+            "from": report.date_from,
+            "to": report.date_to,
+            "granularity": report.granularity,
+            "timezone": report.timezone,
+            "totals": report.totals(),
+            "buckets": report.buckets,
+        }
+
+    return await _cached(request, db, build)
+
 
 @router.get("/today")
-def today_report(db: Session = Depends(get_db)):
-    sales = (
-        db.query(Sale)
-        .filter(func.date(Sale.created_at) == date.today())
-        .all()
-    )
+async def today_report(request: Request, db: AsyncSession = Depends(get_async_db)):
+    def build(session):
+        today = _today(session)
+        return {
+            "total_bills": today["bills"],
+            "total_sales_amount": today["net"],
+            "total_discount": today["discount"],
+        }
 
-    total_sales = 0
-    total_discount = 0
+    return await _cached(request, db, build)
 
-    for s in sales:
-        total_sales += s.final_amount or 0
-        total_discount += s.total_discount or 0
 
-    return {
-        "total_bills": len(sales),
-        "total_sales_amount": round(total_sales, 2),
-        "total_discount": round(total_discount, 2),
-    }
+@router.get("/cache/stats")
+def report_cache_stats():
+    return report_cache.stats()
 
 
 
 @router.get("/export/sales")
-def export_sales_csv(db: Session = Depends(get_db)):
+def export_sales_csv(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sale_type: Optional[str] = None,
+    detail: bool = False,
+    compress: bool = False,
+):
+    """
+    Stream sales as CSV. `detail=true` exports one row per sale item,
+    `compress=true` sends sales.csv.gz instead of plain CSV.
+    """
+    if sale_type and sale_type not in ["normal", "manual", "random"]:
+        raise HTTPException(status_code=400, detail="Invalid sale_type")
+
     def generate():
-        yield "Bill ID,Total Amount,Total Discount,Final Amount,Date\n"
-        sales = db.query(Sale).all()
-        for s in sales:
-            yield f"{s.id},{s.total_amount},{s.total_discount},{s.final_amount},{s.created_at}\n"
+        # Own session: it has to stay open while the body streams
+        db = SessionLocal()
+        try:
+            yield from iter_sales_csv(db, date_from, date_to, sale_type, detail)
+        finally:
+            db.close()
+
+    filename = "sales_items.csv" if detail else "sales.csv"
+
+    if compress:
+        return StreamingResponse(
+            gzip_chunks(generate()),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f"attachment; filename={filename}.gz"},
+        )
 
     return StreamingResponse(
         generate(),
         media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=sales.csv"},
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
 
 
 @router.get("/dashboard/today")
-def dashboard_today(db: Session = Depends(get_db)):
-    today = date.today()
-
-    sales = db.query(Sale).filter(
-        func.date(Sale.created_at) == today
-    ).all()
-
-    total_sales = 0
-    total_credit = 0
-    customers = set()
-
-    for s in sales:
-        total_sales += s.rounded_final_amount or 0
-        total_credit += s.due_amount or 0
-        if s.customer_id:
-            customers.add(s.customer_id)
-
-    return {
-        "total_sales": round(total_sales, 2),
-        "bill_count": len(sales),
-        "customers_count": len(customers),
-        "total_credit": round(total_credit, 2),
-    }
+async def dashboard_today(request: Request, db: AsyncSession = Depends(get_async_db)):
+    def build(session):
+        today = _today(session)
+        return {
+            "total_sales": today["billed"],
+            "bill_count": today["bills"],
+            "customers_count": today["customers"],
+            "total_credit": today["credit"],
+        }
 
-@router.get("/dashboard/last-7-days")
-def dashboard_last_7_days(db: Session = Depends(get_db)):
-    results = (
-        db.query(
-            func.date(Sale.created_at).label("date"),
-            func.coalesce(func.sum(Sale.rounded_final_amount), 0).label("total")
-        )
-        .group_by(func.date(Sale.created_at))
-        .order_by(func.date(Sale.created_at).desc())
-        .limit(7)
-        .all()
-    )
+    return await _cached(request, db, build)
 
-    return [
-        {
-            "date": str(r.date),
-            "total": round(r.total, 2),
-        }
-        for r in reversed(results)
-    ]
+@router.get("/dashboard/last-7-days")
+async def dashboard_last_7_days(request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Seven calendar days ending today, days without sales included
+    def build(session):
+        today = local_today(shop_timezone())
+        report = sales_report(session, today - timedelta(days=6), today, "day", None, False)
+        return [
+            {
+                "date": bucket["start"],
+                "total": bucket["billed"],
+            }
+            for bucket in report.buckets
+        ]
+
+    return await _cached(request, db, build)
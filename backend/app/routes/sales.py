@@ -1,268 +1,245 @@
-from fastapi import APIRouter, Depends, HTTPException # type: ignore
-from sqlalchemy.orm import Session # type: ignore
+from fastapi import APIRouter, Depends, Header, HTTPException, Query # type: ignore
+from sqlalchemy import select, tuple_ # type: ignore
+from sqlalchemy.ext.asyncio import AsyncSession # type: ignore
+from sqlalchemy.orm import Session, contains_eager # type: ignore
 
-from app.core.database import SessionLocal
+from app.core.database import get_async_db, get_db
 from app.models.item import Item
 from app.models.sale import Sale
 from app.models.sale_item import SaleItem
 from app.schemas.sale import SaleCreate
-from app.services.billing import calculate_final_price
+from app.services.billing import quote_cart
 from app.models.customer import Customer
-from app.services.credit_ledger import add_credit_entry
+from app.services.checkout import checkout
+from app.services.idempotency import idempotency, request_hash
+from app.services.item_cache import item_cache
+from app.services.sales_report import shop_timezone, utc_range
+from app.utils.responses import FastJSONResponse
 from math import floor
+from datetime import date, datetime
+from typing import Optional
+import base64
 
 
 router = APIRouter(prefix="/sales", tags=["Sales"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/")
-def create_sale(sale: SaleCreate, db: Session = Depends(get_db)):
-
-    # ------------------
-    # 🔒 Sale type validation (NEW)
-    # ------------------
-    if sale.sale_type not in ["normal", "manual", "random"]:
-        raise HTTPException(status_code=400, detail="Invalid sale_type")
-
-    # ------------------
-    # Customer handling
-    # ------------------
-    customer = None
-
-    # Random sale → customer NOT required
-    if sale.sale_type != "random" and sale.customer_phone:
-        customer = db.query(Customer).filter(
-            Customer.phone == sale.customer_phone
-        ).first()
-
-        if not customer:
-            customer = Customer(
-                name=sale.customer_name or "Unknown",
-                phone=sale.customer_phone,
-                address=sale.customer_address,
-            )
-            db.add(customer)
-            db.commit()
-            db.refresh(customer)
-        else:
-            if sale.customer_address and not customer.address:
-                customer.address = sale.customer_address
-                db.commit()
-
-    # ------------------
-    # Totals init
-    # ------------------
-    total_amount = 0
-    total_discount = 0
-
-    sale_record = Sale(
-        customer_id=customer.id if customer else None,
-
-        total_amount=0,
-        total_discount=0,
-        final_amount=0,
-        rounded_final_amount=0,
-
-        payment_mode=sale.payment_mode,
-        amount_paid=sale.amount_paid or 0,
-        due_amount=0,
-
-        sale_type=sale.sale_type,                    # ✅ NEW
-        manual_date=sale.manual_date                 # ✅ NEW (only meaningful for manual)
-        if sale.sale_type == "manual" else None,
-
-        is_manual=True if sale.sale_type == "manual" else False
-    )
-
-    db.add(sale_record)
-    db.commit()
-    db.refresh(sale_record)
-
-    # 🔧 FIX 4: Manual sale date must override created_at
-    if sale.sale_type == "manual" and sale.manual_date:
-        sale_record.created_at = sale.manual_date
-        db.commit()
-        db.refresh(sale_record)
-
-    # ------------------
-    # Item loop (STOCK ALWAYS REDUCED)
-    # ------------------
-    for s_item in sale.items:
-        item = db.query(Item).filter(Item.id == s_item.item_id).first()
-
-        if not item:
-            raise HTTPException(status_code=404, detail="Item not found")
-
-        if item.quantity < s_item.quantity:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Not enough stock for {item.name}"
-            )
-
-        # 🔧 FIX 1: Use correct price per sale type
-        price = (
-            s_item.price
-            if sale.sale_type in ["manual", "random"]
-            else item.selling_price
+async def create_sale(
+    sale: SaleCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db: AsyncSession = Depends(get_async_db),
+):
+    # A retried request gets the original bill back, nothing runs twice
+    if idempotency_key:
+        replay = await db.run_sync(
+            idempotency.lookup, "sales", idempotency_key, request_hash(sale)
         )
+        if replay is not None:
+            return replay
 
-        line_total = price * s_item.quantity
-        discount = (line_total * s_item.discount_percent) / 100
-        final_price = line_total - discount
-
-        # 🔻 STOCK REDUCTION (ALL SALE TYPES)
-        item.quantity -= s_item.quantity
-
-        sale_item = SaleItem(
-            sale_id=sale_record.id,
-            item_id=item.id,
-            quantity=s_item.quantity,
-            price=price,  # ✅ FIXED
-            discount_percent=s_item.discount_percent,
-            line_total=line_total,
-            final_price=final_price,
-        )
+    return await db.run_sync(checkout, sale, idempotency_key)
 
-        total_amount += line_total
-        total_discount += discount
-
-        db.add(sale_item)
-
-    # ------------------
-    # Rounding & credit logic
-    # ------------------
-    final_amount = total_amount - total_discount
-    rounded_final = round(final_amount, 2)
-
-    if sale.payment_mode == "credit":
-        sale_record.amount_paid = 0
-        sale_record.due_amount = rounded_final
-    else:
-        sale_record.due_amount = rounded_final - sale_record.amount_paid
-
-    sale_record.total_amount = total_amount
-    sale_record.total_discount = total_discount
-    sale_record.final_amount = final_amount
-    sale_record.rounded_final_amount = rounded_final
-
-    db.commit()
-
-    # 🔥 CREDIT LEDGER INTEGRATION
-    if sale_record.due_amount > 0:
-        add_credit_entry(
-            db=db,
-            customer_id=sale_record.customer_id,
-            amount=sale_record.due_amount,
-            reference_type="sale",
-            reference_id=sale_record.id
-        )
 
-    return {
-        "message": "Sale completed",
-        "bill_id": sale_record.id,
-        "sale_type": sale_record.sale_type,
-        "final_amount": rounded_final,
-        "due_amount": sale_record.due_amount
-    }
 
+@router.post("/preview")
+async def preview_sale(sale: SaleCreate, db: AsyncSession = Depends(get_async_db)):
+    item_ids = {s_item.item_id for s_item in sale.items}
+    items_by_id = await db.run_sync(item_cache.get_many, item_ids)
 
+    # Same engine as checkout → preview and saved bill always match
+    quote = quote_cart(sale, items_by_id)
 
-@router.post("/preview")
-def preview_sale(sale: SaleCreate, db: Session = Depends(get_db)):
-    total_amount = 0
-    total_discount = 0
-    items_preview = []
+    for line in quote.lines:
+        if items_by_id[line.item_id].quantity < line.quantity:
+            raise HTTPException(status_code=400, detail="Insufficient stock")
 
-    for s_item in sale.items:
-        item = db.query(Item).filter(Item.id == s_item.item_id).first()
+    return {
+        "items": [
+            {
+                "item_name": line.item_name,
+                "quantity": line.quantity,
+                "price": line.price,
+                "discount_percent": line.discount_percent,
+                "final_price": line.final_price
+            }
+            for line in quote.lines
+        ],
+        "total_amount": quote.total_amount,
+        "total_discount": quote.total_discount,
+        "final_amount": quote.final_amount,
+        "rounded_final_amount": quote.rounded_final_amount
+    }
 
-        if not item:
-            raise HTTPException(status_code=404, detail="Item not found")
+HISTORY_PAGE_SIZE = 100
+HISTORY_MAX_PAGE_SIZE = 500
 
-        if item.quantity < s_item.quantity:
-            raise HTTPException(status_code=400, detail="Insufficient stock")
 
-        # 🔧 FIX 2: Preview endpoint must respect price
-        price = (
-            s_item.price
-            if sale.sale_type in ["manual", "random"]
-            else item.selling_price
-        )
+def _encode_cursor(created_at: datetime, sale_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{sale_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
 
-        line_total = price * s_item.quantity
-        discount = (line_total * s_item.discount_percent) / 100
-        final_price = line_total - discount
 
-        total_amount += line_total
-        total_discount += discount
+def _decode_cursor(cursor: str):
+    try:
+        created_at, sale_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(sale_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _history_page(
+    db: Session,
+    type_filter,
+    limit: int,
+    cursor: Optional[str],
+    date_from: Optional[date],
+    date_to: Optional[date],
+    payment_mode: Optional[str],
+    customer_id: Optional[int],
+) -> tuple:
+    """
+    One keyset page of sales, newest first, ordered by (created_at, id).
+
+    Returns (rows, headers): the next page's cursor goes in the
+    X-Next-Cursor header (absent on the last page) so the body stays a
+    plain list. Rows are column tuples with the customer joined in, not
+    Sale objects.
+    """
+    query = (
+        select(
+            Sale.id,
+            Sale.created_at,
+            Sale.sale_type,
+            Sale.customer_id,
+            Customer.name.label("customer_name"),
+            Customer.phone.label("customer_phone"),
+            Sale.payment_mode,
+            Sale.rounded_final_amount,
+        )
+        .outerjoin(Customer, Customer.id == Sale.customer_id)
+        .where(type_filter)
+    )
 
-        items_preview.append({
-            "item_name": item.name,
-            "quantity": s_item.quantity,
-            "price": price,  # ✅ FIXED
-            "discount_percent": s_item.discount_percent,
-            "final_price": final_price
-        })
+    if cursor:
+        query = query.where(tuple_(Sale.created_at, Sale.id) < _decode_cursor(cursor))
+    # Dates are the shop's local days, created_at is naive UTC
+    tz = shop_timezone()
+    if date_from:
+        query = query.where(Sale.created_at >= utc_range(date_from, date_from, tz)[0])
+    if date_to:
+        query = query.where(Sale.created_at < utc_range(date_to, date_to, tz)[1])
+    if payment_mode:
+        query = query.where(Sale.payment_mode == payment_mode)
+    if customer_id:
+        query = query.where(Sale.customer_id == customer_id)
+
+    rows = db.execute(
+        query
+        .order_by(Sale.created_at.desc(), Sale.id.desc())
+        .limit(limit + 1)
+    ).all()
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return rows, headers
 
-    return {
-        "items": items_preview,
-        "total_amount": total_amount,
-        "total_discount": total_discount,
-        "final_amount": total_amount - total_discount
-    }
 
 @router.get("/history")
-def sales_history(db: Session = Depends(get_db)):
-    sales = (
-        db.query(Sale)
-        .filter(Sale.sale_type != "random")
-        .order_by(Sale.created_at.desc())
-        .all()
+def sales_history(
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    payment_mode: Optional[str] = None,
+    customer_id: Optional[int] = None,
+    sale_type: Optional[str] = Query(None, pattern="^(normal|manual)$"),
+    db: Session = Depends(get_db),
+):
+    type_filter = Sale.sale_type != "random"
+    if sale_type:
+        type_filter = Sale.sale_type == sale_type
+
+    rows, headers = _history_page(
+        db, type_filter,
+        limit, cursor, date_from, date_to, payment_mode, customer_id,
     )
 
-    return [
+    return FastJSONResponse([
         {
-            "id": s.id,
-            "created_at": s.created_at,
-            "sale_type": s.sale_type,
-            "customer_name": s.customer.name if s.customer else "Walk-in",
-            "customer_phone": s.customer.phone if s.customer else None,  # ✅ ADD
-            "payment_mode": s.payment_mode,
-            "rounded_final_amount": s.rounded_final_amount,
+            "id": r.id,
+            "created_at": r.created_at,
+            "sale_type": r.sale_type,
+            "customer_id": r.customer_id,
+            "customer_name": r.customer_name or "Walk-in",
+            "customer_phone": r.customer_phone,  # ✅ ADD
+            "payment_mode": r.payment_mode,
+            "rounded_final_amount": r.rounded_final_amount,
         }
-        for s in sales
-    ]
+        for r in rows
+    ], headers=headers)
 
 
 @router.get("/random-history")
-def random_sales(db: Session = Depends(get_db)):
+def random_sales(
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    payment_mode: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    rows, headers = _history_page(
+        db, Sale.sale_type == "random",
+        limit, cursor, date_from, date_to, payment_mode, None,
+    )
+
+    return FastJSONResponse([
+        {
+            "id": r.id,
+            "created_at": r.created_at,
+            "sale_type": "random",
+            "customer_name": "—",
+            "payment_mode": r.payment_mode,
+            "rounded_final_amount": r.rounded_final_amount,
+        }
+        for r in rows
+    ], headers=headers)
+
+    
+@router.get("/search")
+def search_sales(q: str, db: Session = Depends(get_db)):
     sales = (
         db.query(Sale)
-        .filter(Sale.sale_type == "random")
+        .join(Customer, Sale.customer_id == Customer.id)
+        .options(contains_eager(Sale.customer))
+        .filter(
+            (Customer.name.ilike(f"%{q}%")) |
+            (Customer.phone.ilike(f"%{q}%"))
+        )
         .order_by(Sale.created_at.desc())
+        .limit(10)
         .all()
     )
 
     return [
         {
-            "id": s.id,
+            "sale_id": s.id,
+            "customer_id": s.customer_id,
+            "customer_name": s.customer.name,
+            "customer_phone": s.customer.phone,
+            "amount": s.rounded_final_amount,
             "created_at": s.created_at,
-            "sale_type": "random",
-            "customer_name": "—",
+            "sale_type": s.sale_type,
             "payment_mode": s.payment_mode,
-            "rounded_final_amount": s.rounded_final_amount,
         }
         for s in sales
     ]
 
-    
+
 @router.get("/{sale_id}")
 def get_sale_details(sale_id: int, db: Session = Depends(get_db)):
     sale = db.query(Sale).filter(Sale.id == sale_id).first()
@@ -305,29 +282,3 @@ def get_sale_details(sale_id: int, db: Session = Depends(get_db)):
         "created_at": sale.created_at,
         "items": items,
     }
-
-
-
-@router.get("/search")
-def search_sales(q: str, db: Session = Depends(get_db)):
-    sales = (
-        db.query(Sale)
-        .join(Customer, Sale.customer_id == Customer.id)
-        .filter(
-            (Customer.name.ilike(f"%{q}%")) |
-            (Customer.phone.ilike(f"%{q}%"))
-        )
-        .order_by(Sale.created_at.desc())
-        .limit(10)
-        .all()
-    )
-
-    return [
-        {
-            "sale_id": s.id,
-            "customer_name": s.customer.name,
-            "customer_phone": s.customer.phone,
-            "amount": s.rounded_final_amount
-        }
-        for s in sales
-    ]
\ No newline at end of file
@@ -1,19 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query # type: ignore
 from sqlalchemy.orm import Session # type: ignore
 
-from app.core.database import SessionLocal
+from app.core.database import get_db
 from app.models.supplier import Supplier
 
 router = APIRouter(prefix="/suppliers", tags=["Suppliers"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:    
-        db.close()
-
 
 @router.get("/search")
 def search_suppliers(
@@ -1,5 +1,5 @@
 from pydantic import BaseModel # type: ignore
-from typing import Optional
+from typing import List, Optional
 
 
 class ItemCreate(BaseModel):
@@ -29,3 +29,17 @@ class ItemResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ItemReprice(BaseModel):
+    # Which items: any combination narrows the selection
+    category: Optional[str] = None
+    dealer_name: Optional[str] = None
+    item_ids: Optional[List[int]] = None
+    all_items: bool = False          # required to reprice the whole catalogue
+
+    # What changes: new margin and/or cost_price += cost_delta
+    margin_percent: Optional[float] = None
+    cost_delta: Optional[float] = None
+
+    dry_run: bool = False
@@ -0,0 +1,250 @@
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from fastapi import HTTPException # type: ignore
+from sqlalchemy.engine import make_url # type: ignore
+
+from app.core.config import settings
+
+try:
+    import zstandard # type: ignore
+except ImportError:  # optional: only needed for BACKUP_COMPRESSION=zstd
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+_EXTENSIONS = {"gzip": ".db.gz", "zstd": ".db.zst", "none": ".db"}
+_NAME = re.compile(r"^billing_(\d{8}-\d{6})\.db(\.gz|\.zst)?$")
+_CHUNK = 1024 * 1024
+
+# One backup at a time per process; the admin endpoint answers 409
+_running = threading.Lock()
+
+# Metrics of the last run in this process, served by GET /admin/backups
+last_backup = None
+
+
+def database_path(url: str = None) -> str:
+    url = make_url(url or settings.DATABASE_URL)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        raise HTTPException(
+            status_code=400,
+            detail="Online backups are only available for a SQLite database file"
+        )
+    return url.database
+
+
+def _copy(source_path: str, target_path: str) -> dict:
+    """
+    sqlite3 online backup without stalling writers.
+
+    In WAL mode a reader never blocks writers, so the whole file is copied
+    in ONE step from a single read snapshot: writers keep appending to the
+    WAL and nothing they do can restart the copy. In rollback-journal
+    mode the source is read-locked while a step runs, so the copy goes
+    BACKUP_PAGES_PER_STEP pages at a time and writers get in between;
+    a write from another connection makes SQLite restart the copy, and
+    restarts are counted in the metrics.
+    """
+    stats = {"steps": 0, "restarts": 0, "pages": 0}
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal last_remaining
+        stats["steps"] += 1
+        stats["pages"] = total
+        if last_remaining is not None and remaining > last_remaining:
+            stats["restarts"] += 1
+        last_remaining = remaining
+
+    source = sqlite3.connect(source_path, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
+    target = sqlite3.connect(target_path)
+    try:
+        journal_mode = source.execute("PRAGMA journal_mode").fetchone()[0]
+        stats["journal_mode"] = journal_mode
+        source.backup(
+            target,
+            pages=-1 if journal_mode == "wal" else settings.BACKUP_PAGES_PER_STEP,
+            progress=progress,
+            sleep=settings.BACKUP_STEP_SLEEP_MS / 1000,
+        )
+        # Self-contained file: no -wal / -shm needed next to the backup
+        target.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        target.close()
+        source.close()
+
+    return stats
+
+
+def _verify(path: str):
+    conn = sqlite3.connect(path)
+    try:
+        result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+
+    if result != ["ok"]:
+        raise RuntimeError(f"integrity_check failed: {'; '.join(result[:5])}")
+
+
+def _compress(source_path: str, target_path: str, compression: str):
+    """Stream the copy into its final file, 1 MiB at a time."""
+    with open(source_path, "rb") as src, open(target_path, "wb") as raw:
+        if compression == "gzip":
+            with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6) as out:
+                shutil.copyfileobj(src, out, _CHUNK)
+        elif compression == "zstd":
+            with zstandard.ZstdCompressor(level=3).stream_writer(raw) as out:
+                shutil.copyfileobj(src, out, _CHUNK)
+        else:
+            shutil.copyfileobj(src, raw, _CHUNK)
+
+
+def list_backups(backup_dir: str = None) -> list:
+    """Backups in BACKUP_DIR, newest first: dicts with file, created_at, bytes."""
+    backup_dir = backup_dir or settings.BACKUP_DIR
+    if not os.path.isdir(backup_dir):
+        return []
+
+    backups = []
+    for name in os.listdir(backup_dir):
+        match = _NAME.match(name)
+        if match:
+            backups.append({
+                "file": name,
+                "created_at": datetime.strptime(match.group(1), "%Y%m%d-%H%M%S"),
+                "bytes": os.path.getsize(os.path.join(backup_dir, name)),
+            })
+
+    backups.sort(key=lambda b: b["created_at"], reverse=True)
+    return backups
+
+
+def rotation_keep(backups: list, hourly: int, daily: int, weekly: int) -> set:
+    """
+    Files to keep: the newest backup of each of the `hourly` most recent
+    hours, `daily` days and `weekly` ISO weeks that have a backup. The
+    newest backup is always kept. `backups` must be newest first.
+    """
+    keep = {backups[0]["file"]} if backups else set()
+
+    buckets = [
+        (hourly, lambda t: (t.date(), t.hour)),
+        (daily, lambda t: t.date()),
+        (weekly, lambda t: t.isocalendar()[:2]),
+    ]
+    for count, bucket in buckets:
+        seen = set()
+        for backup in backups:
+            key = bucket(backup["created_at"])
+            if key in seen:
+                continue
+            if len(seen) == count:
+                break
+            seen.add(key)
+            keep.add(backup["file"])
+
+    return keep
+
+
+def rotate(backup_dir: str = None) -> list:
+    """Delete backups outside the retention policy, return their names."""
+    backup_dir = backup_dir or settings.BACKUP_DIR
+    backups = list_backups(backup_dir)
+    keep = rotation_keep(
+        backups,
+        settings.BACKUP_KEEP_HOURLY,
+        settings.BACKUP_KEEP_DAILY,
+        settings.BACKUP_KEEP_WEEKLY,
+    )
+
+    deleted = []
+    for backup in backups:
+        if backup["file"] not in keep:
+            os.remove(os.path.join(backup_dir, backup["file"]))
+            deleted.append(backup["file"])
+    return deleted
+
+
+def run_backup(database_url: str = None, backup_dir: str = None, compression: str = None) -> dict:
+    """
+    Copy, verify, compress, then rotate. Returns timing and size metrics.
+
+    The copy goes to a temp file first; only a copy that passed
+    `PRAGMA integrity_check` is compressed into BACKUP_DIR, and the final
+    name appears atomically (os.replace), so a half-written file never
+    looks like a backup.
+    """
+    global last_backup
+
+    source_path = database_path(database_url)
+    backup_dir = backup_dir or settings.BACKUP_DIR
+    compression = compression or settings.BACKUP_COMPRESSION
+
+    if compression not in _EXTENSIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown backup compression '{compression}'")
+    if compression == "zstd" and zstandard is None:
+        raise HTTPException(
+            status_code=400,
+            detail="BACKUP_COMPRESSION=zstd needs the zstandard package"
+        )
+
+    if not _running.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A backup is already running")
+
+    try:
+        os.makedirs(backup_dir, exist_ok=True)
+
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        name = f"billing_{stamp}{_EXTENSIONS[compression]}"
+        target = os.path.join(backup_dir, name)
+        copy_path = os.path.join(backup_dir, f".{name}.copy")
+
+        started = time.perf_counter()
+        try:
+            copy_stats = _copy(source_path, copy_path)
+            copied = time.perf_counter()
+
+            _verify(copy_path)
+            verified = time.perf_counter()
+
+            _compress(copy_path, target + ".part", compression)
+            os.replace(target + ".part", target)
+            compressed = time.perf_counter()
+
+            database_bytes = os.path.getsize(copy_path)
+        finally:
+            for leftover in (copy_path, target + ".part"):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+        deleted = rotate(backup_dir)
+
+        last_backup = {
+            "file": name,
+            "created_at": datetime.now(),
+            "compression": compression,
+            "database_bytes": database_bytes,
+            "backup_bytes": os.path.getsize(target),
+            "pages": copy_stats["pages"],
+            "steps": copy_stats["steps"],
+            "restarts": copy_stats["restarts"],
+            "journal_mode": copy_stats["journal_mode"],
+            "copy_seconds": round(copied - started, 3),
+            "verify_seconds": round(verified - copied, 3),
+            "compress_seconds": round(compressed - verified, 3),
+            "total_seconds": round(time.perf_counter() - started, 3),
+            "deleted": deleted,
+        }
+        logger.info("backup %s written in %.2fs", name, last_backup["total_seconds"])
+        return last_backup
+    finally:
+        _running.release()
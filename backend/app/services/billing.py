@@ -1,3 +1,10 @@
+from typing import List, NamedTuple
+
+from fastapi import HTTPException # type: ignore
+
+from app.schemas.sale import SaleCreate
+
+
 def calculate_discount(amount: float, discount_percent: float) -> float:
     return amount * discount_percent / 100
 
@@ -6,3 +13,88 @@ def calculate_final_price(price: float, quantity: int, discount_percent: float):
     total = price * quantity
     discount = calculate_discount(total, discount_percent)
     return total, discount, total - discount
+
+
+class PricedLine(NamedTuple):
+    item_id: int
+    item_name: str
+    quantity: int
+    price: float
+    discount_percent: float
+    line_total: float
+    discount: float
+    final_price: float
+
+
+class CartQuote(NamedTuple):
+    lines: List[PricedLine]
+    total_amount: float
+    total_discount: float
+    final_amount: float
+    rounded_final_amount: float
+
+    def quantities(self) -> dict:
+        """item_id -> quantity, lines for the same item summed."""
+        wanted = {}
+        for line in self.lines:
+            wanted[line.item_id] = wanted.get(line.item_id, 0) + line.quantity
+        return wanted
+
+
+def quote_cart(sale: SaleCreate, items_by_id: dict) -> CartQuote:
+    """
+    Price a whole cart: lines, discounts, totals and rounding.
+
+    Preview and checkout both call this, so a previewed bill and the
+    saved bill can never disagree. `items_by_id` maps item_id to anything
+    with `name` and `selling_price` (ORM rows or item cache snapshots).
+    Normal sales use the catalogue price; manual and random sales use the
+    price typed on the line.
+    """
+    custom_price = sale.sale_type in ["manual", "random"]
+
+    lines = []
+    total_amount = 0
+    total_discount = 0
+
+    for s_item in sale.items:
+        item = items_by_id.get(s_item.item_id)
+
+        if not item:
+            raise HTTPException(status_code=404, detail="Item not found")
+
+        price = s_item.price if custom_price else item.selling_price
+
+        if price is None:
+            raise HTTPException(
+                status_code=400,
+                detail=f"price is required for {sale.sale_type} sale lines"
+            )
+
+        line_total, discount, final_price = calculate_final_price(
+            price, s_item.quantity, s_item.discount_percent
+        )
+
+        lines.append(PricedLine(
+            item_id=s_item.item_id,
+            item_name=item.name,
+            quantity=s_item.quantity,
+            price=price,
+            discount_percent=s_item.discount_percent,
+            line_total=line_total,
+            discount=discount,
+            final_price=final_price,
+        ))
+
+        total_amount += line_total
+        total_discount += discount
+
+    final_amount = total_amount - total_discount
+
+    return CartQuote(
+        lines=lines,
+        total_amount=total_amount,
+        total_discount=total_discount,
+        final_amount=final_amount,
+        rounded_final_amount=round(final_amount, 2),
+    )
@@ -0,0 +1,118 @@
+"""
+GET /items/ as a versioned document.
+
+Every write to items stamps the next "item_rows" counter value into
+Item.version (next_item_version), stock taken by sales included. So the
+counter alone identifies the full list (ETag, 304s), and the rows
+changed after version N are an indexed range read (`since_version`).
+
+The full list is rendered and compressed once per version, so reloading
+an unchanged catalogue costs one primary-key read.
+"""
+import gzip
+import threading
+from typing import Optional
+
+from sqlalchemy import select # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.config import settings
+from app.models.item import Item
+from app.utils.responses import render_json
+
+try:
+    import brotli # type: ignore
+except ImportError:  # optional: only needed for Content-Encoding: br
+    brotli = None
+
+_COLUMNS = (
+    Item.id,
+    Item.name,
+    Item.quantity,
+    Item.cost_price,
+    Item.margin_percent,
+    Item.selling_price,
+)
+
+
+def item_rows(db: Session, since_version: Optional[int] = None) -> list:
+    """
+    Catalogue entries by name, or with `since_version` the rows stamped
+    after it in change order (a range read of ix_items_version).
+    """
+    if since_version is None:
+        query = select(*_COLUMNS).order_by(Item.name)
+    else:
+        query = (
+            select(*_COLUMNS)
+            .where(Item.version > since_version)
+            .order_by(Item.version, Item.id)
+        )
+    return [dict(row._mapping) for row in db.execute(query)]
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """br if the client takes it (and brotli is installed), else gzip, else None."""
+    offered = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        offered[name.strip().lower()] = quality
+
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if offered.get(encoding, offered.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+def encode(body: bytes, encoding: Optional[str]):
+    """(body, encoding actually applied); small bodies go out as they are."""
+    if encoding is None or len(body) < settings.CATALOGUE_COMPRESS_MIN_BYTES:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=5), "br"
+    return gzip.compress(body, compresslevel=6), "gzip"
+
+
+class RenderedCatalogue:
+    """The full list of the latest version seen, per content encoding."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._bodies = {}
+
+    def body(self, db: Session, version: int, encoding: Optional[str]):
+        """
+        (body, encoding) of the full list at `version`. The rows are read
+        after the version, so a concurrent write can only make the body
+        newer than its version, never older: a later since_version=
+        call repeats those rows instead of missing them.
+        """
+        with self._lock:
+            if self._version == version and encoding in self._bodies:
+                return self._bodies[encoding]
+            plain = self._bodies.get(None) if self._version == version else None
+
+        if plain is None:
+            plain = (render_json(item_rows(db)), None)
+        encoded = encode(plain[0], encoding)
+
+        with self._lock:
+            if self._version != version:
+                self._version = version
+                self._bodies = {}
+            self._bodies[None] = plain
+            self._bodies[encoding] = encoded
+        return encoded
+
+
+rendered_catalogue = RenderedCatalogue()
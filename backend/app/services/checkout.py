@@ -0,0 +1,205 @@
+from fastapi import HTTPException # type: ignore
+from sqlalchemy import insert # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.models.customer import Customer
+from app.models.sale import Sale
+from app.models.sale_item import SaleItem
+from app.schemas.sale import SaleCreate
+from app.services.billing import quote_cart
+from app.services.credit_ledger import add_credit_entry
+from app.services.customer_stats import record_customer_sale
+from app.services.daily_sales import record_sale
+from app.services.idempotency import idempotency, request_hash
+from app.services.item_cache import item_cache, stamp_item_versions
+from app.services.stock import reserve_stock
+
+
+def checkout(db: Session, sale: SaleCreate, idempotency_key: str = None) -> dict:
+    """
+    Record a bill: stock, customer, sale, lines, rollup and ledger in ONE
+    commit. With an `idempotency_key` the response is stored in that same
+    commit, and a concurrent duplicate gets the first bill's response.
+
+    Sync on purpose so it can run on a plain Session (scripts,
+    benchmarks) or inside an AsyncSession via `run_sync`.
+
+    Statements per bill with a warm item cache: 6 plus one stock UPDATE
+    per distinct item (version check, sale, lines, daily rollup, item
+    version and its stamp on the sold rows); +3 with a customer (lookup,
+    customer_stats upsert, daily customer) and +1 if the customer is
+    new; +3 when something is left due (balance read and upsert, ledger
+    entry) and +1 on a customer's first entry; +1 with an idempotency
+    key. A one-item credit bill for a known customer runs 13
+    (benchmarks/checkout.py).
+    """
+
+    # ------------------
+    # 🔒 Sale type validation (NEW)
+    # ------------------
+    if sale.sale_type not in ["normal", "manual", "random"]:
+        raise HTTPException(status_code=400, detail="Invalid sale_type")
+
+    # ------------------
+    # Cart items from the item cache
+    # (strict → re-check the shared catalogue version first)
+    # ------------------
+    item_ids = {s_item.item_id for s_item in sale.items}
+    items_by_id = item_cache.get_many(db, item_ids, strict=True)
+
+    # ------------------
+    # Pricing (same engine as /sales/preview)
+    # Lines are validated before the first write, so a bad line
+    # never leaves a half-written bill behind.
+    # ------------------
+    quote = quote_cart(sale, items_by_id)
+    wanted = quote.quantities()
+
+    # Random sale → customer NOT required
+    has_customer = sale.sale_type != "random" and bool(sale.customer_phone)
+
+    # ------------------
+    # Rounding & credit logic
+    # (checked before any write: nothing to roll back)
+    # ------------------
+    rounded_final = quote.rounded_final_amount
+
+    if sale.payment_mode == "credit":
+        amount_paid = 0
+        due_amount = rounded_final
+    else:
+        amount_paid = sale.amount_paid or 0
+        due_amount = rounded_final - amount_paid
+
+    if due_amount > 0 and not has_customer:
+        raise HTTPException(
+            status_code=400,
+            detail="Customer phone is required for credit sales"
+        )
+
+    # ------------------
+    # 🔻 STOCK REDUCTION (ALL SALE TYPES)
+    # Conditional UPDATE per item, conflicts reported per line
+    # ------------------
+    conflicts = reserve_stock(db, wanted)
+
+    if conflicts:
+        detail = {
+            "message": "Not enough stock",
+            "conflicts": [
+                {
+                    "item_id": item_id,
+                    "item_name": items_by_id[item_id].name,
+                    "requested": wanted[item_id],
+                }
+                for item_id in conflicts
+            ],
+        }
+        db.rollback()
+        # Cached stock was behind the database
+        item_cache.invalidate()
+        raise HTTPException(status_code=409, detail=detail)
+
+    # ------------------
+    # Customer handling
+    # ------------------
+    customer = None
+
+    if has_customer:
+        customer = db.query(Customer).filter(
+            Customer.phone == sale.customer_phone
+        ).first()
+
+        if not customer:
+            customer = Customer(
+                name=sale.customer_name or "Unknown",
+                phone=sale.customer_phone,
+                address=sale.customer_address,
+            )
+            db.add(customer)
+            db.flush()
+        else:
+            if sale.customer_address and not customer.address:
+                customer.address = sale.customer_address
+
+    sale_record = Sale(
+        customer_id=customer.id if customer else None,
+
+        total_amount=quote.total_amount,
+        total_discount=quote.total_discount,
+        final_amount=quote.final_amount,
+        rounded_final_amount=rounded_final,
+
+        payment_mode=sale.payment_mode,
+        amount_paid=amount_paid,
+        due_amount=due_amount,
+
+        sale_type=sale.sale_type,                    # ✅ NEW
+        manual_date=sale.manual_date                 # ✅ NEW (only meaningful for manual)
+        if sale.sale_type == "manual" else None,
+
+        is_manual=True if sale.sale_type == "manual" else False
+    )
+
+    # 🔧 FIX 4: Manual sale date must override created_at
+    if sale.sale_type == "manual" and sale.manual_date:
+        sale_record.created_at = sale.manual_date
+
+    db.add(sale_record)
+    db.flush()
+
+    # Bulk insert of all lines (one executemany)
+    if quote.lines:
+        db.execute(insert(SaleItem), [
+            {
+                "sale_id": sale_record.id,
+                "item_id": line.item_id,
+                "quantity": line.quantity,
+                "price": line.price,
+                "discount_percent": line.discount_percent,
+                "line_total": line.line_total,
+                "final_price": line.final_price,
+            }
+            for line in quote.lines
+        ])
+
+    # 📊 Customer totals (same transaction)
+    record_customer_sale(db, sale_record)
+
+    # 🔥 CREDIT LEDGER INTEGRATION (same transaction)
+    if sale_record.due_amount > 0:
+        add_credit_entry(
+            db=db,
+            customer_id=sale_record.customer_id,
+            amount=sale_record.due_amount,
+            reference_type="sale",
+            reference_id=sale_record.id
+        )
+
+    result = {
+        "message": "Sale completed",
+        "bill_id": sale_record.id,
+        "sale_type": sale_record.sale_type,
+        "final_amount": rounded_final,
+        "due_amount": due_amount
+    }
+
+    if idempotency_key:
+        req_hash = request_hash(sale)
+        replay = idempotency.save(db, "sales", idempotency_key, req_hash, result)
+        if replay is not None:
+            return replay
+
+    # Hot rows last: every bill waits on the day's rollup row and on the
+    # item version counter until the bill before it commits
+    record_sale(db, sale_record)
+    stamp_item_versions(db, wanted)
+
+    # Single commit for stock, customer, sale, lines, rollup and ledger
+    db.commit()
+    item_cache.apply_stock_delta(wanted)
+
+    if idempotency_key:
+        idempotency.remember("sales", idempotency_key, req_hash, result)
+
+    return result
@@ -1,17 +1,64 @@
+from datetime import datetime
+
 from sqlalchemy.orm import Session # type: ignore
 from app.models.credit_ledger import CreditLedger
+from app.models.customer_balance import CustomerBalance
+from app.utils.upsert import upsert
 
 
-def get_last_balance(db: Session, customer_id: int) -> float:
+def _ledger_balance(db: Session, customer_id: int) -> float:
+    # Newest entry by id: ids are monotonic, timestamps can tie
     last = (
-        db.query(CreditLedger)
+        db.query(CreditLedger.balance_after)
         .filter(CreditLedger.customer_id == customer_id)
-        .order_by(CreditLedger.created_at.desc())
+        .order_by(CreditLedger.id.desc())
         .first()
     )
     return float(last.balance_after) if last else 0.0
 
 
+def get_last_balance(db: Session, customer_id: int) -> float:
+    balance = db.get(CustomerBalance, customer_id)
+    if balance is not None:
+        return float(balance.balance)
+
+    # Customers with ledger history from before customer_balances existed
+    return _ledger_balance(db, customer_id)
+
+
+def _apply_to_balance(db: Session, customer_id: int, delta: float) -> float:
+    """Move the customer's balance by `delta` and return the new balance."""
+    opening = 0.0
+    if db.get(CustomerBalance, customer_id) is None:
+        opening = _ledger_balance(db, customer_id)
+
+    stmt = upsert(
+        db,
+        CustomerBalance,
+        values={
+            "customer_id": customer_id,
+            "balance": opening + delta,
+            "updated_at": datetime.utcnow(),
+        },
+        index_elements=[CustomerBalance.customer_id],
+        set_={
+            "balance": CustomerBalance.balance + delta,
+            "updated_at": datetime.utcnow(),
+        },
+    ).returning(CustomerBalance.balance)
+
+    new_balance = db.execute(stmt).scalar_one()
+
+    # Keep an identity-mapped row (if any) in step with the database
+    cached = db.identity_map.get(db.identity_key(CustomerBalance, customer_id))
+    if cached is not None:
+        db.expire(cached)
+
+    return float(new_balance)
+
+
+# Entries are only flushed: the caller owns the transaction and commits
+# the ledger row together with the sale / payment it belongs to.
 def add_credit_entry(
     db: Session,
     customer_id: int,
@@ -19,8 +66,7 @@ def add_credit_entry(
     reference_type: str,
     reference_id: int
 ):
-    last_balance = get_last_balance(db, customer_id)
-    new_balance = last_balance + amount
+    new_balance = _apply_to_balance(db, customer_id, amount)
 
     entry = CreditLedger(
         customer_id=customer_id,
@@ -32,7 +78,7 @@ def add_credit_entry(
     )
 
     db.add(entry)
-    db.commit()
+    db.flush()
 
 
 def add_debit_entry(
@@ -40,8 +86,7 @@ def add_debit_entry(
     customer_id: int,
     amount: float
 ):
-    last_balance = get_last_balance(db, customer_id)
-    new_balance = last_balance - amount
+    new_balance = _apply_to_balance(db, customer_id, -amount)
 
     entry = CreditLedger(
         customer_id=customer_id,
@@ -53,4 +98,59 @@ def add_debit_entry(
     )
 
     db.add(entry)
-    db.commit()
+    db.flush()
+
+
+def rebuild_balances(db: Session, verify_only: bool = False, chunk_size: int = 5000) -> dict:
+    """
+    Recompute every customer's balance from the ledger in one streaming
+    pass (ordered by customer, then id) and compare with customer_balances.
+
+    With verify_only the table is left untouched; otherwise mismatching
+    and missing rows are fixed. Nothing is committed here.
+    """
+    stored = {
+        customer_id: float(balance)
+        for customer_id, balance in db.query(
+            CustomerBalance.customer_id, CustomerBalance.balance
+        )
+    }
+
+    rows = (
+        db.query(CreditLedger.customer_id, CreditLedger.entry_type, CreditLedger.amount)
+        .order_by(CreditLedger.customer_id, CreditLedger.id)
+        .yield_per(chunk_size)
+    )
+
+    computed = {}
+    entries = 0
+    for customer_id, entry_type, amount in rows:
+        sign = 1 if entry_type == "credit" else -1
+        computed[customer_id] = computed.get(customer_id, 0.0) + sign * float(amount)
+        entries += 1
+
+    # Balance rows without any ledger entry should be zero
+    for customer_id in stored:
+        computed.setdefault(customer_id, 0.0)
+
+    mismatches = [
+        {
+            "customer_id": customer_id,
+            "stored": stored.get(customer_id),
+            "computed": round(balance, 2),
+        }
+        for customer_id, balance in computed.items()
+        if stored.get(customer_id) is None
+        or abs(stored[customer_id] - balance) >= 0.005
+    ]
+
+    if not verify_only:
+        for m in mismatches:
+            db.merge(CustomerBalance(customer_id=m["customer_id"], balance=m["computed"]))
+        db.flush()
+
+    return {
+        "ledger_entries": entries,
+        "customers": len(computed),
+        "mismatches": mismatches,
+    }
@@ -0,0 +1,108 @@
+from sqlalchemy import case, func, insert, literal # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.models.credit_ledger import CreditLedger
+from app.models.customer_stats import CustomerStats
+from app.models.sale import Sale
+from app.utils.upsert import upsert
+
+
+def record_customer_sale(db: Session, sale: Sale):
+    """
+    Add one sale to its customer's row in customer_stats.
+
+    Call inside the sale's transaction (after flush, before commit).
+    Sales without a customer are skipped.
+    """
+    if not sale.customer_id:
+        return
+
+    db.execute(upsert(
+        db,
+        CustomerStats,
+        values={
+            "customer_id": sale.customer_id,
+            "bill_count": 1,
+            "total_purchase": sale.rounded_final_amount or 0,
+            "total_paid": sale.amount_paid or 0,
+            "total_credit": sale.due_amount or 0,
+            "credit_payments": 0,
+            "last_purchase_date": sale.created_at,
+        },
+        index_elements=[CustomerStats.customer_id],
+        set_={
+            "bill_count": CustomerStats.bill_count + 1,
+            "total_purchase": CustomerStats.total_purchase + (sale.rounded_final_amount or 0),
+            "total_paid": CustomerStats.total_paid + (sale.amount_paid or 0),
+            "total_credit": CustomerStats.total_credit + (sale.due_amount or 0),
+            # Manual sales can be back-dated: keep the latest date
+            "last_purchase_date": case(
+                (
+                    CustomerStats.last_purchase_date.is_(None)
+                    | (CustomerStats.last_purchase_date < sale.created_at),
+                    sale.created_at,
+                ),
+                else_=CustomerStats.last_purchase_date,
+            ),
+        },
+    ))
+
+
+def record_customer_payment(db: Session, customer_id: int, amount: float):
+    """Add a credit payment; call inside the payment's transaction."""
+    db.execute(upsert(
+        db,
+        CustomerStats,
+        values={
+            "customer_id": customer_id,
+            "bill_count": 0,
+            "total_purchase": 0,
+            "total_paid": 0,
+            "total_credit": 0,
+            "credit_payments": amount,
+            "last_purchase_date": None,
+        },
+        index_elements=[CustomerStats.customer_id],
+        set_={"credit_payments": CustomerStats.credit_payments + amount},
+    ))
+
+
+def backfill_customer_stats(db: Session) -> int:
+    """
+    Rebuild customer_stats from sales and credit_ledger payments with
+    grouped INSERT ... SELECT / upserts. Not committed. Returns the
+    number of customers written.
+    """
+    db.query(CustomerStats).delete(synchronize_session=False)
+
+    db.execute(
+        insert(CustomerStats).from_select(
+            [
+                "customer_id", "bill_count", "total_purchase", "total_paid",
+                "total_credit", "credit_payments", "last_purchase_date",
+            ],
+            db.query(
+                Sale.customer_id,
+                func.count(Sale.id),
+                func.coalesce(func.sum(Sale.rounded_final_amount), 0),
+                func.coalesce(func.sum(Sale.amount_paid), 0),
+                func.coalesce(func.sum(Sale.due_amount), 0),
+                literal(0.0),
+                func.max(Sale.created_at),
+            )
+            .filter(Sale.customer_id.isnot(None))
+            .group_by(Sale.customer_id)
+            .statement,
+        )
+    )
+
+    payments = (
+        db.query(CreditLedger.customer_id, func.sum(CreditLedger.amount))
+        .filter(CreditLedger.entry_type == "debit")
+        .group_by(CreditLedger.customer_id)
+        .all()
+    )
+    for customer_id, amount in payments:
+        record_customer_payment(db, customer_id, float(amount))
+
+    return db.query(CustomerStats).count()
@@ -0,0 +1,117 @@
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import case, func, insert, select # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.models.daily_sales_summary import DailySalesCustomer, DailySalesSummary
+from app.models.sale import Sale
+from app.services.sales_report import bucket_expression, offset_segments, shop_timezone
+from app.utils.upsert import insert_ignore, upsert
+
+
+def sale_day(created_at: datetime, tz) -> date:
+    """Local date in `tz` of a naive UTC timestamp."""
+    return created_at.replace(tzinfo=timezone.utc).astimezone(tz).date()
+
+
+def record_sale(db: Session, sale: Sale):
+    """
+    Add one sale to its shop-local day's row in daily_sales_summary.
+
+    Call inside the sale's transaction (after flush, before commit) so the
+    rollup and the bill are committed or rolled back together. Every bill
+    of the day upserts the same row, which stays locked until commit:
+    call it as late as possible.
+    """
+    day = sale_day(sale.created_at, shop_timezone())
+
+    new_customer = 0
+    if sale.customer_id:
+        result = db.execute(insert_ignore(
+            db,
+            DailySalesCustomer,
+            values={"day": day, "customer_id": sale.customer_id},
+            index_elements=[DailySalesCustomer.day, DailySalesCustomer.customer_id],
+        ))
+        new_customer = 1 if result.rowcount == 1 else 0
+
+    credit = max(sale.due_amount or 0, 0)
+
+    db.execute(upsert(
+        db,
+        DailySalesSummary,
+        values={
+            "day": day,
+            "bill_count": 1,
+            "gross_amount": sale.total_amount or 0,
+            "discount_amount": sale.total_discount or 0,
+            "net_amount": sale.final_amount or 0,
+            "billed_amount": sale.rounded_final_amount or 0,
+            "credit_issued": credit,
+            "customers_count": new_customer,
+        },
+        index_elements=[DailySalesSummary.day],
+        set_={
+            "bill_count": DailySalesSummary.bill_count + 1,
+            "gross_amount": DailySalesSummary.gross_amount + (sale.total_amount or 0),
+            "discount_amount": DailySalesSummary.discount_amount + (sale.total_discount or 0),
+            "net_amount": DailySalesSummary.net_amount + (sale.final_amount or 0),
+            "billed_amount": DailySalesSummary.billed_amount + (sale.rounded_final_amount or 0),
+            "credit_issued": DailySalesSummary.credit_issued + credit,
+            "customers_count": DailySalesSummary.customers_count + new_customer,
+        },
+    ))
+
+
+def backfill_daily_sales(db: Session) -> int:
+    """
+    Rebuild daily_sales_summary and daily_sales_customers from the sales
+    table with two grouped INSERT ... SELECT statements, days in the
+    current SHOP_TIMEZONE. Not committed. Returns the number of days
+    written.
+    """
+    db.query(DailySalesCustomer).delete(synchronize_session=False)
+    db.query(DailySalesSummary).delete(synchronize_session=False)
+
+    first, last = db.execute(select(func.min(Sale.created_at), func.max(Sale.created_at))).one()
+    if first is None:
+        return 0
+
+    tz = shop_timezone()
+    segments = offset_segments(first, last + timedelta(minutes=1), tz)
+    day = bucket_expression(db, segments, "day")
+
+    db.execute(
+        insert(DailySalesCustomer).from_select(
+            ["day", "customer_id"],
+            db.query(day, Sale.customer_id)
+            .filter(Sale.customer_id.isnot(None))
+            .distinct()
+            .statement,
+        )
+    )
+
+    db.execute(
+        insert(DailySalesSummary).from_select(
+            [
+                "day", "bill_count", "gross_amount", "discount_amount",
+                "net_amount", "billed_amount", "credit_issued", "customers_count",
+            ],
+            db.query(
+                day,
+                func.count(Sale.id),
+                func.coalesce(func.sum(Sale.total_amount), 0),
+                func.coalesce(func.sum(Sale.total_discount), 0),
+                func.coalesce(func.sum(Sale.final_amount), 0),
+                func.coalesce(func.sum(Sale.rounded_final_amount), 0),
+                func.coalesce(func.sum(
+                    case((Sale.due_amount > 0, Sale.due_amount), else_=0)
+                ), 0),
+                func.count(func.distinct(Sale.customer_id)),
+            )
+            .group_by(day)
+            .statement,
+        )
+    )
+
+    return db.query(DailySalesSummary).count()
@@ -0,0 +1,98 @@
+import csv
+import io
+import zlib
+from datetime import date
+from typing import Iterator, Optional
+
+from sqlalchemy import select # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.models.item import Item
+from app.models.sale import Sale
+from app.models.sale_item import SaleItem
+from app.services.sales_report import shop_timezone, utc_range
+
+SALE_HEADER = ["Bill ID", "Total Amount", "Total Discount", "Final Amount", "Date"]
+
+DETAIL_HEADER = [
+    "Bill ID", "Date", "Sale Type", "Payment Mode",
+    "Item ID", "Item Name", "Quantity", "Price", "Discount %", "Line Total", "Final Price",
+]
+
+
+def _sales_query(
+    date_from: Optional[date],
+    date_to: Optional[date],
+    sale_type: Optional[str],
+    detail: bool,
+):
+    if detail:
+        query = (
+            select(
+                Sale.id, Sale.created_at, Sale.sale_type, Sale.payment_mode,
+                SaleItem.item_id, Item.name, SaleItem.quantity, SaleItem.price,
+                SaleItem.discount_percent, SaleItem.line_total, SaleItem.final_price,
+            )
+            .join(SaleItem, SaleItem.sale_id == Sale.id)
+            .join(Item, Item.id == SaleItem.item_id)
+            .order_by(Sale.id, SaleItem.id)
+        )
+    else:
+        query = select(
+            Sale.id, Sale.total_amount, Sale.total_discount,
+            Sale.final_amount, Sale.created_at,
+        ).order_by(Sale.id)
+
+    # Dates are the shop's local days, as in /reports/sales
+    tz = shop_timezone()
+    if date_from:
+        query = query.where(Sale.created_at >= utc_range(date_from, date_from, tz)[0])
+    if date_to:
+        query = query.where(Sale.created_at < utc_range(date_to, date_to, tz)[1])
+    if sale_type:
+        query = query.where(Sale.sale_type == sale_type)
+
+    return query
+
+
+def iter_sales_csv(
+    db: Session,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sale_type: Optional[str] = None,
+    detail: bool = False,
+    chunk_size: int = 2000,
+) -> Iterator[str]:
+    """
+    Yield the sales export as CSV text, one chunk per `chunk_size` rows.
+
+    Rows come from a server-side cursor (stream_results + yield_per) as
+    plain tuples, so memory stays flat however many sales are exported.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(DETAIL_HEADER if detail else SALE_HEADER)
+
+    result = db.execute(
+        _sales_query(date_from, date_to, sale_type, detail)
+        .execution_options(stream_results=True, yield_per=chunk_size)
+    )
+
+    for rows in result.partitions():
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_chunks(chunks: Iterator[str], level: int = 6) -> Iterator[bytes]:
+    """Compress a text stream into a single gzip member, chunk by chunk."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 → gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException # type: ignore
+from pydantic import BaseModel # type: ignore
+from sqlalchemy import delete, select # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.config import settings
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.upsert import insert_ignore
+
+
+def request_hash(body: BaseModel) -> str:
+    """Fingerprint of a request body: a key may only replay the same request."""
+    return hashlib.sha256(body.model_dump_json().encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Replays the stored response of a POST retried with the same
+    Idempotency-Key instead of running it again.
+
+    The idempotency_keys row is written in the SAME transaction as the
+    sale / purchase, so a request either left both or neither behind.
+    Two copies of one request racing each other both get to `save`; the
+    second INSERT finds the key taken, rolls its own work back and
+    returns the first one's response.
+
+    Saved responses are also kept in a small in-process LRU, so a retry
+    landing on the same worker is answered without touching the database.
+    """
+
+    def __init__(self, ttl_hours: int, max_size: int):
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # (scope, key) -> (request_hash, response, expires_at monotonic)
+        self._entries = OrderedDict()
+
+    def _check(self, entry_hash: str, wanted_hash: str):
+        if entry_hash != wanted_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request"
+            )
+
+    def remember(self, scope: str, key: str, req_hash: str, response: dict, ttl: float = None):
+        """Put a committed response in the front cache."""
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl.total_seconds())
+        with self._lock:
+            self._entries[(scope, key)] = (req_hash, response, expires_at)
+            self._entries.move_to_end((scope, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def lookup(self, db: Session, scope: str, key: str, req_hash: str) -> Optional[dict]:
+        """The stored response for this key, or None if it is new / expired."""
+        with self._lock:
+            entry = self._entries.get((scope, key))
+            if entry is not None and entry[2] <= time.monotonic():
+                del self._entries[(scope, key)]
+                entry = None
+
+        if entry is not None:
+            self._check(entry[0], req_hash)
+            return entry[1]
+
+        row = db.execute(
+            select(IdempotencyKey).where(
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key,
+                IdempotencyKey.created_at >= datetime.utcnow() - self.ttl,
+            )
+        ).scalar_one_or_none()
+
+        if row is None:
+            return None
+
+        self._check(row.request_hash, req_hash)
+        response = json.loads(row.response)
+        remaining = (row.created_at + self.ttl - datetime.utcnow()).total_seconds()
+        self.remember(scope, key, row.request_hash, response, ttl=remaining)
+        return response
+
+    def save(self, db: Session, scope: str, key: str, req_hash: str, response: dict) -> Optional[dict]:
+        """
+        Store `response` in the caller's transaction, right before its
+        commit. Returns None when stored; when another request already
+        committed this key, rolls the caller's transaction back and
+        returns that request's response instead.
+        """
+        # Expired keys may be reused; the created_at index keeps this cheap
+        db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.created_at < datetime.utcnow() - self.ttl
+            )
+        )
+
+        result = db.execute(insert_ignore(
+            db,
+            IdempotencyKey,
+            values={
+                "scope": scope,
+                "key": key,
+                "request_hash": req_hash,
+                "response": json.dumps(response, default=str),
+                "created_at": datetime.utcnow(),
+            },
+            index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+        ))
+        if result.rowcount == 1:
+            return None
+
+        db.rollback()
+        replay = self.lookup(db, scope, key, req_hash)
+        if replay is None:
+            raise HTTPException(status_code=409, detail="Request is already being processed")
+        return replay
+
+
+idempotency = IdempotencyStore(
+    ttl_hours=settings.IDEMPOTENCY_TTL_HOURS,
+    max_size=settings.IDEMPOTENCY_CACHE_SIZE,
+)
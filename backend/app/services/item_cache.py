@@ -0,0 +1,279 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select, update # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.config import settings
+from app.models.cache_version import CacheVersion
+from app.models.item import Item
+from app.utils.upsert import upsert
+
+CATALOGUE = "items"
+ITEM_ROWS = "item_rows"
+
+
+class ItemSnapshot(NamedTuple):
+    id: int
+    name: str
+    category: Optional[str]
+    dealer_name: Optional[str]
+    cost_price: float
+    margin_percent: float
+    selling_price: float
+    quantity: int
+    created_at: Optional[datetime]
+
+
+_COLUMNS = [getattr(Item, field) for field in ItemSnapshot._fields]
+
+
+def bump_catalogue_version(db: Session):
+    """
+    Mark the catalogue as changed for every worker. Call inside the
+    writing transaction; call item_cache.invalidate() after commit.
+    """
+    now = datetime.utcnow()
+    db.execute(upsert(
+        db,
+        CacheVersion,
+        values={"name": CATALOGUE, "version": 1, "updated_at": now},
+        index_elements=[CacheVersion.name],
+        set_={"version": CacheVersion.version + 1, "updated_at": now},
+    ))
+
+
+def next_item_version(db: Session) -> int:
+    """
+    Bump the item row counter and return its new value. Every
+    transaction that changes items rows (edits, purchases, stock taken by
+    sales) stamps it into Item.version.
+
+    The upsert locks the counter row until commit, so versions commit in
+    order and a reader that saw version N sees every row stamped <= N.
+    Every writer holds that lock, so take it after the items rows are
+    written and as close to the commit as possible (stamp_item_versions):
+    rows first, counter last also keeps writers from deadlocking.
+    """
+    now = datetime.utcnow()
+    return db.execute(
+        upsert(
+            db,
+            CacheVersion,
+            values={"name": ITEM_ROWS, "version": 1, "updated_at": now},
+            index_elements=[CacheVersion.name],
+            set_={"version": CacheVersion.version + 1, "updated_at": now},
+        ).returning(CacheVersion.version)
+    ).scalar_one()
+
+
+def stamp_item_versions(db: Session, item_ids) -> int:
+    """
+    Stamp the next item row version on `item_ids`, rows this transaction
+    already wrote. Call as the last statements before commit.
+    """
+    version = next_item_version(db)
+    item_ids = sorted(item_ids)
+    for start in range(0, len(item_ids), 500):
+        db.execute(
+            update(Item)
+            .where(Item.id.in_(item_ids[start:start + 500]))
+            .values(version=version)
+            .execution_options(synchronize_session=False)
+        )
+    return version
+
+
+def item_rows_version(db: Session):
+    """(version, updated_at) of the item row counter; (0, None) before any write."""
+    row = db.execute(
+        select(CacheVersion.version, CacheVersion.updated_at)
+        .where(CacheVersion.name == ITEM_ROWS)
+    ).first()
+    return (row.version, row.updated_at) if row else (0, None)
+
+
+def _db_version(db: Session) -> int:
+    version = db.execute(
+        select(CacheVersion.version).where(CacheVersion.name == CATALOGUE)
+    ).scalar()
+    return version or 0
+
+
+class ItemCache:
+    """
+    id -> ItemSnapshot for the whole catalogue, shared by preview, checkout,
+    listing and search.
+
+    While the catalogue fits in `max_size` it is loaded in one query and
+    listing is served from memory. Bigger catalogues fall back to an LRU
+    of single items and listing goes to the database.
+
+    Freshness: local writers call invalidate() after commit; other
+    workers are noticed through the cache_versions counter, read at most
+    every `check_interval` seconds on read paths and on every call with
+    strict=True (checkout). Stock moves from sales are applied locally
+    with apply_stock_delta(); other workers pick them up at the next
+    reload (at the latest after `max_age` seconds). Checkout never trusts
+    cached stock: the conditional UPDATE in reserve_stock() decides.
+
+    The lock only guards in-memory state and is never held across a
+    query: async routes call in through AsyncSession.run_sync, where a
+    query switches greenlets on the event loop thread.
+    """
+
+    def __init__(self, enabled: bool, max_size: int, check_interval: float, max_age: float):
+        self.enabled = enabled
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self.max_age = max_age
+
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._by_name = None
+        self._complete = False
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    # ---------- freshness ----------
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def _refresh(self, db: Session, strict: bool):
+        now = time.monotonic()
+
+        with self._lock:
+            loaded_version = self._version
+            fresh = (
+                loaded_version is not None
+                and now - self._checked_at < self.check_interval
+                and now - self._loaded_at < self.max_age
+            )
+        if fresh and not strict:
+            return
+
+        version = _db_version(db)
+
+        with self._lock:
+            self._checked_at = now
+            if version == self._version and now - self._loaded_at < self.max_age:
+                return
+
+        rows = db.execute(
+            select(*_COLUMNS).order_by(Item.name).limit(self.max_size + 1)
+        ).all()
+
+        items = OrderedDict()
+        by_name = None
+        complete = len(rows) <= self.max_size
+        if complete:
+            for row in rows:
+                items[row.id] = ItemSnapshot(*row)
+            by_name = [row.id for row in rows]
+        # else: too big to hold, start an empty LRU instead
+
+        with self._lock:
+            self._items = items
+            self._by_name = by_name
+            self._complete = complete
+            self._version = version
+            self._loaded_at = time.monotonic()
+            self.reloads += 1
+
+    # ---------- reads ----------
+
+    def get_many(self, db: Session, item_ids, strict: bool = False) -> dict:
+        """Snapshots for `item_ids` (unknown ids are left out)."""
+        if not self.enabled:
+            rows = db.execute(select(*_COLUMNS).where(Item.id.in_(set(item_ids))))
+            return {row.id: ItemSnapshot(*row) for row in rows}
+
+        self._refresh(db, strict)
+
+        found = {}
+        missing = []
+        with self._lock:
+            for item_id in item_ids:
+                snapshot = self._items.get(item_id)
+                if snapshot is None:
+                    missing.append(item_id)
+                else:
+                    found[item_id] = snapshot
+                    if not self._complete:
+                        self._items.move_to_end(item_id)
+
+            self.hits += len(found)
+            self.misses += len(missing)
+            complete = self._complete
+
+        if missing and not complete:
+            loaded = [
+                ItemSnapshot(*row)
+                for row in db.execute(select(*_COLUMNS).where(Item.id.in_(missing)))
+            ]
+            with self._lock:
+                for snapshot in loaded:
+                    found[snapshot.id] = snapshot
+                    self._items[snapshot.id] = snapshot
+                while len(self._items) > self.max_size:
+                    self._items.popitem(last=False)
+
+        return found
+
+    def all_by_name(self, db: Session) -> Optional[list]:
+        """Whole catalogue ordered by name, or None if it is not cached."""
+        if not self.enabled:
+            return None
+
+        self._refresh(db, strict=False)
+
+        with self._lock:
+            if not self._complete:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return [self._items[item_id] for item_id in self._by_name]
+
+    # ---------- local writes ----------
+
+    def apply_stock_delta(self, sold: dict):
+        """Subtract committed sale quantities (item_id -> qty) from snapshots."""
+        with self._lock:
+            for item_id, qty in sold.items():
+                snapshot = self._items.get(item_id)
+                if snapshot is not None:
+                    self._items[item_id] = snapshot._replace(
+                        quantity=snapshot.quantity - qty
+                    )
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "items": len(self._items),
+                "complete": self._complete,
+                "version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "reloads": self.reloads,
+            }
+
+
+item_cache = ItemCache(
+    enabled=settings.ITEM_CACHE_ENABLED,
+    max_size=settings.ITEM_CACHE_MAX_SIZE,
+    check_interval=settings.ITEM_CACHE_CHECK_INTERVAL,
+    max_age=settings.ITEM_CACHE_MAX_AGE,
+)
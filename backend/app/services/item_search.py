@@ -0,0 +1,199 @@
+import logging
+
+from sqlalchemy import bindparam, column, func, select, table, text # type: ignore
+from sqlalchemy.exc import OperationalError # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.models.item import Item
+from app.services.item_cache import ItemSnapshot, item_cache
+
+logger = logging.getLogger(__name__)
+
+# Set by ensure_item_search_index() once items_fts exists
+_fts_enabled = False
+
+# Same columns, same order, as the cached catalogue's snapshots
+_COLUMNS = [getattr(Item, field) for field in ItemSnapshot._fields]
+
+_items_fts = table("items_fts", column("rowid"), column("rank"))
+
+# bm25 reads the whole doclist of every keyword (for its idf) and then
+# scores each match, so a broad prefix ("de" hitting a word in every
+# dealer name) cannot be bm25-ranked per keystroke, even ANDed with a
+# narrow one. Queries whose keywords match more than RANK_LIMIT items
+# between them take the bounded prefix path instead: SEARCH_WINDOW
+# matches, grown SEARCH_WINDOW_GROWTH-fold only when too few of them
+# are in stock.
+RANK_LIMIT = 1000
+SEARCH_WINDOW = 200
+SEARCH_WINDOW_GROWTH = 8
+
+_window_end = text(
+    "SELECT rowid FROM items_fts WHERE items_fts MATCH :match LIMIT 1 OFFSET :window"
+)
+
+# In-stock matches of :match, built once (per keystroke, building and
+# cloning a select costs as much as running it)
+_matches = (
+    select(*_COLUMNS)
+    .select_from(_items_fts.join(Item, Item.id == _items_fts.c.rowid))
+    .where(text("items_fts MATCH :match"), Item.quantity > 0)
+    .limit(bindparam("limit"))
+)
+# ... ranked by bm25 (the configured `rank`)
+_ranked_matches = _matches.order_by(_items_fts.c.rank, Item.name)
+# ... shortest names first
+_short_matches = _matches.order_by(func.length(Item.name), Item.name)
+# ... below a rowid, a range FTS5 applies while reading the index
+_short_matches_before = _short_matches.where(_items_fts.c.rowid < bindparam("window_end"))
+
+# External-content FTS5 table over items, kept in sync by triggers so
+# every writer (item create/update, purchase upserts, bulk imports, raw
+# SQL) updates the index in the same transaction as the row itself.
+_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        name, category, dealer_name,
+        content='items', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='1 2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, name, category, dealer_name)
+        VALUES (new.id, new.name, new.category, new.dealer_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, category, dealer_name)
+        VALUES ('delete', old.id, old.name, old.category, old.dealer_name);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS items_fts_au
+    AFTER UPDATE OF name, category, dealer_name ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, name, category, dealer_name)
+        VALUES ('delete', old.id, old.name, old.category, old.dealer_name);
+        INSERT INTO items_fts(rowid, name, category, dealer_name)
+        VALUES (new.id, new.name, new.category, new.dealer_name);
+    END
+    """,
+    # ORDER BY rank = bm25 with name weighted over category and dealer
+    """
+    INSERT INTO items_fts(items_fts, rank) VALUES ('rank', 'bm25(10.0, 2.0, 1.0)')
+    """,
+]
+
+
+def ensure_item_search_index(engine) -> bool:
+    """
+    Create items_fts and its triggers if missing (SQLite only) and
+    populate it on first creation. Returns whether FTS search is enabled.
+    """
+    global _fts_enabled
+
+    if engine.dialect.name != "sqlite":
+        _fts_enabled = False
+        return False
+
+    try:
+        with engine.begin() as conn:
+            existed = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'items_fts'"
+            )).first() is not None
+
+            for ddl in _FTS_DDL:
+                conn.execute(text(ddl))
+
+            if not existed:
+                conn.execute(text("INSERT INTO items_fts(items_fts) VALUES ('rebuild')"))
+    except OperationalError:
+        # SQLite built without FTS5
+        logger.warning("FTS5 not available, /items/search uses LIKE filters")
+        _fts_enabled = False
+        return False
+
+    _fts_enabled = True
+    return True
+
+
+def _match_expression(keywords: list, operator: str = " ") -> str:
+    # Every keyword is a quoted prefix term; terms are ANDed (or ORed)
+    return operator.join('"' + word.replace('"', '""') + '"*' for word in keywords)
+
+
+def _prefix_matches(db: Session, match: str, limit: int) -> list:
+    """Bounded search: the first matches by rowid, widened until `limit` are in stock."""
+    window = SEARCH_WINDOW
+    while True:
+        # None: the window already holds every match
+        window_end = db.execute(_window_end, {"match": match, "window": window}).scalar()
+        if window_end is None:
+            rows = db.execute(_short_matches, {"match": match, "limit": limit}).all()
+        else:
+            rows = db.execute(
+                _short_matches_before,
+                {"match": match, "limit": limit, "window_end": window_end},
+            ).all()
+        if len(rows) == limit or window_end is None:
+            return rows
+        window *= SEARCH_WINDOW_GROWTH
+
+
+def _fts_search(db: Session, keywords: list, limit: int) -> list:
+    match = _match_expression(keywords)
+
+    # The union of the keywords' matches is what bm25 would read
+    any_keyword = _match_expression(keywords, " OR ")
+    if db.execute(_window_end, {"match": any_keyword, "window": RANK_LIMIT}).scalar() is None:
+        # Few enough matches to rank all of them
+        rows = db.execute(_ranked_matches, {"match": match, "limit": limit}).all()
+    else:
+        # Broad prefix: items with every keyword in the name first, then
+        # matches on category / dealer
+        rows = _prefix_matches(db, "{name} : (" + match + ")", limit)
+        if len(rows) < limit:
+            seen = {row.id for row in rows}
+            more = _prefix_matches(db, match, limit + len(rows))
+            rows += [row for row in more if row.id not in seen][:limit - len(rows)]
+
+    return [row._asdict() for row in rows]
+
+
+def search(db: Session, q: str, limit: int = 20) -> list:
+    """
+    Checkout typeahead: in-stock items matching every keyword, as
+    ItemSnapshot dicts whichever path answers.
+
+    With FTS5 the index finds the matches and ranks them by bm25 (name
+    weighted over category and dealer). A broad prefix is served from a
+    bounded window of its matches instead, name matches and short names
+    first. Without FTS5, keywords are substring filters on the name, run
+    over the cached catalogue or, if it is not cached, as ILIKE filters.
+    """
+    keywords = q.strip().split()
+
+    if _fts_enabled and keywords:
+        return _fts_search(db, keywords, limit)
+
+    catalogue = item_cache.all_by_name(db)
+
+    if catalogue is not None:
+        words = [word.lower() for word in keywords]
+        results = []
+        for snapshot in catalogue:
+            if snapshot.quantity > 0 and all(w in snapshot.name.lower() for w in words):
+                results.append(snapshot._asdict())
+                if len(results) == limit:
+                    break
+        return results
+
+    query = select(*_COLUMNS).where(Item.quantity > 0)
+
+    for word in keywords:
+        query = query.where(Item.name.ilike(f"%{word}%"))
+
+    rows = db.execute(query.order_by(Item.name.asc()).limit(limit))
+    return [row._asdict() for row in rows]
@@ -1,2 +1,139 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from fastapi import HTTPException # type: ignore
+from sqlalchemy import Float, Numeric, cast, func, literal, select, update # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.models.item import Item
+from app.schemas.item import ItemReprice
+from app.services.item_cache import next_item_version
+
+# Changed items listed in a dry-run response
+REPRICE_PREVIEW_LIMIT = 200
+
+
+_PAISE = Decimal("0.01")
+
+
 def calculate_selling_price(cost_price: float, margin_percent: float) -> float:
-    return round(cost_price + (cost_price * margin_percent / 100), 2)
+    """
+    Cost plus margin, rounded half up to paise the way SQL round() does
+    it (selling_price_expr): on the price's 15 significant digits, so
+    10.125 -> 10.13 and 2.675 -> 2.68 whichever side computes it.
+    """
+    price = cost_price + (cost_price * margin_percent / 100)
+    return float(Decimal(f"{price:.15g}").quantize(_PAISE, rounding=ROUND_HALF_UP))
+
+
+def selling_price_expr(cost_price, margin_percent):
+    """
+    calculate_selling_price as a SQL expression over columns. PostgreSQL
+    only has round(numeric, int), hence the cast; double -> numeric keeps
+    15 significant digits there, and SQLite's round() works the same way.
+    """
+    price = cast(cost_price + (cost_price * margin_percent / 100), Numeric)
+    return func.round(price, 2, type_=Float)
+
+
+def reprice_items(db: Session, data: ItemReprice) -> dict:
+    """
+    Apply a margin and/or cost change to a selection of items in ONE
+    UPDATE, selling prices recomputed by the database.
+
+    With `dry_run` nothing is written; the response counts the matched and
+    changed items and lists the first changes (old → new). Not committed
+    here: the caller bumps the catalogue version and commits.
+    """
+    if data.margin_percent is None and data.cost_delta is None:
+        raise HTTPException(
+            status_code=400, detail="Give margin_percent and/or cost_delta"
+        )
+
+    conditions = []
+    if data.category is not None:
+        conditions.append(Item.category == data.category)
+    if data.dealer_name is not None:
+        conditions.append(Item.dealer_name == data.dealer_name)
+    if data.item_ids is not None:
+        conditions.append(Item.id.in_(data.item_ids))
+
+    if not conditions and not data.all_items:
+        raise HTTPException(
+            status_code=400,
+            detail="Select items by category, dealer_name or item_ids (or set all_items)"
+        )
+
+    new_cost = Item.cost_price
+    if data.cost_delta is not None:
+        new_cost = Item.cost_price + data.cost_delta
+
+    new_margin = Item.margin_percent
+    if data.margin_percent is not None:
+        new_margin = literal(data.margin_percent, Float)
+
+    new_selling = selling_price_expr(new_cost, new_margin)
+
+    if data.cost_delta is not None and data.cost_delta < 0:
+        negative = db.execute(
+            select(func.count()).select_from(Item).where(*conditions, new_cost < 0)
+        ).scalar()
+        if negative:
+            raise HTTPException(
+                status_code=400,
+                detail=f"cost_delta would make the cost of {negative} item(s) negative"
+            )
+
+    if not data.dry_run:
+        result = db.execute(
+            update(Item)
+            .where(*conditions)
+            .values(
+                cost_price=new_cost,
+                margin_percent=new_margin,
+                selling_price=new_selling,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # Version after the rows: the counter stays locked until commit
+        db.execute(
+            update(Item)
+            .where(*conditions)
+            .values(version=next_item_version(db))
+            .execution_options(synchronize_session=False)
+        )
+        return {"message": "Items repriced", "updated": result.rowcount}
+
+    changed = (
+        (new_cost != Item.cost_price)
+        | (new_margin != Item.margin_percent)
+        | (new_selling != Item.selling_price)
+    )
+
+    matched, changed_count = db.execute(
+        select(func.count(), func.count().filter(changed))
+        .select_from(Item)
+        .where(*conditions)
+    ).one()
+
+    rows = db.execute(
+        select(
+            Item.id,
+            Item.name,
+            Item.cost_price,
+            Item.margin_percent,
+            Item.selling_price,
+            new_cost.label("new_cost_price"),
+            new_margin.label("new_margin_percent"),
+            new_selling.label("new_selling_price"),
+        )
+        .where(*conditions, changed)
+        .order_by(Item.id)
+        .limit(REPRICE_PREVIEW_LIMIT)
+    ).mappings().all()
+
+    return {
+        "dry_run": True,
+        "matched": matched,
+        "changed": changed_count,
+        "items": [dict(row) for row in rows],
+    }
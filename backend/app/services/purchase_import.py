@@ -0,0 +1,291 @@
+import csv
+from typing import Iterable, List, TextIO
+
+from fastapi import HTTPException # type: ignore
+from pydantic import ValidationError # type: ignore
+from sqlalchemy import bindparam, insert, select, update # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.models.item import Item
+from app.models.purchase import Purchase
+from app.models.purchase_item import PurchaseItem
+from app.models.supplier import Supplier
+from app.schemas.purchase import PurchaseCreate, PurchaseItemCreate
+from app.services.idempotency import idempotency, request_hash
+from app.services.item_cache import bump_catalogue_version, stamp_item_versions
+
+# Lines resolved / written per round of set-based statements
+BATCH_SIZE = 1000
+
+CSV_COLUMNS = ("item_name", "quantity", "cost_price", "margin_percent")
+
+_items = Item.__table__
+
+# One executemany: price from the last line, stock increased by the sum
+_update_items = (
+    update(_items)
+    .where(_items.c.id == bindparam("b_id"))
+    .values(
+        cost_price=bindparam("b_cost_price"),
+        margin_percent=bindparam("b_margin_percent"),
+        selling_price=bindparam("b_selling_price"),
+        quantity=_items.c.quantity + bindparam("b_quantity"),
+    )
+)
+
+
+def selling_price_for(cost_price: float, margin_percent: float) -> float:
+    # Selling price comes ONLY from cost + margin
+    return cost_price + (cost_price * margin_percent / 100)
+
+
+class PurchaseImport:
+    """
+    Record one supplier invoice with set-based statements.
+
+    Lines are added in batches (`add_lines`); each batch costs one indexed
+    name lookup, one multi-row INSERT for new items, one executemany
+    UPDATE for existing ones and one bulk INSERT of purchase_items, no
+    matter how many lines it holds. Nothing is committed until `finish`,
+    so the whole invoice lands in ONE transaction.
+
+    The result is the same as applying the lines one by one: a name
+    repeated in the invoice adds up its quantities and keeps the prices
+    of its last line.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        supplier_phone: str = None,
+        supplier_name: str = None,
+        supplier_address: str = None,
+    ):
+        self.db = db
+        self.total_amount = 0
+        self.lines = 0
+        self.items_created = 0
+        self.items_updated = 0
+        # Rows this invoice touches; their Item.version is stamped in finish()
+        self.item_ids = set()
+
+        # ---------- Supplier handling ----------
+        supplier = None
+        if supplier_phone:
+            supplier = db.query(Supplier).filter(
+                Supplier.phone == supplier_phone
+            ).first()
+
+            if not supplier:
+                supplier = Supplier(
+                    name=supplier_name or "Unknown",
+                    phone=supplier_phone,
+                    address=supplier_address
+                )
+                db.add(supplier)
+                db.flush()
+
+        # ---------- Create Purchase ----------
+        self.purchase = Purchase(
+            supplier_id=supplier.id if supplier else None,
+            total_amount=0
+        )
+        db.add(self.purchase)
+        db.flush()
+
+    def _resolve(self, names: Iterable[str]) -> dict:
+        """name -> item id, one indexed IN query per chunk of names."""
+        names = list(names)
+        ids = {}
+        for start in range(0, len(names), 500):
+            rows = self.db.execute(
+                select(Item.id, Item.name)
+                .where(Item.name.in_(names[start:start + 500]))
+                .order_by(Item.id.desc())
+            )
+            # Duplicate names in old data → oldest row wins
+            for item_id, name in rows:
+                ids[name] = item_id
+        return ids
+
+    def add_lines(self, lines: List[PurchaseItemCreate]):
+        if not lines:
+            return
+
+        # Per name: summed quantity, prices of the last line
+        merged = {}
+        for p_item in lines:
+            # ⚠️ Margin must be present
+            if p_item.margin_percent is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"margin_percent is required for item '{p_item.item_name}'"
+                )
+
+            if p_item.item_name in merged:
+                merged[p_item.item_name]["quantity"] += p_item.quantity
+            else:
+                merged[p_item.item_name] = {"quantity": p_item.quantity}
+
+            merged[p_item.item_name].update(
+                cost_price=p_item.cost_price,
+                margin_percent=p_item.margin_percent,
+                selling_price=selling_price_for(
+                    p_item.cost_price, p_item.margin_percent
+                ),
+            )
+
+        item_ids = self._resolve(merged)
+
+        # ---------- Update existing items ----------
+        updates = [
+            {
+                "b_id": item_ids[name],
+                "b_cost_price": row["cost_price"],
+                "b_margin_percent": row["margin_percent"],
+                "b_selling_price": row["selling_price"],
+                "b_quantity": row["quantity"],
+            }
+            for name, row in merged.items()
+            if name in item_ids
+        ]
+        if updates:
+            self.db.execute(_update_items, updates)
+
+        # ---------- Create new items ----------
+        new_items = [
+            {"name": name, **row}
+            for name, row in merged.items()
+            if name not in item_ids
+        ]
+        if new_items:
+            created = self.db.execute(
+                insert(Item).returning(Item.id, Item.name), new_items
+            )
+            item_ids.update({name: item_id for item_id, name in created})
+
+        # ---------- Purchase items (bulk insert) ----------
+        purchase_item_rows = []
+        for p_item in lines:
+            line_total = p_item.quantity * p_item.cost_price
+            self.total_amount += line_total
+
+            purchase_item_rows.append({
+                "purchase_id": self.purchase.id,
+                "item_id": item_ids[p_item.item_name],
+                "quantity": p_item.quantity,
+                "cost_price": p_item.cost_price,
+                "margin_percent": p_item.margin_percent,
+                "selling_price": selling_price_for(
+                    p_item.cost_price, p_item.margin_percent
+                ),
+                "line_total": line_total,
+            })
+        self.db.execute(insert(PurchaseItem), purchase_item_rows)
+
+        self.lines += len(lines)
+        self.items_created += len(new_items)
+        self.items_updated += len(updates)
+        self.item_ids.update(item_ids.values())
+
+    def finish(self, idempotency_key: str = None, req_hash: str = None) -> dict:
+        """
+        Write the total, stamp the item and catalogue versions and commit;
+        with an `idempotency_key` the response is stored in the same commit.
+        """
+
+        # ---------- Finalize purchase ----------
+        self.purchase.total_amount = self.total_amount
+        if self.item_ids:
+            stamp_item_versions(self.db, self.item_ids)
+        bump_catalogue_version(self.db)
+
+        result = {
+            "message": "Purchase recorded",
+            "purchase_id": self.purchase.id,
+            "total_amount": self.total_amount,
+            "lines": self.lines,
+            "items_created": self.items_created,
+            "items_updated": self.items_updated,
+        }
+
+        if idempotency_key:
+            replay = idempotency.save(self.db, "purchases", idempotency_key, req_hash, result)
+            if replay is not None:
+                return replay
+
+        self.db.commit()
+
+        if idempotency_key:
+            idempotency.remember("purchases", idempotency_key, req_hash, result)
+
+        return result
+
+
+def import_lines(
+    db: Session,
+    lines: List[PurchaseItemCreate],
+    supplier_phone: str = None,
+    supplier_name: str = None,
+    supplier_address: str = None,
+    idempotency_key: str = None,
+    req_hash: str = None,
+) -> dict:
+    """Record an invoice's lines in BATCH_SIZE batches, one commit."""
+    purchase_import = PurchaseImport(db, supplier_phone, supplier_name, supplier_address)
+    for start in range(0, len(lines), BATCH_SIZE):
+        purchase_import.add_lines(lines[start:start + BATCH_SIZE])
+    return purchase_import.finish(idempotency_key, req_hash)
+
+
+def import_purchase(db: Session, data: PurchaseCreate, idempotency_key: str = None) -> dict:
+    """Record a JSON invoice in BATCH_SIZE batches, one commit."""
+    return import_lines(
+        db,
+        data.items,
+        supplier_phone=data.supplier_phone,
+        supplier_name=data.supplier_name,
+        supplier_address=data.supplier_address,
+        idempotency_key=idempotency_key,
+        req_hash=request_hash(data),
+    )
+
+
+def csv_header(row: List[str]) -> list:
+    """Column names of the CSV header; every CSV_COLUMNS entry is required."""
+    header = [name.strip().lower() for name in row]
+    missing = [name for name in CSV_COLUMNS if name not in header]
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"CSV header is missing: {', '.join(missing)}"
+        )
+    return header
+
+
+def parse_csv(text: TextIO) -> List[PurchaseItemCreate]:
+    """
+    Every item line of a CSV invoice (`text` opened with newline="", so
+    quoted fields may span lines). Bad rows are reported with the line
+    number they start on.
+    """
+    reader = csv.reader(text)
+    header = csv_header(next(reader, []))
+
+    items = []
+    line_no = reader.line_num + 1
+    for row in reader:
+        if any(cell.strip() for cell in row):
+            try:
+                items.append(PurchaseItemCreate(
+                    **{name: cell.strip() for name, cell in zip(header, row)}
+                ))
+            except ValidationError as e:
+                error = e.errors()[0]
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid CSV line {line_no}: "
+                           f"{'.'.join(map(str, error['loc']))} {error['msg']}"
+                )
+        line_no = reader.line_num + 1
+    return items
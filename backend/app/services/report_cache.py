@@ -0,0 +1,150 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from sqlalchemy import event # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.config import settings
+from app.utils.responses import render_json
+
+# A commit writing any of these changes some report
+WATCHED_TABLES = {"sales", "sale_items", "credit_ledger", "purchases", "purchase_items"}
+
+_DIRTY = "report_cache_dirty"
+
+
+class CachedReport(NamedTuple):
+    body: bytes         # rendered JSON
+    etag: str           # strong ETag, quoted
+    expires_at: float   # time.monotonic()
+
+
+class ReportCache:
+    """
+    Rendered report responses keyed by (route, query, local date).
+
+    Entries are dropped when this process commits a sale, payment or
+    purchase (watch_sessions() hooks every Session) and expire after `ttl`
+    seconds regardless, which bounds how stale a report can be after a
+    write by ANOTHER worker or a maintenance command.
+
+    A computation that started before an invalidation is not stored: put()
+    only accepts results for the generation they were computed under.
+    """
+
+    def __init__(self, enabled: bool, ttl: float, max_size: int):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, generation: int, data) -> CachedReport:
+        body = render_json(data)
+        entry = CachedReport(
+            body=body,
+            etag='"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"',
+            expires_at=time.monotonic() + self.ttl,
+        )
+        if not self.enabled:
+            return entry
+
+        with self._lock:
+            if generation == self.generation:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations,
+            }
+
+
+report_cache = ReportCache(
+    enabled=settings.REPORT_CACHE_ENABLED,
+    ttl=settings.REPORT_CACHE_TTL,
+    max_size=settings.REPORT_CACHE_MAX_SIZE,
+)
+
+
+def _watched(table) -> bool:
+    return getattr(table, "name", None) in WATCHED_TABLES
+
+
+def _after_flush(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if _watched(getattr(obj, "__table__", None)):
+            session.info[_DIRTY] = True
+            return
+
+
+def _do_orm_execute(orm_execute_state):
+    # Core-style executemany (sale / purchase lines) never goes through flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        if _watched(getattr(orm_execute_state.statement, "table", None)):
+            orm_execute_state.session.info[_DIRTY] = True
+
+
+def _after_commit(session):
+    if session.info.pop(_DIRTY, False):
+        report_cache.invalidate()
+
+
+def _after_rollback(session):
+    session.info.pop(_DIRTY, None)
+
+
+def watch_sessions():
+    """Invalidate report_cache whenever a Session commits a watched write."""
+    event.listen(Session, "after_flush", _after_flush)
+    event.listen(Session, "do_orm_execute", _do_orm_execute)
+    event.listen(Session, "after_commit", _after_commit)
+    event.listen(Session, "after_rollback", _after_rollback)
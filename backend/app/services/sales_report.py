@@ -0,0 +1,262 @@
+"""
+Sales totals over shop-local calendar ranges.
+
+Sales store `created_at` in UTC (datetime.utcnow). A report for local
+days `date_from`..`date_to` becomes ONE half-open UTC range on the
+indexed created_at column, and one grouped query buckets the rows by
+local day / week (Monday) / month. The local time of each row is
+created_at plus the zone's UTC offset; zones with DST get a CASE over
+the offset changes inside the range, so every bill lands in the right
+bucket.
+
+Ranges in the shop's own zone are read from daily_sales_summary (one
+row per shop-local day, kept by checkout) instead, unless they need
+distinct customers over more than a day.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import NamedTuple, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from fastapi import HTTPException # type: ignore
+from sqlalchemy import Date, case, cast, func, literal, select # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.core.config import settings
+from app.models.daily_sales_summary import DailySalesSummary
+from app.models.sale import Sale
+
+GRANULARITIES = ("day", "week", "month")
+
+# Longest range one request may ask for
+MAX_REPORT_DAYS = 3 * 366
+
+METRICS = ("bills", "gross", "discount", "net", "billed", "credit", "customers")
+
+
+def shop_timezone(name: Optional[str] = None):
+    """`name`, else SHOP_TIMEZONE, else the server's local zone."""
+    name = name or settings.SHOP_TIMEZONE
+    if not name:
+        return datetime.now().astimezone().tzinfo
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone '{name}'")
+
+
+def local_today(tz) -> date:
+    return datetime.now(tz).date()
+
+
+def utc_range(date_from: date, date_to: date, tz):
+    """Local days date_from..date_to (inclusive) as [start, end) naive UTC."""
+    def utc_midnight(day):
+        local = datetime.combine(day, time.min, tzinfo=tz)
+        return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return utc_midnight(date_from), utc_midnight(date_to + timedelta(days=1))
+
+
+def _offset_minutes(tz, utc: datetime) -> int:
+    local = utc.replace(tzinfo=timezone.utc).astimezone(tz)
+    return int(local.utcoffset().total_seconds() // 60)
+
+
+def offset_segments(start: datetime, end: datetime, tz) -> list:
+    """
+    [(until, offset_minutes)] covering [start, end): the zone's UTC
+    offset is `offset_minutes` up to `until`. One entry for zones
+    without DST; offset changes are found to the minute.
+    """
+    segments = []
+    offset = _offset_minutes(tz, start)
+    day_start = start
+    while day_start < end:
+        day_end = min(day_start + timedelta(days=1), end)
+        if _offset_minutes(tz, day_end) != offset:
+            low, high = day_start, day_end
+            while high - low > timedelta(minutes=1):
+                middle = low + (high - low) / 2
+                if _offset_minutes(tz, middle) == offset:
+                    low = middle
+                else:
+                    high = middle
+            segments.append((high, offset))
+            offset = _offset_minutes(tz, high)
+        day_start = day_end
+    segments.append((end, offset))
+    return segments
+
+
+def bucket_expression(db: Session, segments: list, granularity: str):
+    """Local bucket start of Sale.created_at, as 'YYYY-MM-DD' / date."""
+    column = Sale.created_at
+
+    if db.get_bind().dialect.name == "sqlite":
+        if len(segments) == 1:
+            shift = literal(f"{segments[0][1]:+d} minutes")
+        else:
+            shift = case(
+                *[(column < until, f"{offset:+d} minutes") for until, offset in segments[:-1]],
+                else_=f"{segments[-1][1]:+d} minutes",
+            )
+        if granularity == "day":
+            return func.date(column, shift)
+        if granularity == "week":
+            # Next Sunday (or the same day), back 6 days: that week's Monday
+            return func.date(column, shift, "weekday 0", "-6 days")
+        return func.strftime("%Y-%m-01", column, shift)
+
+    if len(segments) == 1:
+        minutes = literal(segments[0][1])
+    else:
+        minutes = case(
+            *[(column < until, offset) for until, offset in segments[:-1]],
+            else_=segments[-1][1],
+        )
+    local = column + func.make_interval(0, 0, 0, 0, 0, minutes)
+    return cast(func.date_trunc(granularity, local), Date)
+
+
+def bucket_start(day: date, granularity: str) -> date:
+    """First day of the day / week (Monday) / month bucket holding `day`."""
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def bucket_starts(date_from: date, date_to: date, granularity: str) -> list:
+    """Every bucket touching date_from..date_to, in order."""
+    starts = []
+    current = bucket_start(date_from, granularity)
+    while current <= date_to:
+        starts.append(current)
+        if granularity == "day":
+            current += timedelta(days=1)
+        elif granularity == "week":
+            current += timedelta(days=7)
+        else:
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return starts
+
+
+def _sales_buckets(
+    db: Session, date_from: date, date_to: date, granularity: str, tz, with_customers: bool
+) -> dict:
+    """bucket start -> METRICS values, one grouped query over the sales rows."""
+    start, end = utc_range(date_from, date_to, tz)
+    bucket = bucket_expression(db, offset_segments(start, end, tz), granularity).label("bucket")
+
+    rows = db.execute(
+        select(
+            bucket,
+            func.count(Sale.id),
+            func.coalesce(func.sum(Sale.total_amount), 0),
+            func.coalesce(func.sum(Sale.total_discount), 0),
+            func.coalesce(func.sum(Sale.final_amount), 0),
+            func.coalesce(func.sum(Sale.rounded_final_amount), 0),
+            func.coalesce(func.sum(case((Sale.due_amount > 0, Sale.due_amount), else_=0)), 0),
+            func.count(func.distinct(Sale.customer_id)) if with_customers else literal(0),
+        )
+        .where(Sale.created_at >= start, Sale.created_at < end)
+        .group_by(bucket)
+    ).all()
+
+    return {str(row[0]): row[1:] for row in rows}
+
+
+def _rollup_buckets(db: Session, date_from: date, date_to: date, granularity: str) -> dict:
+    """bucket start -> METRICS values, summed from daily_sales_summary."""
+    rows = db.execute(
+        select(
+            DailySalesSummary.day,
+            DailySalesSummary.bill_count,
+            DailySalesSummary.gross_amount,
+            DailySalesSummary.discount_amount,
+            DailySalesSummary.net_amount,
+            DailySalesSummary.billed_amount,
+            DailySalesSummary.credit_issued,
+            DailySalesSummary.customers_count,
+        )
+        .where(DailySalesSummary.day >= date_from, DailySalesSummary.day <= date_to)
+    )
+
+    found = {}
+    for day, *values in rows:
+        key = bucket_start(day, granularity).isoformat()
+        found[key] = [a + b for a, b in zip(found.get(key, (0,) * len(METRICS)), values)]
+    return found
+
+
+class SalesReport(NamedTuple):
+    date_from: date
+    date_to: date
+    granularity: str
+    timezone: str
+    buckets: list      # dicts: start + METRICS, zero-filled
+
+    def totals(self) -> dict:
+        # Distinct customers don't add up across buckets
+        return {
+            metric: round(sum(b[metric] for b in self.buckets), 2)
+            for metric in METRICS if metric != "customers"
+        }
+
+
+def sales_report(
+    db: Session,
+    date_from: date,
+    date_to: date,
+    granularity: str = "day",
+    tz_name: Optional[str] = None,
+    with_customers: bool = True,
+) -> SalesReport:
+    """
+    Bucketed sales totals for local days date_from..date_to (inclusive).
+    Without `with_customers` the COUNT(DISTINCT customer_id), about a
+    third of the query's time, is skipped and `customers` reads 0.
+
+    In the shop's zone, day buckets (and any bucket without customers)
+    are sums of daily_sales_summary rows: no sales rows are read.
+    """
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail="granularity must be day, week or month")
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' is before 'from'")
+    if (date_to - date_from).days >= MAX_REPORT_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Report ranges are limited to {MAX_REPORT_DAYS} days"
+        )
+
+    tz = shop_timezone(tz_name)
+    from_rollup = (
+        (tz_name is None or tz_name == settings.SHOP_TIMEZONE)
+        # Distinct customers of several days don't add up
+        and (granularity == "day" or not with_customers)
+    )
+    if from_rollup:
+        found = _rollup_buckets(db, date_from, date_to, granularity)
+    else:
+        found = _sales_buckets(db, date_from, date_to, granularity, tz, with_customers)
+
+    buckets = []
+    for start in bucket_starts(date_from, date_to, granularity):
+        values = found.get(start.isoformat(), (0,) * len(METRICS))
+        entry = {"start": start.isoformat()}
+        for metric, value in zip(METRICS, values):
+            if metric == "customers" and not with_customers:
+                value = 0
+            entry[metric] = value if metric in ("bills", "customers") else round(float(value), 2)
+        buckets.append(entry)
+
+    return SalesReport(
+        date_from=date_from,
+        date_to=date_to,
+        granularity=granularity,
+        timezone=str(tz),
+        buckets=buckets,
+    )
+
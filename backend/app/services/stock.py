@@ -1,2 +1,39 @@
+from sqlalchemy import update # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.models.item import Item
+
+
 def increase_stock(current_qty: int, added_qty: int) -> int:
     return current_qty + added_qty
+
+
+def reserve_stock(db: Session, quantities: dict) -> list:
+    """
+    Atomically take stock for a cart.
+
+    `quantities` maps item_id -> quantity wanted (lines for the same item
+    already summed). Every item is decremented with a conditional UPDATE
+    (`... WHERE quantity >= :qty`), so the check and the write happen in
+    the database and two terminals can never both sell the last unit.
+
+    Returns the item_ids that did not have enough stock. Nothing is
+    committed here; when conflicts are returned the caller must roll back
+    so the successful decrements are undone as well. Otherwise the caller
+    stamps the rows' version just before commit (stamp_item_versions).
+    """
+    conflicts = []
+
+    # Fixed order → concurrent carts lock rows in the same sequence
+    for item_id in sorted(quantities):
+        qty = quantities[item_id]
+        result = db.execute(
+            update(Item)
+            .where(Item.id == item_id, Item.quantity >= qty)
+            .values(quantity=Item.quantity - qty)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            conflicts.append(item_id)
+
+    return conflicts
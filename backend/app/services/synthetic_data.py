@@ -0,0 +1,464 @@
+"""
+Reproducible, production-sized billing data for load and query testing.
+
+    python manage.py generate-data --items 100000 --customers 50000 --sales 5000000
+
+Everything is drawn from one seeded random.Random and the history ends
+on a fixed date (DEFAULT_END_DATE unless --end-date is given), so the
+same counts, seed, end date and timezone always give the same database.
+Shop hours are local to that timezone and stored as naive UTC, like the
+app's own timestamps. Shapes worth testing against:
+
+- item popularity is Zipfian: a few hundred items carry most lines,
+  the long tail sells a handful of times
+- customers are Zipfian too (regulars), a third of bills are walk-ins
+- dates follow a yearly season (festival months Oct-Nov), a weekly
+  cycle, shop hours and a growth trend, so the newest days are busiest
+- a credit mix: full-credit and part-paid bills with ledger entries,
+  most of them paid back in instalments weeks later
+
+Rows go in with Core executemany in BATCH_SIZE chunks, committed per
+chunk; the rollups (daily_sales_summary, customer_stats,
+customer_balances) are built once at the end from the raw tables.
+"""
+import itertools
+import math
+import random
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+
+from fastapi import HTTPException # type: ignore
+from sqlalchemy import func, insert, select # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+from app.models.credit_ledger import CreditLedger
+from app.models.customer import Customer
+from app.models.customer_balance import CustomerBalance
+from app.models.item import Item
+from app.models.purchase import Purchase
+from app.models.purchase_item import PurchaseItem
+from app.models.sale import Sale
+from app.models.sale_item import SaleItem
+from app.models.supplier import Supplier
+from app.services.billing import calculate_final_price
+from app.services.customer_stats import backfill_customer_stats
+from app.services.daily_sales import backfill_daily_sales
+from app.services.item_cache import bump_catalogue_version
+from app.services.purchase_import import selling_price_for
+
+BATCH_SIZE = 20_000
+
+# Last day of the generated history unless one is given
+DEFAULT_END_DATE = date(2026, 9, 30)
+
+CATEGORIES = {
+    "Grocery": ["Rice", "Basmati Rice", "Wheat Flour", "Maida", "Sugar", "Salt", "Lentils", "Chickpeas", "Soybean Chunks", "Beaten Rice"],
+    "Oil & Ghee": ["Mustard Oil", "Sunflower Oil", "Soybean Oil", "Ghee", "Vanaspati"],
+    "Spices": ["Turmeric", "Chilli Powder", "Cumin", "Coriander Powder", "Garam Masala", "Black Pepper", "Cardamom", "Cloves"],
+    "Beverages": ["Tea", "Green Tea", "Coffee", "Juice", "Soft Drink", "Energy Drink", "Mineral Water"],
+    "Snacks": ["Noodles", "Biscuits", "Chips", "Cookies", "Namkeen", "Chocolate", "Cake"],
+    "Dairy": ["Milk Powder", "Butter", "Paneer", "Cheese", "Curd"],
+    "Personal Care": ["Soap", "Shampoo", "Toothpaste", "Toothbrush", "Face Wash", "Hair Oil", "Body Lotion"],
+    "Household": ["Detergent Powder", "Dish Wash Bar", "Floor Cleaner", "Toilet Cleaner", "Mosquito Coil", "Candles", "Matchbox"],
+}
+BRANDS = ["Himalayan", "Everest", "Gorkha", "Annapurna", "Sagarmatha", "Kanchan", "Ganesh", "Laxmi", "Shree", "Tara", "Surya", "Nava", "Bhrikuti", "Mero", "Jyoti"]
+SIZES = ["100g", "200g", "250g", "500g", "1kg", "2kg", "5kg", "25kg", "200ml", "500ml", "1L", "5L"]
+MARGINS = [5.0, 8.0, 10.0, 12.5, 15.0, 20.0, 25.0]
+
+FIRST_NAMES = ["Aarav", "Aasha", "Anil", "Anita", "Bibek", "Bimala", "Deepak", "Gita", "Hari", "Kabita", "Krishna", "Laxmi", "Manish", "Maya", "Nabin", "Nirmala", "Prakash", "Pooja", "Rajesh", "Rita", "Sagar", "Sarita", "Suman", "Sunita", "Ramesh", "Sita", "Bikash", "Puja", "Dinesh", "Kamala"]
+LAST_NAMES = ["Shrestha", "Sharma", "Adhikari", "Thapa", "Gurung", "Tamang", "Rai", "Magar", "Karki", "Basnet", "Poudel", "Khadka", "Bhandari", "KC", "Maharjan", "Joshi", "Limbu", "Pandey"]
+TOWNS = ["Kathmandu", "Lalitpur", "Bhaktapur", "Pokhara", "Butwal", "Bharatpur", "Biratnagar", "Birgunj", "Dharan", "Hetauda", "Nepalgunj", "Itahari"]
+
+# Relative sales volume by month (Dashain / Tihar in Oct-Nov), weekday
+# (Mon..Sun) and hour of day
+MONTH_WEIGHTS = [0.9, 0.85, 1.0, 1.05, 1.0, 0.9, 0.85, 0.95, 1.1, 1.5, 1.4, 1.05]
+WEEKDAY_WEIGHTS = [1.0, 0.95, 0.95, 1.0, 1.1, 1.3, 0.75]
+HOUR_WEIGHTS = {8: 2, 9: 4, 10: 7, 11: 9, 12: 8, 13: 6, 14: 5, 15: 5, 16: 6, 17: 8, 18: 9, 19: 7, 20: 3}
+_HOURS = list(HOUR_WEIGHTS)
+_HOUR_CUM_WEIGHTS = list(itertools.accumulate(HOUR_WEIGHTS.values()))
+YEARLY_GROWTH = 0.15
+
+# Units per line and line discounts, most lines undiscounted singles
+_QUANTITIES = (1, 2, 3, 4, 5, 10)
+_QUANTITY_CUM_WEIGHTS = list(itertools.accumulate((50, 22, 10, 6, 8, 4)))
+_DISCOUNTS = (0, 2, 5, 10)
+_DISCOUNT_CUM_WEIGHTS = list(itertools.accumulate((75, 8, 12, 5)))
+
+
+def zipf_cum_weights(n: int, exponent: float) -> list:
+    """Cumulative weights of ranks 1..n under Zipf(exponent), for rng.choices."""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, n + 1)))
+
+
+def day_weights(first_day: date, days: int) -> list:
+    weights = []
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        trend = (1 + YEARLY_GROWTH) ** (offset / 365)
+        weights.append(MONTH_WEIGHTS[day.month - 1] * WEEKDAY_WEIGHTS[day.weekday()] * trend)
+    return weights
+
+
+def daily_counts(total: int, weights: list) -> list:
+    """Split `total` over days in proportion to `weights`, summing exactly."""
+    scale = total / sum(weights)
+    counts, carried, emitted = [], 0.0, 0
+    for weight in weights:
+        carried += weight * scale
+        count = int(round(carried)) - emitted
+        counts.append(count)
+        emitted += count
+    return counts
+
+
+class SyntheticData:
+    """One generation run; call the steps in order or just `run()`."""
+
+    def __init__(
+        self,
+        db: Session,
+        items: int,
+        customers: int,
+        suppliers: int,
+        purchases: int,
+        sales: int,
+        days: int = 730,
+        seed: int = 42,
+        end_date: date = DEFAULT_END_DATE,
+        tz: tzinfo = timezone.utc,
+        progress=print,
+    ):
+        self.db = db
+        self.counts = {
+            "items": items,
+            "customers": customers,
+            "suppliers": suppliers,
+            "purchases": purchases,
+            "sales": sales,
+        }
+        self.days = days
+        self.rng = random.Random(seed)
+        self.progress = progress
+
+        self.tz = tz
+        self.first_day = end_date - timedelta(days=days - 1)
+        # End of the last local day: nothing is dated after it
+        self.until = self._utc(end_date + timedelta(days=1), 0)
+
+        # Filled by generate_items / generate_customers
+        self.item_prices = []                  # index = item id - 1
+        self.item_ids_by_popularity = []
+        self.item_cum_weights = []
+        self.customer_ids_by_popularity = []
+        self.customer_cum_weights = []
+
+        # Ledger events (when, customer_id, entry_type, amount, sale_id)
+        self.credit_events = []
+
+    # -----------------------------------------------------------------
+    def check_empty(self):
+        for model in (Item, Customer, Sale, Purchase, Supplier):
+            if self.db.execute(select(func.count()).select_from(model)).scalar():
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{model.__tablename__} already has rows; "
+                           "generate into an empty database",
+                )
+
+    def _insert(self, model, rows):
+        if rows:
+            # Table, not the mapped class: plain executemany, no ORM bulk path
+            self.db.execute(insert(model.__table__), rows)
+            self.db.commit()
+            rows.clear()
+
+    def _utc(self, day: date, hour: int, seconds: int = 0) -> datetime:
+        """Local wall-clock time on `day` as the naive UTC the app stores."""
+        local = datetime.combine(day, time(hour), tzinfo=self.tz) + timedelta(seconds=seconds)
+        return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+    def _timestamp(self, day: date) -> datetime:
+        hour = self.rng.choices(_HOURS, cum_weights=_HOUR_CUM_WEIGHTS)[0]
+        return self._utc(day, hour, self.rng.randrange(3600))
+
+    # -----------------------------------------------------------------
+    def generate_items(self):
+        rng = self.rng
+        products = [
+            (category, product) for category, names in CATEGORIES.items() for product in names
+        ]
+        combos = [
+            (category, f"{brand} {product} {size}")
+            for category, product in products
+            for brand in BRANDS
+            for size in SIZES
+        ]
+        rng.shuffle(combos)
+
+        rows = []
+        for n in range(self.counts["items"]):
+            category, name = combos[n % len(combos)]
+            variant = n // len(combos)
+            cost = round(min(max(math.exp(rng.gauss(4.5, 1.0)), 5.0), 20_000.0), 2)
+            margin = rng.choice(MARGINS)
+            selling_price = round(selling_price_for(cost, margin), 2)
+            self.item_prices.append(selling_price)
+
+            rows.append({
+                "id": n + 1,
+                "name": f"{name} v{variant + 1}" if variant else name,
+                "category": category,
+                "dealer_name": f"{rng.choice(TOWNS)} Distributors",
+                "cost_price": cost,
+                "margin_percent": margin,
+                "selling_price": selling_price,
+                # Mostly stocked, a tail of low-stock items
+                "quantity": rng.randint(0, 10) if rng.random() < 0.05 else rng.randint(20, 2_000),
+                "created_at": self._utc(self.first_day, 9),
+            })
+            if len(rows) == BATCH_SIZE:
+                self._insert(Item, rows)
+        self._insert(Item, rows)
+
+        self.item_ids_by_popularity = list(range(1, self.counts["items"] + 1))
+        rng.shuffle(self.item_ids_by_popularity)
+        self.item_cum_weights = zipf_cum_weights(self.counts["items"], 1.07)
+        self.progress(f"items: {self.counts['items']}")
+
+    def generate_customers(self):
+        rng = self.rng
+        rows = []
+        for n in range(self.counts["customers"]):
+            rows.append({
+                "id": n + 1,
+                "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                "phone": f"98{n:08d}",
+                "address": rng.choice(TOWNS) if rng.random() < 0.6 else None,
+            })
+            if len(rows) == BATCH_SIZE:
+                self._insert(Customer, rows)
+        self._insert(Customer, rows)
+
+        self.customer_ids_by_popularity = list(range(1, self.counts["customers"] + 1))
+        rng.shuffle(self.customer_ids_by_popularity)
+        self.customer_cum_weights = zipf_cum_weights(self.counts["customers"], 0.8)
+        self.progress(f"customers: {self.counts['customers']}")
+
+    def generate_purchases(self):
+        rng = self.rng
+        suppliers = [
+            {
+                "id": n + 1,
+                "name": f"{rng.choice(BRANDS)} {rng.choice(['Traders', 'Suppliers', 'Wholesale', 'Distributors'])}",
+                "phone": f"01{n:08d}",
+                "address": rng.choice(TOWNS),
+            }
+            for n in range(self.counts["suppliers"])
+        ]
+        self._insert(Supplier, suppliers)
+
+        item_count = self.counts["items"]
+        days = daily_counts(self.counts["purchases"], [1.0] * self.days)
+        purchases, lines = [], []
+        purchase_id = line_id = 0
+
+        for offset, count in enumerate(days):
+            day = self.first_day + timedelta(days=offset)
+            for _ in range(count):
+                purchase_id += 1
+                total = 0.0
+                for item_id in set(rng.choices(
+                    self.item_ids_by_popularity, cum_weights=self.item_cum_weights,
+                    k=rng.randint(5, 40),
+                )):
+                    line_id += 1
+                    cost = round(self.item_prices[item_id - 1] / 1.15 * rng.uniform(0.95, 1.05), 2)
+                    margin = rng.choice(MARGINS)
+                    quantity = rng.choice((10, 12, 20, 24, 25, 50, 100))
+                    total += quantity * cost
+                    lines.append({
+                        "id": line_id,
+                        "purchase_id": purchase_id,
+                        "item_id": item_id,
+                        "quantity": quantity,
+                        "cost_price": cost,
+                        "margin_percent": margin,
+                        "selling_price": selling_price_for(cost, margin),
+                        "line_total": quantity * cost,
+                    })
+                purchases.append({
+                    "id": purchase_id,
+                    "supplier_id": rng.randint(1, self.counts["suppliers"]) if suppliers else None,
+                    "total_amount": round(total, 2),
+                    "created_at": self._timestamp(day),
+                })
+
+                if len(lines) >= BATCH_SIZE:
+                    self._insert(Purchase, purchases)
+                    self._insert(PurchaseItem, lines)
+        self._insert(Purchase, purchases)
+        self._insert(PurchaseItem, lines)
+        self.progress(f"purchases: {purchase_id} ({line_id} lines) from {len(suppliers)} suppliers")
+
+    def _sale_lines(self, sale_id: int, line_count: int, custom_price: bool):
+        rng = self.rng
+        # A cart holds each item once (ints iterate in a fixed order)
+        item_ids = set(rng.choices(
+            self.item_ids_by_popularity, cum_weights=self.item_cum_weights, k=line_count,
+        ))
+        quantities = rng.choices(_QUANTITIES, cum_weights=_QUANTITY_CUM_WEIGHTS, k=len(item_ids))
+        discounts = rng.choices(_DISCOUNTS, cum_weights=_DISCOUNT_CUM_WEIGHTS, k=len(item_ids))
+
+        lines = []
+        total = discount = 0.0
+        for item_id, quantity, discount_percent in zip(item_ids, quantities, discounts):
+            price = self.item_prices[item_id - 1]
+            if custom_price:
+                price = round(price * rng.uniform(0.9, 1.1), 2)
+            line_total, line_discount, final_price = calculate_final_price(
+                price, quantity, discount_percent
+            )
+            total += line_total
+            discount += line_discount
+            lines.append({
+                "sale_id": sale_id,
+                "item_id": item_id,
+                "quantity": quantity,
+                "price": price,
+                "discount_percent": discount_percent,
+                "line_total": line_total,
+                "final_price": final_price,
+            })
+        return lines, total, discount
+
+    def generate_sales(self):
+        rng = self.rng
+        sales, lines = [], []
+        sale_id = 0
+        customer_count = self.counts["customers"]
+
+        counts = daily_counts(self.counts["sales"], day_weights(self.first_day, self.days))
+        for offset, count in enumerate(counts):
+            day = self.first_day + timedelta(days=offset)
+            stamps = sorted(self._timestamp(day) for _ in range(count))
+
+            for created_at in stamps:
+                sale_id += 1
+                kind = rng.random()
+                sale_type = "random" if kind < 0.03 else "manual" if kind < 0.05 else "normal"
+
+                customer_id = None
+                if sale_type != "random" and customer_count and rng.random() > 0.33:
+                    customer_id = rng.choices(
+                        self.customer_ids_by_popularity, cum_weights=self.customer_cum_weights,
+                    )[0]
+
+                sale_lines, total, discount = self._sale_lines(
+                    sale_id,
+                    min(1 + int(rng.expovariate(1 / 2.5)), 30),
+                    custom_price=sale_type != "normal",
+                )
+                lines.extend(sale_lines)
+                final = total - discount
+                rounded = round(final, 2)
+
+                # Credit mix: full credit, part paid, paid in full
+                mode = rng.random()
+                if customer_id and mode < 0.12:
+                    payment_mode, amount_paid = "credit", 0
+                elif customer_id and mode < 0.20:
+                    payment_mode = "cash"
+                    amount_paid = round(rounded * rng.choice((0.25, 0.5, 0.75)), 2)
+                else:
+                    payment_mode = "online" if rng.random() < 0.3 else "cash"
+                    amount_paid = rounded
+                due = round(rounded - amount_paid, 2)
+
+                sales.append({
+                    "id": sale_id,
+                    "customer_id": customer_id,
+                    "total_amount": total,
+                    "total_discount": discount,
+                    "final_amount": final,
+                    "rounded_final_amount": rounded,
+                    "payment_mode": payment_mode,
+                    "amount_paid": amount_paid,
+                    "due_amount": due,
+                    "is_manual": 1 if sale_type == "manual" else 0,
+                    "sale_type": sale_type,
+                    "manual_date": created_at if sale_type == "manual" else None,
+                    "created_at": created_at,
+                })
+
+                if due > 0:
+                    self.credit_events.append((created_at, customer_id, "credit", due, sale_id))
+                    self._schedule_payments(created_at, customer_id, due)
+
+                if len(lines) >= BATCH_SIZE:
+                    self._insert(Sale, sales)
+                    self._insert(SaleItem, lines)
+
+            if offset % 30 == 29:
+                self.progress(f"sales: {sale_id} through {day}")
+        self._insert(Sale, sales)
+        self._insert(SaleItem, lines)
+        self.progress(f"sales: {sale_id}")
+
+    def _schedule_payments(self, sold_at: datetime, customer_id: int, due: float):
+        # Most credit is repaid in one to three instalments within ~2 months
+        rng = self.rng
+        if rng.random() < 0.15:
+            return
+        remaining = due
+        paid_at = sold_at
+        for _ in range(rng.randint(1, 3)):
+            paid_at += timedelta(days=rng.uniform(3, 25), seconds=rng.randrange(36_000))
+            if paid_at > self.until or remaining <= 0:
+                return
+            amount = remaining if rng.random() < 0.5 else round(remaining * rng.uniform(0.3, 0.8), 2)
+            remaining = round(remaining - amount, 2)
+            self.credit_events.append((paid_at, customer_id, "debit", amount, None))
+
+    def generate_ledger(self):
+        """credit_ledger in time order with running balances, then customer_balances."""
+        self.credit_events.sort(key=lambda e: (e[0], e[2] == "debit"))
+        balances = {}
+        rows = []
+        for created_at, customer_id, entry_type, amount, sale_id in self.credit_events:
+            balance = balances.get(customer_id, 0.0)
+            balance = round(balance + amount if entry_type == "credit" else balance - amount, 2)
+            balances[customer_id] = balance
+            rows.append({
+                "customer_id": customer_id,
+                "entry_type": entry_type,
+                "amount": amount,
+                "balance_after": balance,
+                "reference_type": "sale" if entry_type == "credit" else "payment",
+                "reference_id": sale_id,
+                "created_at": created_at,
+            })
+            if len(rows) == BATCH_SIZE:
+                self._insert(CreditLedger, rows)
+        self._insert(CreditLedger, rows)
+
+        self._insert(CustomerBalance, [
+            {"customer_id": customer_id, "balance": balance, "updated_at": self.until}
+            for customer_id, balance in balances.items()
+        ])
+        self.progress(f"credit ledger: {len(self.credit_events)} entries, {len(balances)} balances")
+        self.credit_events = []
+
+    def build_rollups(self):
+        days = backfill_daily_sales(self.db)
+        customers = backfill_customer_stats(self.db)
+        bump_catalogue_version(self.db)
+        self.db.commit()
+        self.progress(f"rollups: {days} days, {customers} customers")
+
+    def run(self):
+        self.check_empty()
+        self.generate_items()
+        self.generate_customers()
+        self.generate_purchases()
+        self.generate_sales()
+        self.generate_ledger()
+        self.build_rollups()
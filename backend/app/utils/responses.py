@@ -0,0 +1,76 @@
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder # type: ignore
+from fastapi.responses import JSONResponse # type: ignore
+
+try:
+    import orjson # type: ignore
+except ImportError:  # optional: the stdlib encoder is used without it
+    orjson = None
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def render_json(data) -> bytes:
+    """
+    Compact UTF-8 JSON, as FastAPI's JSONResponse would send it. With
+    orjson, dicts / lists / str / numbers / datetimes are encoded
+    natively and anything else (ORM objects, Decimal, NamedTuple) goes
+    through jsonable_encoder.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=jsonable_encoder, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        jsonable_encoder(data),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered by render_json. Returned directly from a route
+    it also skips FastAPI's jsonable_encoder pass over the result, so
+    list endpoints hand it plain dicts of column values.
+    """
+
+    def render(self, content) -> bytes:
+        return render_json(content)
+
+
+def etag_matches(if_none_match: str, *etags: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 asks for GET)."""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate in etags:
+            return True
+    return False
+
+
+def http_date(moment: datetime) -> str:
+    """Naive UTC datetime -> IMF-fixdate for Last-Modified."""
+    return format_datetime(moment.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def modified_since(if_modified_since: str, last_modified: Optional[datetime]) -> bool:
+    """False when If-Modified-Since covers `last_modified` (naive UTC)."""
+    if last_modified is None:
+        return True
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return True
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole seconds
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) > since
@@ -0,0 +1,30 @@
+from sqlalchemy.dialects.postgresql import insert as pg_insert # type: ignore
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert # type: ignore
+from sqlalchemy.orm import Session # type: ignore
+
+
+def upsert(db: Session, model, values: dict, index_elements: list, set_: dict):
+    """
+    INSERT ... ON CONFLICT (index_elements) DO UPDATE SET set_
+
+    Works on SQLite and PostgreSQL. `set_` values may reference the
+    existing row through the model columns, e.g. {"n": Model.n + 1}.
+    Returns the statement so callers can add .returning(...).
+    """
+    dialect = db.get_bind().dialect.name
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+
+    return insert(model).values(**values).on_conflict_do_update(
+        index_elements=index_elements,
+        set_=set_,
+    )
+
+
+def insert_ignore(db: Session, model, values: dict, index_elements: list):
+    """INSERT ... ON CONFLICT (index_elements) DO NOTHING"""
+    dialect = db.get_bind().dialect.name
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+
+    return insert(model).values(**values).on_conflict_do_nothing(
+        index_elements=index_elements,
+    )
@@ -1,19 +1,13 @@
-import shutil
-from datetime import datetime
-import os
+"""
+Kept for existing scheduled tasks; same as `python manage.py backup`.
 
-DB_FILE = "billing.db"
-BACKUP_DIR = "backups"
+Uses the SQLite online backup API (app/services/backup.py) instead of
+copying billing.db while the app may be writing to it.
+"""
+import sys
 
-def backup_database():
-    if not os.path.exists(BACKUP_DIR):
-        os.makedirs(BACKUP_DIR)
-
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    backup_file = f"{BACKUP_DIR}/billing_backup_{timestamp}.db"
-
-    shutil.copy(DB_FILE, backup_file)
-    print(f"Backup created: {backup_file}")
+import manage
 
 if __name__ == "__main__":
-    backup_database()
+    sys.argv = [sys.argv[0], "backup", *sys.argv[1:]]
+    manage.main()
@@ -0,0 +1,70 @@
+"""Statements and commits (fsync points) per POST /sales/ call.
+
+Runs the checkout service behind POST /sales/ with carts of different
+sizes and prints how many SQL statements and commits each bill costs.
+
+    python -m benchmarks.checkout --sales 200 --lines 1 5 20
+"""
+import argparse
+import random
+import time
+
+from app.services.checkout import checkout
+from app.schemas.sale import SaleCreate
+from benchmarks.common import (
+    QueryCounter, seed_customers, seed_items, session_scope, temp_database,
+)
+
+
+def run(sales, lines, items=500, customers=50, seed=1):
+    engine, SessionLocal = temp_database("checkout")
+    seed_items(SessionLocal, items)
+    seed_customers(SessionLocal, customers)
+    rng = random.Random(seed)
+
+    carts = []
+    for n in range(sales):
+        credit = n % 4 == 0
+        carts.append(SaleCreate(
+            customer_phone=f"98{rng.randrange(customers):08d}",
+            payment_mode="credit" if credit else "cash",
+            amount_paid=0 if credit else 1_000_000,
+            items=[
+                {"item_id": item_id, "quantity": 1, "discount_percent": 2}
+                for item_id in rng.sample(range(1, items + 1), lines)
+            ],
+        ))
+
+    start = time.perf_counter()
+    with QueryCounter(engine) as counter:
+        for cart in carts:
+            with session_scope(SessionLocal) as db:
+                checkout(db, cart)
+    elapsed = time.perf_counter() - start
+
+    engine.dispose()
+    return {
+        "lines": lines,
+        "statements_per_sale": counter.statements / sales,
+        "commits_per_sale": counter.commits / sales,
+        "sales_per_sec": sales / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=200)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 5, 20])
+    args = parser.parse_args()
+
+    print(f"{'lines':>6} {'stmts/sale':>11} {'commits/sale':>13} {'sales/s':>9}")
+    for lines in args.lines:
+        r = run(args.sales, lines)
+        print(
+            f"{r['lines']:>6} {r['statements_per_sale']:>11.1f} "
+            f"{r['commits_per_sale']:>13.2f} {r['sales_per_sec']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
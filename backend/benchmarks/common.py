@@ -0,0 +1,165 @@
+"""Shared helpers for the benchmark scripts.
+
+Every benchmark runs against a throw-away SQLite file so the real
+``billing.db`` is never touched. Run the scripts from the ``backend``
+directory, e.g. ``python -m benchmarks.checkout``.
+"""
+import os
+import random
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert # type: ignore
+from sqlalchemy.orm import sessionmaker # type: ignore
+
+from app.core.database import Base, create_db_engine
+import app.models  # noqa: F401  (registers the models on Base)
+from app.models.item import Item
+from app.models.customer import Customer
+from app.models.sale import Sale
+from app.models.sale_item import SaleItem
+from app.services.customer_stats import backfill_customer_stats
+from app.services.daily_sales import backfill_daily_sales
+
+
+def temp_database(prefix="bench", **pragma_overrides):
+    """Create an empty database in a temp dir and return (engine, SessionLocal).
+
+    The engine is built like the app's, so settings and SQLite pragmas
+    apply; keyword arguments override single pragmas.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix=f"{prefix}_"), "billing.db")
+    engine = create_db_engine(f"sqlite:///{path}", **pragma_overrides)
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return engine, SessionLocal
+
+
+class QueryCounter:
+    """Counts SQL statements and commits issued on an engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = 0
+        self.commits = 0
+
+    def _on_execute(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        event.listen(self.engine, "commit", self._on_commit)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+        event.remove(self.engine, "commit", self._on_commit)
+
+
+@contextmanager
+def session_scope(SessionLocal):
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def seed_items(SessionLocal, count, quantity=1_000_000, seed=42):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        cost = round(rng.uniform(5, 500), 2)
+        rows.append({
+            "name": f"Item {i:06d}",
+            "category": f"Category {i % 20}",
+            "dealer_name": f"Dealer {i % 50}",
+            "cost_price": cost,
+            "margin_percent": 10.0,
+            "selling_price": round(cost * 1.1, 2),
+            "quantity": quantity,
+        })
+    with session_scope(SessionLocal) as db:
+        db.execute(insert(Item), rows)
+        db.commit()
+
+
+def seed_customers(SessionLocal, count):
+    rows = [
+        {"name": f"Customer {i}", "phone": f"98{i:08d}", "address": None}
+        for i in range(count)
+    ]
+    with session_scope(SessionLocal) as db:
+        db.execute(insert(Customer), rows)
+        db.commit()
+
+
+def seed_sales(SessionLocal, count, items, customers, days=90, seed=7, batch=5_000):
+    """Bulk-insert `count` sales of 1-5 lines over the last `days` days.
+
+    A third are walk-ins, credit sales leave the whole bill due; the
+    daily_sales_summary and customer_stats rollups are rebuilt afterwards
+    so the dashboards and customer summary see the history.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    sales, lines = [], []
+
+    def flush(db):
+        db.execute(insert(Sale), sales)
+        db.execute(insert(SaleItem), lines)
+        sales.clear()
+        lines.clear()
+
+    with session_scope(SessionLocal) as db:
+        for sale_id in range(1, count + 1):
+            total = discount = 0.0
+            for _ in range(rng.randint(1, 5)):
+                quantity = rng.randint(1, 4)
+                price = round(rng.uniform(5, 550), 2)
+                discount_percent = rng.choice((0, 0, 0, 5, 10))
+                line_total = quantity * price
+                final_price = round(line_total * (1 - discount_percent / 100), 2)
+                total += line_total
+                discount += line_total - final_price
+                lines.append({
+                    "sale_id": sale_id,
+                    "item_id": rng.randint(1, items),
+                    "quantity": quantity,
+                    "price": price,
+                    "discount_percent": discount_percent,
+                    "line_total": line_total,
+                    "final_price": final_price,
+                })
+
+            customer_id = rng.randint(1, customers) if customers and rng.random() > 0.33 else None
+            payment_mode = rng.choice(("cash", "online", "credit") if customer_id else ("cash", "online"))
+            final = round(total - discount, 2)
+            rounded = float(round(final))
+            sales.append({
+                "id": sale_id,
+                "customer_id": customer_id,
+                "total_amount": round(total, 2),
+                "total_discount": round(discount, 2),
+                "final_amount": final,
+                "rounded_final_amount": rounded,
+                "payment_mode": payment_mode,
+                "amount_paid": 0 if payment_mode == "credit" else rounded,
+                "due_amount": rounded if payment_mode == "credit" else 0,
+                "is_manual": 0,
+                "sale_type": "normal",
+                "created_at": now - timedelta(seconds=rng.uniform(0, days * 86400)),
+            })
+
+            if len(sales) == batch:
+                flush(db)
+        if sales:
+            flush(db)
+
+        backfill_daily_sales(db)
+        backfill_customer_stats(db)
+        db.commit()
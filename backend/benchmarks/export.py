@@ -0,0 +1,105 @@
+"""Peak RSS and rows/sec of the sales CSV export.
+
+Seeds N sales, then exports them in a fresh child process per mode so
+each peak-RSS reading only covers that export:
+
+- legacy:   ORM query(Sale).all(), as /reports/export/sales used to do
+- stream:   iter_sales_csv (server-side cursor, yield_per chunks)
+- gzip:     iter_sales_csv piped through gzip_chunks
+
+    python -m benchmarks.export --sales 1000000
+
+Peak RSS also counts SQLite's page cache and memory-mapped database
+pages, which are capped by SQLITE_CACHE_SIZE_KB / SQLITE_MMAP_SIZE; run
+with SQLITE_MMAP_SIZE=0 SQLITE_CACHE_SIZE_KB=2000 to see the export's
+own footprint.
+"""
+import argparse
+import multiprocessing
+import random
+import resource
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert # type: ignore
+
+from app.models.sale import Sale
+from benchmarks.common import session_scope, temp_database
+
+
+def seed_sales(SessionLocal, count, chunk=20_000, seed=5):
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    with session_scope(SessionLocal) as db:
+        for offset in range(0, count, chunk):
+            rows = []
+            for n in range(offset, min(offset + chunk, count)):
+                total = round(rng.uniform(10, 5000), 2)
+                rows.append({
+                    "total_amount": total,
+                    "total_discount": 0.0,
+                    "final_amount": total,
+                    "rounded_final_amount": total,
+                    "payment_mode": "cash",
+                    "amount_paid": total,
+                    "due_amount": 0.0,
+                    "sale_type": "normal",
+                    "created_at": start + timedelta(minutes=n),
+                })
+            db.execute(insert(Sale), rows)
+        db.commit()
+
+
+def _export(url, mode, queue):
+    from app.core.database import create_db_engine
+    from sqlalchemy.orm import sessionmaker # type: ignore
+    from app.services.export import gzip_chunks, iter_sales_csv
+
+    SessionLocal = sessionmaker(bind=create_db_engine(url))
+    start = time.perf_counter()
+    out_bytes = 0
+
+    with session_scope(SessionLocal) as db:
+        if mode == "legacy":
+            for s in db.query(Sale).all():
+                out_bytes += len(
+                    f"{s.id},{s.total_amount},{s.total_discount},{s.final_amount},{s.created_at}\n"
+                )
+        elif mode == "stream":
+            for chunk in iter_sales_csv(db):
+                out_bytes += len(chunk)
+        else:
+            for chunk in gzip_chunks(iter_sales_csv(db)):
+                out_bytes += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KiB on Linux
+    queue.put((elapsed, peak_rss / 1024, out_bytes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sales", type=int, default=200_000)
+    args = parser.parse_args()
+
+    engine, SessionLocal = temp_database("export")
+    seed_sales(SessionLocal, args.sales)
+    url = str(engine.url)
+    engine.dispose()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'mode':>7} {'rows/s':>10} {'peak RSS MB':>12} {'output MB':>10}")
+    for mode in ["legacy", "stream", "gzip"]:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_export, args=(url, mode, queue))
+        proc.start()
+        elapsed, rss_mb, out_bytes = queue.get()
+        proc.join()
+        print(
+            f"{mode:>7} {args.sales / elapsed:>10.0f} {rss_mb:>12.1f} "
+            f"{out_bytes / 1e6:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Typeahead latency of /items/search: FTS5 vs the LIKE fallback.
+
+Seeds a catalogue with varied multi-word names and replays queries the
+way a cashier types them ("ba", "bas", "basm", "basm ri", ...); like
+the checkout dropdown, nothing is searched below two characters.
+
+    python -m benchmarks.item_search --items 100000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import insert # type: ignore
+
+from app.models.item import Item
+from app.services import item_search
+from app.services.item_cache import item_cache
+from benchmarks.common import session_scope, temp_database
+
+BRANDS = ["Tata", "Aashirvaad", "Fortune", "Patanjali", "Amul", "Nestle", "Dabur",
+          "Haldiram", "Britannia", "Parle", "Surf", "Ariel", "Colgate", "Dettol"]
+PRODUCTS = ["Basmati Rice", "Sona Masoori", "Atta", "Maida", "Sugar", "Salt", "Tea",
+            "Coffee", "Mustard Oil", "Sunflower Oil", "Ghee", "Butter", "Biscuits",
+            "Namkeen", "Detergent", "Toothpaste", "Soap", "Shampoo", "Dal", "Besan"]
+SIZES = ["100g", "250g", "500g", "1kg", "2kg", "5kg", "10kg", "200ml", "500ml", "1L"]
+
+
+def seed_catalogue(SessionLocal, count, seed=9):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        cost = round(rng.uniform(5, 900), 2)
+        rows.append({
+            "name": f"{rng.choice(BRANDS)} {rng.choice(PRODUCTS)} {rng.choice(SIZES)} #{i}",
+            "category": rng.choice(["grocery", "oil", "dairy", "snacks", "household"]),
+            "dealer_name": f"Dealer {i % 40}",
+            "cost_price": cost,
+            "margin_percent": 10.0,
+            "selling_price": round(cost * 1.1, 2),
+            "quantity": rng.randint(0, 200),
+        })
+    with session_scope(SessionLocal) as db:
+        db.execute(insert(Item), rows)
+        db.commit()
+
+
+def typed_queries(rng, n):
+    queries = []
+    for _ in range(n):
+        words = [rng.choice(BRANDS), rng.choice(PRODUCTS).split()[0]][: rng.randint(1, 2)]
+        typed = ""
+        for word in words:
+            for end in range(1 if typed else 2, len(word) + 1):
+                queries.append((typed + word[:end]).lower())
+            typed += word + " "
+    return queries
+
+
+def measure(SessionLocal, queries):
+    latencies = []
+    with session_scope(SessionLocal) as db:
+        for q in queries:
+            start = time.perf_counter()
+            item_search.search(db, q)
+            latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return (
+        statistics.median(latencies),
+        latencies[int(len(latencies) * 0.99) - 1],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=100)
+    args = parser.parse_args()
+
+    engine, SessionLocal = temp_database("search")
+    item_search.ensure_item_search_index(engine)
+    seed_catalogue(SessionLocal, args.items)
+    queries = typed_queries(random.Random(1), args.queries)
+
+    print(f"{len(queries)} keystrokes over {args.items} items")
+    print(f"{'mode':>11} {'p50 ms':>8} {'p99 ms':>8}")
+    modes = [
+        ("like-db", False, False),
+        ("like-cache", False, True),
+        ("fts5", True, True),
+    ]
+    for mode, fts, cached in modes:
+        item_search._fts_enabled = fts
+        item_cache.enabled = cached
+        p50, p99 = measure(SessionLocal, queries)
+        print(f"{mode:>11} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Mixed read/write throughput under different SQLite journal settings.
+
+Reader threads run the item search and today's-report queries while
+writer threads run the checkout service, for a fixed time per configuration.
+
+    python -m benchmarks.journal_modes --readers 4 --writers 2 --seconds 5
+"""
+import argparse
+import random
+import threading
+import time
+
+from sqlalchemy import func # type: ignore
+
+from app.models.item import Item
+from app.models.sale import Sale
+from app.services.checkout import checkout
+from app.schemas.sale import SaleCreate
+from benchmarks.common import seed_items, session_scope, temp_database
+
+CONFIGS = [
+    ("DELETE", "FULL"),
+    ("TRUNCATE", "FULL"),
+    ("WAL", "FULL"),
+    ("WAL", "NORMAL"),
+]
+
+
+def run(journal_mode, synchronous, readers, writers, seconds, items=2000):
+    engine, SessionLocal = temp_database(
+        "journal", journal_mode=journal_mode, synchronous=synchronous
+    )
+    seed_items(SessionLocal, items)
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def reader(n):
+        rng = random.Random(n)
+        while not stop.is_set():
+            try:
+                with session_scope(SessionLocal) as db:
+                    word = f"{rng.randrange(items):06d}"[:4]
+                    db.query(Item).filter(Item.name.ilike(f"%{word}%")).limit(20).all()
+                    db.query(func.count(Sale.id), func.sum(Sale.final_amount)).one()
+                bump("reads")
+            except Exception:
+                bump("errors")
+
+    def writer(n):
+        rng = random.Random(1000 + n)
+        while not stop.is_set():
+            cart = SaleCreate(
+                payment_mode="cash",
+                amount_paid=1_000_000,
+                items=[
+                    {"item_id": item_id, "quantity": 1}
+                    for item_id in rng.sample(range(1, items + 1), 3)
+                ],
+            )
+            try:
+                with session_scope(SessionLocal) as db:
+                    checkout(db, cart)
+                bump("writes")
+            except Exception:
+                bump("errors")
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    engine.dispose()
+    return {
+        "reads_per_sec": counts["reads"] / seconds,
+        "writes_per_sec": counts["writes"] / seconds,
+        "errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{'journal':>9} {'sync':>7} {'reads/s':>9} {'writes/s':>9} {'errors':>7}")
+    for journal_mode, synchronous in CONFIGS:
+        r = run(journal_mode, synchronous, args.readers, args.writers, args.seconds)
+        print(
+            f"{journal_mode:>9} {synchronous:>7} {r['reads_per_sec']:>9.1f} "
+            f"{r['writes_per_sec']:>9.1f} {r['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""List endpoint throughput: rows/sec and peak memory per request.
+
+Seeds a scratch database with generate-data and calls each big listing
+through the app (query, row handling, JSON encoding, ASGI). Rows/sec is
+rows returned x calls / elapsed time; peak KB is the largest Python
+allocation high-water mark (tracemalloc) during one call.
+
+    python -m benchmarks.list_endpoints [--rounds 20] [--output results.json]
+
+Run it on two commits to compare; the seed is fixed, so both see the
+same rows.
+"""
+import os
+import tempfile
+
+# Point the app at a scratch database before anything imports it
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{tempfile.mkdtemp(prefix='lists_')}/billing.db",
+)
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import json  # noqa: E402
+import time  # noqa: E402
+import tracemalloc  # noqa: E402
+
+from fastapi.testclient import TestClient  # type: ignore  # noqa: E402
+
+from app.core.database import SessionLocal, async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.synthetic_data import SyntheticData  # noqa: E402
+
+# (name, url, params); since_version=-1 renders the whole catalogue on
+# every call instead of serving the per-version copy
+ROUTES = [
+    ("items", "/items/", {"since_version": -1}),
+    ("sales history", "/sales/history", {"limit": 500}),
+    ("purchases", "/purchases/", {}),
+    ("credit", "/credit/", {}),
+    ("customer summary", "/customers/summary", {}),
+    ("customer sales", "/customers/1/sales", {}),
+    ("customer search", "/customers/search", {"q": "98"}),
+]
+
+
+def measure(client, url, params, rounds):
+    rows = len(client.get(url, params=params).json())  # also warms up
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        client.get(url, params=params).raise_for_status()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    client.get(url, params=params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "rows": rows,
+        "ms_per_request": round(elapsed / rounds * 1000, 2),
+        "rows_per_sec": round(rows * rounds / elapsed),
+        "peak_kb": round(peak / 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--output", help="also write the results here as JSON")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        SyntheticData(
+            db, items=10_000, customers=5_000, suppliers=20, purchases=2_000, sales=50_000,
+            days=365, seed=1, progress=lambda message: None,
+        ).run()
+    finally:
+        db.close()
+
+    results = {}
+    print(f"{'route':<18} {'rows':>6} {'ms/req':>8} {'rows/s':>9} {'peak KB':>8}")
+    with TestClient(app) as client:
+        for name, url, params in ROUTES:
+            row = measure(client, url, params, args.rounds)
+            results[name] = row
+            print(
+                f"{name:<18} {row['rows']:>6} {row['ms_per_request']:>8.2f} "
+                f"{row['rows_per_sec']:>9} {row['peak_kb']:>8}"
+            )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    # aiosqlite connections run on non-daemon threads
+    asyncio.run(async_engine.dispose())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""p50/p99 latency of the hot routes at increasing client concurrency.
+
+Drives the ASGI app in-process with httpx, so the numbers include
+routing, validation, the DB layer and serialization but no network.
+
+    python -m benchmarks.load_test --concurrency 1 16 64 --requests 400
+"""
+import os
+import tempfile
+
+# Point the app at a scratch database before anything imports it
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{tempfile.mkdtemp(prefix='load_')}/billing.db",
+)
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+import random  # noqa: E402
+import statistics  # noqa: E402
+import time  # noqa: E402
+
+import httpx  # noqa: E402
+
+from app.core.database import SessionLocal, async_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from benchmarks.common import seed_items  # noqa: E402
+
+ITEMS = 2000
+
+
+def make_requests(rng):
+    cart = {
+        "payment_mode": "cash",
+        "amount_paid": 1_000_000,
+        "items": [
+            {"item_id": i, "quantity": 1, "discount_percent": 5}
+            for i in rng.sample(range(1, ITEMS + 1), 3)
+        ],
+    }
+    return {
+        "POST /sales/": ("POST", "/sales/", {"json": cart}),
+        "POST /sales/preview": ("POST", "/sales/preview", {"json": cart}),
+        "GET /items/search": (
+            "GET", "/items/search", {"params": {"q": f"item {rng.randrange(100):02d}"}}
+        ),
+        "GET /reports/dashboard/today": ("GET", "/reports/dashboard/today", {}),
+    }
+
+
+async def run_route(client, route, concurrency, total, seed=3):
+    rng = random.Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        method, url, kwargs = make_requests(rng)[route]
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main_async(concurrency_levels, total):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'route':<30} {'conc':>5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for route in make_requests(random.Random(0)):
+            for concurrency in concurrency_levels:
+                r = await run_route(client, route, concurrency, total)
+                print(
+                    f"{route:<30} {concurrency:>5} {r['rps']:>8.1f} "
+                    f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}"
+                )
+
+    # aiosqlite connections run on non-daemon threads: close them or the
+    # interpreter never exits
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=400)
+    args = parser.parse_args()
+
+    seed_items(SessionLocal, ITEMS)
+    asyncio.run(main_async(args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Time, statements and commits to record one large supplier invoice.
+
+Seeds a catalogue, then records the same invoice (half known item names,
+half new ones) on a fresh copy per mode:
+
+- legacy:  the old create_purchase loop: one name lookup per line
+           without an index on items.name, a commit per new item
+- bulk:    PurchaseImport, the set-based path behind POST /purchases/
+           and /purchases/import/csv
+
+    python -m benchmarks.purchase_import --lines 10000 --items 50000
+"""
+import argparse
+import time
+
+from sqlalchemy import text # type: ignore
+
+from app.models.item import Item
+from app.models.purchase import Purchase
+from app.models.purchase_item import PurchaseItem
+from app.schemas.purchase import PurchaseCreate
+from app.services.purchase_import import import_purchase, selling_price_for
+from benchmarks.common import QueryCounter, seed_items, session_scope, temp_database
+
+
+def legacy_purchase(db, data):
+    purchase = Purchase(total_amount=0)
+    db.add(purchase)
+    db.commit()
+    db.refresh(purchase)
+
+    total_amount = 0
+    for p_item in data.items:
+        selling_price = selling_price_for(p_item.cost_price, p_item.margin_percent)
+        item = db.query(Item).filter(Item.name == p_item.item_name).first()
+
+        if not item:
+            item = Item(
+                name=p_item.item_name,
+                cost_price=p_item.cost_price,
+                margin_percent=p_item.margin_percent,
+                selling_price=selling_price,
+                quantity=p_item.quantity,
+            )
+            db.add(item)
+            db.commit()
+            db.refresh(item)
+        else:
+            item.cost_price = p_item.cost_price
+            item.margin_percent = p_item.margin_percent
+            item.selling_price = selling_price
+            item.quantity += p_item.quantity
+
+        line_total = p_item.quantity * p_item.cost_price
+        total_amount += line_total
+        db.add(PurchaseItem(
+            purchase_id=purchase.id,
+            item_id=item.id,
+            quantity=p_item.quantity,
+            cost_price=p_item.cost_price,
+            margin_percent=p_item.margin_percent,
+            selling_price=selling_price,
+            line_total=line_total,
+        ))
+
+    purchase.total_amount = total_amount
+    db.commit()
+
+
+def invoice(lines, items):
+    known = lines // 2
+    return PurchaseCreate(items=[
+        {
+            # seed_items names are "Item 000000".. ; spread the known ones
+            "item_name": (
+                f"Item {n * items // known:06d}" if n < known
+                else f"New item {n:06d}"
+            ),
+            "quantity": 10,
+            "cost_price": 100.0 + n % 50,
+            "margin_percent": 12.5,
+        }
+        for n in range(lines)
+    ])
+
+
+def run(mode, lines, items):
+    engine, SessionLocal = temp_database(f"purchase_{mode}")
+    seed_items(SessionLocal, items)
+    data = invoice(lines, items)
+
+    if mode == "legacy":
+        with engine.begin() as conn:
+            conn.execute(text("DROP INDEX IF EXISTS ix_items_name"))
+
+    start = time.perf_counter()
+    with QueryCounter(engine) as counter:
+        with session_scope(SessionLocal) as db:
+            if mode == "legacy":
+                legacy_purchase(db, data)
+            else:
+                import_purchase(db, data)
+    elapsed = time.perf_counter() - start
+
+    engine.dispose()
+    return {
+        "mode": mode,
+        "seconds": elapsed,
+        "statements": counter.statements,
+        "commits": counter.commits,
+        "lines_per_sec": lines / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=10_000)
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--modes", nargs="+", default=["legacy", "bulk"])
+    args = parser.parse_args()
+
+    print(f"{args.lines} lines against {args.items} items")
+    print(f"{'mode':>7} {'seconds':>9} {'stmts':>7} {'commits':>8} {'lines/s':>9}")
+    for mode in args.modes:
+        r = run(mode, args.lines, args.items)
+        print(
+            f"{r['mode']:>7} {r['seconds']:>9.2f} {r['statements']:>7} "
+            f"{r['commits']:>8} {r['lines_per_sec']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""SQL statement budgets for the list / detail routes.
+
+Seeds enough rows that an ORM lazy-load in a loop shows up as dozens of
+statements, then calls each route under query_budget(). Prints one line
+per route and exits 1 if any route went over its budget, so it can run
+in CI next to the other scripts:
+
+    python -m benchmarks.query_budgets
+"""
+import os
+import tempfile
+
+# Point the app at a scratch database before anything imports it
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{tempfile.mkdtemp(prefix='budgets_')}/billing.db",
+)
+
+import sys  # noqa: E402
+
+from fastapi.testclient import TestClient  # type: ignore  # noqa: E402
+
+from app.core.database import SessionLocal  # noqa: E402
+from app.core.query_debug import QueryBudgetExceeded, query_budget  # noqa: E402
+from app.main import app  # noqa: E402
+from benchmarks.common import seed_items  # noqa: E402
+
+ROWS = 40
+
+# (method, url, kwargs, budget) -- budgets hold for any number of rows
+ROUTES = [
+    ("GET", "/items/", {}, 2),
+    ("GET", "/items/low-stock", {}, 2),
+    ("GET", "/sales/history", {}, 3),
+    ("GET", "/sales/random-history", {}, 3),
+    ("GET", "/sales/search", {"params": {"q": "Customer"}}, 2),
+    ("GET", "/sales/1", {}, 4),
+    ("GET", "/purchases/", {}, 3),
+    ("GET", "/purchases/1", {}, 4),
+    ("GET", "/customers/summary", {}, 3),
+    ("GET", "/customers/1/details", {}, 4),
+    ("GET", "/customers/1/sales", {}, 3),
+    ("GET", "/credit/", {}, 3),
+    ("GET", "/reports/today", {}, 3),
+    ("GET", "/reports/dashboard/today", {}, 3),
+]
+
+
+def seed(client):
+    seed_items(SessionLocal, ROWS, quantity=1_000)
+    for n in range(ROWS):
+        client.post("/sales/", json={
+            "payment_mode": "credit",
+            "customer_phone": f"98{n:08d}",
+            "customer_name": f"Customer {n}",
+            "items": [{"item_id": n % ROWS + 1, "quantity": 1}, {"item_id": (n + 1) % ROWS + 1, "quantity": 2}],
+        }).raise_for_status()
+        client.post("/purchases/", json={
+            "supplier_phone": f"80{n:08d}",
+            "supplier_name": f"Supplier {n}",
+            "items": [{"item_name": f"Item {n:06d}", "quantity": 5, "cost_price": 10, "margin_percent": 10}],
+        }).raise_for_status()
+
+
+def main():
+    failed = 0
+    with TestClient(app) as client:
+        seed(client)
+
+        print(f"{'route':<32} {'budget':>6} {'stmts':>6}")
+        for method, url, kwargs, budget in ROUTES:
+            try:
+                with query_budget(budget) as statements:
+                    client.request(method, url, **kwargs).raise_for_status()
+                result = ""
+            except QueryBudgetExceeded as exc:
+                failed += 1
+                result = "  OVER\n" + str(exc)
+            print(f"{method + ' ' + url:<32} {budget:>6} {len(statements):>6}{result}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
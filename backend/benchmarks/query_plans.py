@@ -0,0 +1,160 @@
+"""Query-plan regression check: no route may fall back to a full table scan.
+
+Seeds a scratch database with generate-data, calls every route below,
+records the SQL each one runs and feeds it back through
+``EXPLAIN QUERY PLAN`` (with the same parameters). A plain
+``SCAN <table>`` step -- no index, no rowid range, not a partial index
+-- fails the run unless it is listed in ALLOWED_SCANS with a reason.
+
+    python -m benchmarks.query_plans [--verbose]
+
+Exits 1 when a new full scan shows up, so it can run in CI next to
+query_budgets.py.
+"""
+import os
+import tempfile
+
+# Point the app at a scratch database before anything imports it
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{tempfile.mkdtemp(prefix='plans_')}/billing.db",
+)
+
+import argparse  # noqa: E402
+import re  # noqa: E402
+import sqlite3  # noqa: E402
+import sys  # noqa: E402
+
+from fastapi.testclient import TestClient  # type: ignore  # noqa: E402
+from sqlalchemy import event  # type: ignore  # noqa: E402
+from sqlalchemy.engine import make_url  # type: ignore  # noqa: E402
+
+from app.core.database import SessionLocal, async_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.synthetic_data import SyntheticData  # noqa: E402
+
+# (method, url, kwargs)
+ROUTES = [
+    ("GET", "/items/", {}),
+    ("GET", "/items/", {"params": {"since_version": 0}}),
+    ("GET", "/items/search", {"params": {"q": "rice"}}),
+    ("GET", "/items/low-stock", {}),
+    ("GET", "/sales/history", {}),
+    ("GET", "/sales/history", {"params": {"customer_id": 7}}),
+    ("GET", "/sales/history", {"params": {"payment_mode": "credit", "date_from": "2026-01-01"}}),
+    ("GET", "/sales/random-history", {}),
+    ("GET", "/sales/42", {}),
+    ("GET", "/customers/summary", {"params": {"limit": 50}}),
+    ("GET", "/customers/summary", {"params": {"limit": 50, "offset": 50, "sort": "total_credit"}}),
+    ("GET", "/customers/7/details", {"params": {"limit": 20}}),
+    ("GET", "/customers/7/sales", {}),
+    ("GET", "/customers/by-phone", {"params": {"phone": "9800000007"}}),
+    ("GET", "/credit/", {}),
+    ("GET", "/purchases/", {}),
+    ("GET", "/purchases/3", {}),
+    ("GET", "/reports/today", {}),
+    ("GET", "/reports/dashboard/today", {}),
+    ("GET", "/reports/dashboard/last-7-days", {}),
+    ("GET", "/reports/sales", {"params": {"from": "2026-01-01", "to": "2026-03-31", "granularity": "week"}}),
+    ("POST", "/sales/preview", {"json": {
+        "payment_mode": "cash", "items": [{"item_id": 5, "quantity": 1}],
+    }}),
+    ("POST", "/sales/", {"json": {
+        "payment_mode": "credit", "customer_phone": "9800000007",
+        "items": [{"item_id": 5, "quantity": 1}, {"item_id": 9, "quantity": 2}],
+    }}),
+    ("POST", "/credit/pay/7", {"params": {"amount": 10}}),
+    ("POST", "/purchases/", {"json": {
+        "supplier_phone": "0100000001",
+        "items": [{"item_name": "Plan Check Item", "quantity": 5, "cost_price": 10, "margin_percent": 10}],
+    }}),
+]
+
+# (route, table) -> why a full scan is fine there
+ALLOWED_SCANS = {
+    ("GET /items/", "items"): "lists the whole catalogue",
+    # Not cached: an index on quantity would be rewritten by every sale's
+    # stock UPDATE to speed up an occasional back-office list
+    ("GET /items/low-stock", "items"): "quantity filter over the whole catalogue",
+    ("GET /customers/summary", "customer_stats"): "bill_count > 0 matches nearly every row",
+    ("GET /purchases/", "purchases"): "lists every purchase",
+}
+
+_FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$")
+
+
+def capture(statements):
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "WITH")):
+            if executemany:
+                parameters = parameters[0]
+            statements.append((statement, parameters))
+
+    for e in (engine, async_engine.sync_engine):
+        event.listen(e, "before_cursor_execute", before_cursor_execute)
+
+
+def full_scans(conn, tables, statement, parameters):
+    """The plan, and the tables it reads start to end without an index."""
+    plan = conn.execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()
+    scans = []
+    for _, _, _, detail in plan:
+        match = _FULL_SCAN.match(detail)
+        # Scans of subquery results ("SCAN hits") are not table scans
+        if match and match.group(1) in tables:
+            scans.append(match.group(1))
+    return plan, scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        SyntheticData(
+            db, items=2_000, customers=500, suppliers=10, purchases=300, sales=20_000,
+            days=365, seed=1, progress=lambda message: None,
+        ).run()
+    finally:
+        db.close()
+
+    path = make_url(os.environ["DATABASE_URL"]).database
+    plan_conn = sqlite3.connect(path)
+    tables = {
+        name for (name,) in plan_conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }
+    failures = 0
+
+    statements = []
+    capture(statements)
+
+    with TestClient(app) as client:
+        for method, url, kwargs in ROUTES:
+            route = f"{method} {url}"
+            statements.clear()
+            client.request(method, url, **kwargs).raise_for_status()
+
+            problems = []
+            for statement, parameters in statements:
+                plan, scans = full_scans(plan_conn, tables, statement, parameters)
+                unexpected = [t for t in scans if (route, t) not in ALLOWED_SCANS]
+                if args.verbose or unexpected:
+                    print(f"  {' '.join(statement.split())[:160]}")
+                    for row in plan:
+                        print(f"      {row[3]}")
+                if unexpected:
+                    problems.extend(unexpected)
+
+            status = "FULL SCAN: " + ", ".join(sorted(set(problems))) if problems else "ok"
+            print(f"{route:<44} {len(statements):>3} statements  {status}")
+            failures += bool(problems)
+
+    plan_conn.close()
+    print(f"\n{failures} route(s) with unexpected full table scans")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Concurrent checkouts of the same hot items.
+
+Starts N threads that all sell from a handful of items with limited stock
+and then checks the books: for every item, opening stock minus closing
+stock must equal the quantity on committed sale_items, and stock must
+never go negative. Any difference is a lost update or an oversell.
+
+    python -m benchmarks.stock_contention --writers 2 8 16 --sales 100
+"""
+import argparse
+import random
+import threading
+import time
+
+from fastapi import HTTPException # type: ignore
+from sqlalchemy import func # type: ignore
+
+from app.models.item import Item
+from app.models.sale_item import SaleItem
+from app.services.checkout import checkout
+from app.schemas.sale import SaleCreate
+from benchmarks.common import seed_items, session_scope, temp_database
+
+
+def run(writers, sales_per_writer, hot_items=5, stock=500, seed=7):
+    engine, SessionLocal = temp_database("stock")
+    seed_items(SessionLocal, hot_items, quantity=stock)
+
+    stats = {"ok": 0, "conflict": 0, "error": 0}
+    lock = threading.Lock()
+
+    def writer(n):
+        rng = random.Random(seed + n)
+        for _ in range(sales_per_writer):
+            cart = SaleCreate(
+                payment_mode="cash",
+                amount_paid=1_000_000,
+                items=[
+                    {"item_id": item_id, "quantity": rng.randint(1, 3)}
+                    for item_id in rng.sample(range(1, hot_items + 1), 2)
+                ],
+            )
+            try:
+                with session_scope(SessionLocal) as db:
+                    checkout(db, cart)
+                outcome = "ok"
+            except HTTPException as exc:
+                outcome = "conflict" if exc.status_code == 409 else "error"
+            except Exception:
+                outcome = "error"
+            with lock:
+                stats[outcome] += 1
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with session_scope(SessionLocal) as db:
+        sold = dict(
+            db.query(SaleItem.item_id, func.sum(SaleItem.quantity))
+            .group_by(SaleItem.item_id)
+            .all()
+        )
+        remaining = dict(db.query(Item.id, Item.quantity).all())
+
+    lost = sum(
+        abs((stock - remaining[item_id]) - sold.get(item_id, 0))
+        for item_id in remaining
+    )
+    negative = sum(1 for qty in remaining.values() if qty < 0)
+
+    engine.dispose()
+    return {
+        "writers": writers,
+        **stats,
+        "lost_updates": lost,
+        "negative_stock": negative,
+        "sales_per_sec": stats["ok"] / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--sales", type=int, default=100, help="sales per writer")
+    args = parser.parse_args()
+
+    print(
+        f"{'writers':>8} {'ok':>6} {'409':>6} {'errors':>7} "
+        f"{'lost':>5} {'neg':>4} {'sales/s':>8}"
+    )
+    failed = False
+    for writers in args.writers:
+        r = run(writers, args.sales)
+        failed |= bool(r["lost_updates"] or r["negative_stock"])
+        print(
+            f"{r['writers']:>8} {r['ok']:>6} {r['conflict']:>6} {r['error']:>7} "
+            f"{r['lost_updates']:>5} {r['negative_stock']:>4} {r['sales_per_sec']:>8.1f}"
+        )
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""Hot-path benchmark suite: throughput, latency and SQL per route, per data scale.
+
+Each scale runs in its own process against a freshly seeded SQLite file,
+driving the ASGI app in-process with httpx (routing, validation, the DB
+layer and serialization; no network). Statements per request come from
+the X-DB-Statements header of the metrics middleware.
+
+    python -m benchmarks.suite                          # small + medium
+    python -m benchmarks.suite --scales large --requests 500
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+
+Results are written to benchmarks/results/<timestamp>.json. With
+--baseline, every (scale, route) is compared against the stored run and
+the script exits 1 on a regression: p95 slower or throughput lower by
+more than --tolerance (and --min-delta-ms), or more statements per
+request. Timings only
+compare on the same machine; statement counts compare anywhere.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import httpx  # type: ignore
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# name -> (items, customers, sales)
+SCALES = {
+    "small": (1_000, 200, 5_000),
+    "medium": (10_000, 2_000, 50_000),
+    "large": (50_000, 10_000, 250_000),
+}
+
+# Reads first so they see the seeded data set, not the benchmark's writes
+ROUTES = [
+    "GET /items/",
+    "GET /items/search",
+    "GET /sales/history",
+    "GET /customers/summary",
+    "GET /reports/dashboard/today",
+    "GET /reports/dashboard/last-7-days",
+    "POST /sales/preview",
+    "POST /sales/",
+    "POST /purchases/",
+]
+
+
+def make_request(route, rng, items, customers):
+    cart = {
+        "payment_mode": "cash",
+        "amount_paid": 1_000_000,
+        "items": [
+            {"item_id": i, "quantity": 1, "discount_percent": rng.choice((0, 5))}
+            for i in rng.sample(range(1, items + 1), 3)
+        ],
+    }
+    if customers and rng.random() < 0.5:
+        cart["customer_phone"] = f"98{rng.randrange(customers):08d}"
+
+    if route == "GET /items/search":
+        return "GET", "/items/search", {"params": {"q": f"item {rng.randrange(100):02d}"}}
+    if route == "GET /sales/history":
+        return "GET", "/sales/history", {}
+    if route == "GET /customers/summary":
+        return "GET", "/customers/summary", {"params": {"limit": 50}}
+    if route == "POST /sales/preview":
+        return "POST", "/sales/preview", {"json": cart}
+    if route == "POST /sales/":
+        return "POST", "/sales/", {"json": cart}
+    if route == "POST /purchases/":
+        return "POST", "/purchases/", {"json": {
+            "supplier_phone": "8000000001",
+            "supplier_name": "Bench Supplier",
+            "items": [
+                {
+                    "item_name": f"Item {i - 1:06d}",
+                    "quantity": 10,
+                    "cost_price": 100.0,
+                    "margin_percent": 10.0,
+                }
+                for i in rng.sample(range(1, items + 1), 20)
+            ],
+        }}
+    method, url = route.split(" ", 1)
+    return method, url, {}
+
+
+def percentile(ordered, p):
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, int(round(p / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+async def measure(client, route, rng, items, customers, requests, concurrency, warmup):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, statements = [], []
+
+    async def one(record):
+        method, url, kwargs = make_request(route, rng, items, customers)
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            elapsed = time.perf_counter() - start
+        response.raise_for_status()
+        if record:
+            latencies.append(elapsed)
+            statements.append(int(response.headers.get("x-db-statements", 0)))
+
+    for _ in range(warmup):
+        await one(False)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(True) for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "route": route,
+        "requests": requests,
+        "concurrency": concurrency,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "statements": round(statistics.mean(statements), 2),
+    }
+
+
+def run_scale(scale, requests, concurrency, warmup, routes):
+    """Seed a scratch database, benchmark every route, return the rows."""
+    # The app binds its engines at import time: point it at the scratch
+    # file (and make sure statements are counted) before importing it
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix=f'suite_{scale}_')}/billing.db"
+    os.environ["METRICS_ENABLED"] = "1"
+
+    from app.core.database import SessionLocal, async_engine
+    from app.main import app
+    from benchmarks.common import seed_customers, seed_items, seed_sales
+
+    items, customers, sales = SCALES[scale]
+    started = time.perf_counter()
+    seed_items(SessionLocal, items)
+    seed_customers(SessionLocal, customers)
+    seed_sales(SessionLocal, sales, items, customers)
+    seed_seconds = time.perf_counter() - started
+
+    async def main():
+        rows = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for route in routes:
+                rng = random.Random(route)
+                row = await measure(client, route, rng, items, customers, requests, concurrency, warmup)
+                rows.append(dict(row, scale=scale))
+                print_row(row, scale)
+
+        # aiosqlite connections run on non-daemon threads: close them or
+        # the interpreter never exits
+        await async_engine.dispose()
+        return rows
+
+    print(f"{scale}: seeded {items} items, {customers} customers, {sales} sales "
+          f"in {seed_seconds:.1f}s")
+    return asyncio.run(main())
+
+
+def print_row(row, scale):
+    print(
+        f"{scale:<7} {row['route']:<34} {row['rps']:>8.1f} {row['p50_ms']:>8.2f} "
+        f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['statements']:>6.1f}",
+        flush=True,
+    )
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _slower(new_ms, old_ms, tolerance, min_delta_ms):
+    # Sub-millisecond jitter on a 2 ms route is not a 20% regression
+    return new_ms > old_ms * (1 + tolerance) and new_ms - old_ms > min_delta_ms
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Regression messages for rows that got worse than the baseline."""
+    previous = {(row["scale"], row["route"]): row for row in baseline["results"]}
+    regressions = []
+
+    print(f"\n{'scale':<7} {'route':<34} {'p95 ms':>17} {'req/s':>17} {'stmts':>11}")
+    for row in results:
+        old = previous.get((row["scale"], row["route"]))
+        if old is None:
+            continue
+
+        problems = []
+        if _slower(row["p95_ms"], old["p95_ms"], tolerance, min_delta_ms):
+            problems.append("p95")
+        if _slower(1000 / row["rps"], 1000 / old["rps"], tolerance, min_delta_ms):
+            problems.append("throughput")
+        if row["statements"] > old["statements"]:
+            problems.append("statements")
+
+        print(
+            f"{row['scale']:<7} {row['route']:<34} "
+            f"{old['p95_ms']:>8.2f}→{row['p95_ms']:<8.2f}"
+            f"{old['rps']:>8.1f}→{row['rps']:<8.1f}"
+            f"{old['statements']:>5.1f}→{row['statements']:<5.1f}"
+            + ("  REGRESSION: " + ", ".join(problems) if problems else "")
+        )
+        if problems:
+            regressions.append(f"{row['scale']} {row['route']}: {', '.join(problems)}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["small", "medium"])
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=ROUTES)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--save-baseline", help="also write the results to this file")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="allowed p95 / throughput change before it counts (default 0.20)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="ignore p95 / per-request time changes smaller than this (default 1.0)")
+    parser.add_argument("--worker", choices=list(SCALES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        rows = run_scale(args.worker, args.requests, args.concurrency, args.warmup, args.routes)
+        with open(args.output, "w") as f:
+            json.dump(rows, f)
+        return 0
+
+    print(f"{'scale':<7} {'route':<34} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'stmts':>6}")
+    results = []
+    for scale in args.scales:
+        # A fresh interpreter per scale: the app's engines, item cache and
+        # metrics are process-wide
+        rows_path = os.path.join(tempfile.mkdtemp(prefix="suite_"), "rows.json")
+        worker = subprocess.run([
+            sys.executable, "-m", "benchmarks.suite", "--worker", scale,
+            "--requests", str(args.requests),
+            "--concurrency", str(args.concurrency),
+            "--warmup", str(args.warmup),
+            "--routes", *args.routes,
+            "--output", rows_path,
+        ])
+        if worker.returncode != 0:
+            print(f"{scale}: worker failed with exit code {worker.returncode}")
+            return worker.returncode
+        with open(rows_path) as f:
+            results.extend(json.load(f))
+
+    report = {
+        "environment": environment(),
+        "settings": {
+            "scales": {name: dict(zip(("items", "customers", "sales"), SCALES[name])) for name in args.scales},
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    for path in filter(None, (output, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}")
+            return 1
+        print(f"\nno regressions against {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,190 @@
+"""
+Maintenance commands. Run from the backend directory:
+
+    python manage.py rebuild-balances [--verify]
+    python manage.py backfill-daily-sales
+    python manage.py backfill-customer-stats
+    python manage.py backup
+    python manage.py generate-data --items 100000 --customers 50000 --sales 5000000
+"""
+import argparse
+from datetime import date
+
+from app.core.database import Base, SessionLocal, engine
+import app.models  # noqa: F401  (registers the models on Base)
+
+
+def rebuild_balances_cmd(args):
+    from app.services.credit_ledger import rebuild_balances
+
+    db = SessionLocal()
+    try:
+        report = rebuild_balances(db, verify_only=args.verify)
+        if not args.verify:
+            db.commit()
+    finally:
+        db.close()
+
+    print(
+        f"{report['ledger_entries']} ledger entries, "
+        f"{report['customers']} customers, "
+        f"{len(report['mismatches'])} mismatches"
+        + (" (fixed)" if report["mismatches"] and not args.verify else "")
+    )
+    for m in report["mismatches"][:20]:
+        print(f"  customer {m['customer_id']}: stored={m['stored']} computed={m['computed']}")
+
+    return 1 if args.verify and report["mismatches"] else 0
+
+
+def backfill_daily_sales_cmd(args):
+    from app.services.daily_sales import backfill_daily_sales
+
+    db = SessionLocal()
+    try:
+        days = backfill_daily_sales(db)
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"daily_sales_summary rebuilt: {days} days")
+    return 0
+
+
+def backfill_customer_stats_cmd(args):
+    from app.services.customer_stats import backfill_customer_stats
+
+    db = SessionLocal()
+    try:
+        customers = backfill_customer_stats(db)
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"customer_stats rebuilt: {customers} customers")
+    return 0
+
+
+def backup_cmd(args):
+    from app.services.backup import run_backup
+
+    result = run_backup(compression=args.compression)
+
+    print(
+        f"{result['file']}: {result['database_bytes']} → {result['backup_bytes']} bytes "
+        f"in {result['total_seconds']}s (copy {result['copy_seconds']}s, "
+        f"verify {result['verify_seconds']}s, compress {result['compress_seconds']}s, "
+        f"{result['restarts']} restarts)"
+    )
+    for name in result["deleted"]:
+        print(f"  rotated out {name}")
+    return 0
+
+
+def generate_data_cmd(args):
+    import time
+
+    from fastapi import HTTPException # type: ignore
+    from sqlalchemy.orm import sessionmaker # type: ignore
+
+    from app.core.database import create_db_engine
+    from app.services.item_search import ensure_item_search_index
+    from app.services.sales_report import shop_timezone
+    from app.services.synthetic_data import SyntheticData
+
+    # A generated database can simply be generated again: skip fsyncs
+    target = create_db_engine(args.database_url, synchronous="OFF")
+    Base.metadata.create_all(bind=target)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=target)()
+
+    started = time.perf_counter()
+    try:
+        tz = shop_timezone(args.timezone)
+        SyntheticData(
+            db,
+            items=args.items,
+            customers=args.customers,
+            suppliers=args.suppliers,
+            purchases=args.purchases,
+            sales=args.sales,
+            days=args.days,
+            seed=args.seed,
+            end_date=args.end_date,
+            tz=tz,
+        ).run()
+    except HTTPException as exc:
+        print(exc.detail)
+        return 1
+    finally:
+        db.close()
+
+    ensure_item_search_index(target)
+    target.dispose()
+    print(f"done in {time.perf_counter() - started:.0f}s")
+    return 0
+
+
+def main():
+    from app.services.synthetic_data import DEFAULT_END_DATE
+
+    parser = argparse.ArgumentParser(description="Billing system maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser(
+        "rebuild-balances",
+        help="recompute customer_balances from credit_ledger",
+    )
+    p.add_argument("--verify", action="store_true", help="only report mismatches")
+    p.set_defaults(func=rebuild_balances_cmd)
+
+    p = sub.add_parser(
+        "backfill-daily-sales",
+        help="rebuild daily_sales_summary from the sales table (after changing SHOP_TIMEZONE too)",
+    )
+    p.set_defaults(func=backfill_daily_sales_cmd)
+
+    p = sub.add_parser(
+        "backfill-customer-stats",
+        help="rebuild customer_stats from sales and credit payments",
+    )
+    p.set_defaults(func=backfill_customer_stats_cmd)
+
+    p = sub.add_parser(
+        "backup",
+        help="online backup of the SQLite database, verified and rotated",
+    )
+    p.add_argument(
+        "--compression", choices=["gzip", "zstd", "none"],
+        help="default: BACKUP_COMPRESSION",
+    )
+    p.set_defaults(func=backup_cmd)
+
+    p = sub.add_parser(
+        "generate-data",
+        help="fill an empty database with reproducible synthetic data",
+    )
+    p.add_argument("--items", type=int, default=10_000)
+    p.add_argument("--customers", type=int, default=5_000)
+    p.add_argument("--suppliers", type=int, default=50)
+    p.add_argument("--purchases", type=int, default=2_000)
+    p.add_argument("--sales", type=int, default=200_000)
+    p.add_argument("--days", type=int, default=730, help="history length in days")
+    p.add_argument(
+        "--end-date", type=date.fromisoformat, default=DEFAULT_END_DATE,
+        help=f"last day of the history, YYYY-MM-DD (default: {DEFAULT_END_DATE})",
+    )
+    p.add_argument(
+        "--timezone",
+        help="zone of the shop hours (default: SHOP_TIMEZONE, else the server's)",
+    )
+    p.add_argument("--seed", type=int, default=42)
+    p.add_argument("--database-url", help="default: DATABASE_URL")
+    p.set_defaults(func=generate_data_cmd)
+
+    args = parser.parse_args()
+    Base.metadata.create_all(bind=engine)
+    raise SystemExit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
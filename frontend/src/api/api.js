@@ -18,12 +18,43 @@ export async function previewSale(data) {
   return res.json();
 }
 
+// crypto.randomUUID only exists in secure contexts (https / localhost);
+// on plain http over the LAN build the same random v4 UUID by hand.
+function idempotencyKey() {
+  if (crypto.randomUUID) return crypto.randomUUID();
+
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  bytes[6] = (bytes[6] & 0x0f) | 0x40; // version 4
+  bytes[8] = (bytes[8] & 0x3f) | 0x80; // RFC 4122 variant
+  const hex = Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("");
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
+// POST with an Idempotency-Key, retried with the SAME key when the
+// network drops: the backend replays the first result instead of
+// creating a second bill / purchase.
+export async function postOnce(url, data, attempts = 3) {
+  const key = idempotencyKey();
+
+  for (let attempt = 1; ; attempt++) {
+    try {
+      return await fetch(url, {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          "Idempotency-Key": key,
+        },
+        body: JSON.stringify(data),
+      });
+    } catch (err) {
+      if (attempt >= attempts) throw err;
+      await new Promise((resolve) => setTimeout(resolve, 500 * attempt));
+    }
+  }
+}
+
 export async function createSale(data) {
-  const res = await fetch(`${BASE_URL}/sales`, {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify(data),
-  });
+  const res = await postOnce(`${BASE_URL}/sales/`, data);
   return res.json();
 }
 
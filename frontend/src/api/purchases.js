@@ -1,13 +1,10 @@
 import api from "./axios";
+import { postOnce } from "./api";
 
 const BASE_URL = "http://127.0.0.1:8000";
 
 export async function createPurchase(data) {
-  const res = await fetch(`${BASE_URL}/purchases/`, {
-    method: "POST",
-    headers: { "Content-Type": "application/json" },
-    body: JSON.stringify(data),
-  });
+  const res = await postOnce(`${BASE_URL}/purchases/`, data);
 
   if (!res.ok) {
     throw new Error("Failed to create purchase");
@@ -1,7 +1,18 @@
-import { useEffect, useMemo, useState, useRef } from "react";
+import { useEffect, useState, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../../api/axios";
 
+const PAGE_SIZE = 50;
+
+// Sort dropdown value -> /customers/summary sort & order
+const SORTS = {
+  recent: { sort: "last_purchase_date", order: "desc" },
+  name_asc: { sort: "name", order: "asc" },
+  name_desc: { sort: "name", order: "desc" },
+  credit_high: { sort: "total_credit", order: "desc" },
+  credit_low: { sort: "total_credit", order: "asc" },
+};
+
 function Customers() {
   const navigate = useNavigate();
 
@@ -13,13 +24,37 @@ function Customers() {
   const [sortBy, setSortBy] = useState("recent"); 
   // recent | name_asc | name_desc | credit_high | credit_low
 
+  // ✅ Paging: one page from the server, totals over every match
+  const [offset, setOffset] = useState(0);
+  const [totals, setTotals] = useState({ count: 0, credit: 0, creditCustomers: 0 });
+
   // ✅ Ref for keyboard shortcut
   const searchInputRef = useRef(null);
 
+  // ✅ New search or sort starts again from the first page
+  useEffect(() => {
+    setOffset(0);
+  }, [search, sortBy]);
+
   useEffect(() => {
+    let ignore = false;
+
     async function loadCustomers() {
       try {
-        const res = await api.get("/customers/summary");
+        const res = await api.get("/customers/summary", {
+          params: {
+            ...SORTS[sortBy],
+            q: search.trim() || undefined,
+            limit: PAGE_SIZE,
+            offset,
+          }
+        });
+        if (ignore) return;
+        setTotals({
+          count: Number(res.headers["x-total-count"] || 0),
+          credit: Number(res.headers["x-total-credit"] || 0),
+          creditCustomers: Number(res.headers["x-credit-customers"] || 0),
+        });
         // ✅ FIX: Normalize data to use consistent property names
         setCustomers(
           (res.data || []).map(c => ({
@@ -35,12 +70,17 @@ function Customers() {
       } catch (err) {
         console.error("Failed to load customers", err);
       } finally {
-        setLoading(false);
+        if (!ignore) setLoading(false);
       }
     }
 
-    loadCustomers();
-  }, []);
+    // Debounce typing in the search box
+    const delay = setTimeout(loadCustomers, search.trim() ? 300 : 0);
+    return () => {
+      ignore = true;
+      clearTimeout(delay);
+    };
+  }, [search, sortBy, offset]);
 
   // ✅ Keyboard shortcut: Press "/" to focus search
   useEffect(() => {
@@ -55,54 +95,13 @@ function Customers() {
     return () => document.removeEventListener("keydown", handleKeyPress);
   }, []);
 
-  // 🔎 Search + Sort pipeline
-  const filteredCustomers = useMemo(() => {
-    let data = [...customers];
-
-    // search
-    if (search.trim()) {
-      const q = search.toLowerCase();
-      data = data.filter(c =>
-        c.name.toLowerCase().includes(q) ||
-        c.phone.includes(q)
-      );
-    }
-
-    // sort
-    switch (sortBy) {
-      case "name_asc":
-        data.sort((a, b) => a.name.localeCompare(b.name));
-        break;
-
-      case "name_desc":
-        data.sort((a, b) => b.name.localeCompare(a.name));
-        break;
-
-      case "credit_high":
-        data.sort((a, b) => b.credit_left - a.credit_left);
-        break;
-
-      case "credit_low":
-        data.sort((a, b) => a.credit_left - b.credit_left);
-        break;
-
-      case "recent":
-      default:
-        data.sort(
-          (a, b) =>
-            new Date(b.last_purchase_date) -
-            new Date(a.last_purchase_date)
-        );
-    }
-
-    return data;
-  }, [customers, search, sortBy]);
+  // Search, sort and summary totals are computed by the server
+  const filteredCustomers = customers;
 
   // Calculate summary stats
-  const totalCustomers = filteredCustomers.length;
-  const totalCreditOutstanding = filteredCustomers
-    .reduce((sum, c) => sum + (c.credit_left > 0 ? c.credit_left : 0), 0);
-  const customersWithCredit = filteredCustomers.filter(c => c.credit_left > 0).length;
+  const totalCustomers = totals.count;
+  const totalCreditOutstanding = totals.credit;
+  const customersWithCredit = totals.creditCustomers;
 
   return (
     <div className="max-w-7xl mx-auto space-y-6 p-6">
@@ -300,6 +299,31 @@ function Customers() {
           </tbody>
         </table>
       </div>
+
+      {/* ✅ Pages */}
+      {totalCustomers > PAGE_SIZE && (
+        <div className="flex justify-center items-center gap-4 text-sm text-gray-600">
+          <button
+            onClick={() => setOffset(Math.max(0, offset - PAGE_SIZE))}
+            disabled={offset === 0}
+            className="px-4 py-2 border border-gray-300 rounded-lg text-sm font-medium
+                       text-gray-700 bg-white hover:bg-gray-50 disabled:opacity-50"
+          >
+            Previous
+          </button>
+          <span>
+            {offset + 1}–{Math.min(offset + PAGE_SIZE, totalCustomers)} of {totalCustomers}
+          </span>
+          <button
+            onClick={() => setOffset(offset + PAGE_SIZE)}
+            disabled={offset + PAGE_SIZE >= totalCustomers}
+            className="px-4 py-2 border border-gray-300 rounded-lg text-sm font-medium
+                       text-gray-700 bg-white hover:bg-gray-50 disabled:opacity-50"
+          >
+            Next
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -2,10 +2,23 @@ import { useEffect, useState, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import api from "../../api/axios";
 
+const PAGE_SIZE = 100;
+
+// Local YYYY-MM-DD, `daysAgo` days before today
+function localDate(daysAgo = 0) {
+  const d = new Date();
+  d.setDate(d.getDate() - daysAgo);
+  const month = String(d.getMonth() + 1).padStart(2, "0");
+  const day = String(d.getDate()).padStart(2, "0");
+  return `${d.getFullYear()}-${month}-${day}`;
+}
+
 function SalesHistory() {
   const navigate = useNavigate();
   const [filter, setFilter] = useState("all");
   const [dateRange, setDateRange] = useState("all");
+  const [payment, setPayment] = useState("all");
+  const [customerFilter, setCustomerFilter] = useState(null); // { id, name }
   const [sales, setSales] = useState([]);
   const [loading, setLoading] = useState(true);
   
@@ -20,75 +33,190 @@ function SalesHistory() {
   const searchContainerRef = useRef(null);
   const searchInputRef = useRef(null);
 
-  useEffect(() => {
-    async function loadSales() {
-      try {
-        const [normalRes, randomRes] = await Promise.all([
-          api.get("/sales/history"),
-          api.get("/sales/random-history")
-        ]);
+  // ✅ Keyset pagination cursors (null = no more pages)
+  const [cursors, setCursors] = useState({ normal: null, random: null });
+  // Fetched rows not shown yet (see splitAtCutoff)
+  const [held, setHeld] = useState([]);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  // ✅ Filters run on the server: query params shared by both endpoints
+  function filterParams() {
+    const params = {};
+    if (dateRange === "today") params.date_from = localDate(0);
+    if (dateRange === "7") params.date_from = localDate(6);
+    if (dateRange === "30") params.date_from = localDate(29);
+    if (payment !== "all") params.payment_mode = payment;
+    return params;
+  }
 
-        const normalSales = normalRes.data.map(s => ({
-          id: s.id,
-          date: s.created_at,
-          type: s.sale_type,
-          customer: s.customer_name || "Walk-in",
-          customerPhone: s.customer_phone || "",
-          amount: s.rounded_final_amount,
-          payment: s.payment_mode
-        }));
+  // First page of each endpoint the filters need (undefined = skip it)
+  function firstCursors() {
+    return {
+      normal: filter === "random" ? undefined : null,
+      random: (filter === "all" || filter === "random") && !customerFilter ? null : undefined,
+    };
+  }
+
+  async function fetchSales(nextCursors) {
+    const requests = [];
+    const params = { ...filterParams(), limit: PAGE_SIZE };
+
+    if (nextCursors.normal !== undefined) {
+      requests.push(
+        api.get("/sales/history", {
+          params: {
+            ...params,
+            cursor: nextCursors.normal || undefined,
+            sale_type: filter === "normal" || filter === "manual" ? filter : undefined,
+            customer_id: customerFilter ? customerFilter.id : undefined,
+          }
+        }).then(res => ({ kind: "normal", res }))
+      );
+    }
+    if (nextCursors.random !== undefined) {
+      requests.push(
+        api.get("/sales/random-history", {
+          params: { ...params, cursor: nextCursors.random || undefined }
+        }).then(res => ({ kind: "random", res }))
+      );
+    }
+
+    const results = await Promise.all(requests);
+    const rows = [];
+    // Endpoints not fetched have no (more) pages
+    const newCursors = { normal: null, random: null };
+    // Date of the last (oldest) row of each page
+    const oldest = {};
 
-        const randomSales = randomRes.data.map(s => ({
+    for (const { kind, res } of results) {
+      newCursors[kind] = res.headers["x-next-cursor"] || null;
+      if (res.data.length) oldest[kind] = res.data[res.data.length - 1].created_at;
+
+      for (const s of res.data) {
+        rows.push({
           id: s.id,
           date: s.created_at,
-          type: "random",
-          customer: "—",
-          customerPhone: "",
+          type: kind === "random" ? "random" : s.sale_type,
+          customer: kind === "random" ? "—" : (s.customer_name || "Walk-in"),
+          customerId: kind === "random" ? null : s.customer_id,
+          customerPhone: kind === "random" ? "" : (s.customer_phone || ""),
           amount: s.rounded_final_amount,
           payment: s.payment_mode
-        }));
+        });
+      }
+    }
+
+    return { rows, newCursors, oldest };
+  }
+
+  function mergeByDate(existing, rows) {
+    return [...existing, ...rows].sort(
+      (a, b) => new Date(b.date) - new Date(a.date)
+    );
+  }
+
+  // Both endpoints page newest first, each with its own cursor. Rows
+  // older than the last row of an endpoint that has more pages are held
+  // back: that endpoint's next page may still have bills above them.
+  function splitAtCutoff(rows, newCursors, oldest) {
+    const cutoffs = Object.keys(newCursors)
+      .filter(kind => newCursors[kind] && oldest[kind])
+      .map(kind => new Date(oldest[kind]));
+    if (cutoffs.length === 0) return { shown: rows, held: [] };
+
+    const cutoff = Math.max(...cutoffs);
+    return {
+      shown: rows.filter(r => new Date(r.date) >= cutoff),
+      held: rows.filter(r => new Date(r.date) < cutoff),
+    };
+  }
 
-        const merged = [...normalSales, ...randomSales].sort(
-          (a, b) => new Date(b.date) - new Date(a.date)
-        );
+  // ✅ Any filter change starts again from the first page
+  useEffect(() => {
+    let ignore = false;
 
-        setSales(merged);
+    async function loadSales() {
+      setLoading(true);
+      try {
+        const { rows, newCursors, oldest } = await fetchSales(firstCursors());
+        if (ignore) return;
+        const split = splitAtCutoff(mergeByDate([], rows), newCursors, oldest);
+        setSales(split.shown);
+        setHeld(split.held);
+        setCursors(newCursors);
       } catch (err) {
         console.error("Failed to load sales history", err);
       } finally {
-        setLoading(false);
+        if (!ignore) setLoading(false);
       }
     }
 
     loadSales();
-  }, []);
+    return () => { ignore = true; };
+  }, [filter, dateRange, payment, customerFilter]);
+
+  async function loadMore() {
+    const next = {};
+    if (cursors.normal) next.normal = cursors.normal;
+    if (cursors.random) next.random = cursors.random;
+
+    setLoadingMore(true);
+    try {
+      const { rows, newCursors, oldest } = await fetchSales(next);
+      const split = splitAtCutoff(mergeByDate(held, rows), newCursors, oldest);
+      setSales(prev => mergeByDate(prev, split.shown));
+      setHeld(split.held);
+      setCursors(newCursors);
+    } catch (err) {
+      console.error("Failed to load more sales", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
 
   // ✅ Customer search handler with debounce
   useEffect(() => {
     if (!searchQuery.trim()) {
-      // ✅ Show recent 5 sales when search is empty
-      const recentSales = sales.slice(0, 5);
-      setSearchResults(recentSales);
+      setSearchResults([]);
       return;
     }
 
-    const delaySearch = setTimeout(() => {
+    let ignore = false;
+    const delaySearch = setTimeout(async () => {
       setIsSearching(true);
-      
-      // Search in sales data
-      const query = searchQuery.toLowerCase();
-      const results = sales.filter(sale => {
-        const nameMatch = sale.customer.toLowerCase().includes(query);
-        const phoneMatch = sale.customerPhone.includes(query);
-        return nameMatch || phoneMatch;
-      }).slice(0, 10); // Limit to 10 results
-
-      setSearchResults(results);
-      setIsSearching(false);
+
+      // Search all sales on the server, not just the loaded pages
+      try {
+        const res = await api.get("/sales/search", {
+          params: { q: searchQuery.trim() }
+        });
+        if (ignore) return;
+        setSearchResults(res.data.map(s => ({
+          id: s.sale_id,
+          date: s.created_at,
+          type: s.sale_type,
+          customer: s.customer_name,
+          customerId: s.customer_id,
+          customerPhone: s.customer_phone || "",
+          amount: s.amount,
+          payment: s.payment_mode
+        })));
+      } catch (err) {
+        console.error("Customer search failed", err);
+        if (!ignore) setSearchResults([]);
+      } finally {
+        setIsSearching(false);
+      }
     }, 300); // Debounce search
 
-    return () => clearTimeout(delaySearch);
-  }, [searchQuery, sales]);
+    return () => {
+      ignore = true;
+      clearTimeout(delaySearch);
+    };
+  }, [searchQuery]);
+
+  // ✅ Show recent 5 sales when search is empty
+  const dropdownSales = searchQuery.trim() ? searchResults : sales.slice(0, 5);
 
   // ✅ Close dropdown on outside click
   useEffect(() => {
@@ -115,25 +243,8 @@ function SalesHistory() {
     return () => document.removeEventListener("keydown", handleKeyPress);
   }, []);
 
-  // Combined type + date filtering
-  const now = new Date();
-
-  const filteredSales = sales.filter((s) => {
-    // type filter
-    if (filter !== "all" && s.type !== filter) return false;
-
-    // date filter
-    if (dateRange === "all") return true;
-
-    const saleDate = new Date(s.date);
-    const diffDays = (now - saleDate) / (1000 * 60 * 60 * 24);
-
-    if (dateRange === "today") return diffDays < 1;
-    if (dateRange === "7") return diffDays <= 7;
-    if (dateRange === "30") return diffDays <= 30;
-
-    return true;
-  });
+  // Type, date, payment and customer filters are applied by the server
+  const filteredSales = sales;
 
   function badge(type) {
     if (type === "normal")
@@ -153,6 +264,14 @@ function SalesHistory() {
     return "bg-gray-100 text-gray-700";
   }
 
+  // ✅ Show every bill of one customer
+  function handleCustomerSelect(sale) {
+    setSearchQuery("");
+    setShowSearchDropdown(false);
+    setSelectedIndex(-1);
+    setCustomerFilter({ id: sale.customerId, name: sale.customer });
+  }
+
   // ✅ Handle search result click
   function handleSearchSelect(saleId) {
     setSearchQuery("");
@@ -184,12 +303,12 @@ function SalesHistory() {
                   setSelectedIndex(-1);
                 }}
                 onKeyDown={(e) => {
-                  if (!showSearchDropdown || searchResults.length === 0) return;
+                  if (!showSearchDropdown || dropdownSales.length === 0) return;
 
                   if (e.key === "ArrowDown") {
                     e.preventDefault();
                     setSelectedIndex((prev) =>
-                      prev < searchResults.length - 1 ? prev + 1 : prev
+                      prev < dropdownSales.length - 1 ? prev + 1 : prev
                     );
                   }
 
@@ -200,7 +319,7 @@ function SalesHistory() {
 
                   if (e.key === "Enter" && selectedIndex >= 0) {
                     e.preventDefault();
-                    handleSearchSelect(searchResults[selectedIndex].id);
+                    handleSearchSelect(dropdownSales[selectedIndex].id);
                   }
 
                   if (e.key === "Escape") {
@@ -209,7 +328,7 @@ function SalesHistory() {
                   }
                 }}
                 onFocus={() => {
-                  if (searchResults.length > 0) {
+                  if (dropdownSales.length > 0) {
                     setShowSearchDropdown(true);
                   }
                 }}
@@ -225,7 +344,7 @@ function SalesHistory() {
             </div>
             
             {/* Search Dropdown */}
-            {showSearchDropdown && searchResults.length > 0 && (
+            {showSearchDropdown && dropdownSales.length > 0 && (
               <div className="absolute top-full mt-1 w-96 bg-white border border-gray-300 
                               rounded-lg shadow-lg max-h-96 overflow-y-auto z-50">
                 {/* ✅ Header showing what's being displayed */}
@@ -233,7 +352,7 @@ function SalesHistory() {
                   {searchQuery.trim() ? `Search results for "${searchQuery}"` : "Recent Sales"}
                 </div>
 
-                {searchResults.map((sale, index) => (
+                {dropdownSales.map((sale, index) => (
                   <div
                     key={sale.id}
                     onClick={() => handleSearchSelect(sale.id)}
@@ -270,6 +389,17 @@ function SalesHistory() {
                         <div className="text-lg font-bold text-gray-900">
                           ₹{Number(sale.amount).toFixed(2)}
                         </div>
+                        {sale.customerId && (
+                          <button
+                            onClick={(e) => {
+                              e.stopPropagation();
+                              handleCustomerSelect(sale);
+                            }}
+                            className="text-xs text-blue-600 hover:text-blue-800 hover:underline mt-1"
+                          >
+                            All bills
+                          </button>
+                        )}
                       </div>
                     </div>
                   </div>
@@ -284,7 +414,7 @@ function SalesHistory() {
             )}
 
             {/* No Results Message */}
-            {showSearchDropdown && searchQuery.trim() && searchResults.length === 0 && !isSearching && (
+            {showSearchDropdown && searchQuery.trim() && dropdownSales.length === 0 && !isSearching && (
               <div className="absolute top-full mt-1 w-96 bg-white border border-gray-300 
                               rounded-lg shadow-lg p-4 text-center z-50">
                 <div className="text-gray-400 text-4xl mb-2">🔍</div>
@@ -334,6 +464,32 @@ function SalesHistory() {
             <option value="7">Last 7 Days</option>
             <option value="30">Last 30 Days</option>
           </select>
+
+          {/* Payment filter */}
+          <select
+            value={payment}
+            onChange={(e) => setPayment(e.target.value)}
+            className="border border-gray-300 px-3 py-2 rounded-lg text-sm
+                       focus:ring-2 focus:ring-blue-500 focus:border-blue-500
+                       bg-white"
+          >
+            <option value="all">All Payments</option>
+            <option value="cash">Cash</option>
+            <option value="online">Online</option>
+            <option value="credit">Credit</option>
+          </select>
+
+          {/* Customer filter (set from the search dropdown) */}
+          {customerFilter && (
+            <button
+              onClick={() => setCustomerFilter(null)}
+              className="flex items-center gap-2 px-3 py-2 rounded-lg text-sm font-medium
+                         bg-blue-50 text-blue-700 border border-blue-200 hover:bg-blue-100"
+            >
+              👤 {customerFilter.name}
+              <span className="text-blue-400">✕</span>
+            </button>
+          )}
         </div>
       </div>
 
@@ -458,6 +614,20 @@ function SalesHistory() {
           </tbody>
         </table>
       </div>
+
+      {/* ✅ Older pages */}
+      {!loading && (cursors.normal || cursors.random) && (
+        <div className="flex justify-center">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-4 py-2 border border-gray-300 rounded-lg text-sm font-medium
+                       text-gray-700 bg-white hover:bg-gray-50 disabled:opacity-50"
+          >
+            {loadingMore ? "Loading..." : "Load older sales"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }